@@ -0,0 +1,70 @@
+#Recall-vs-latency benchmark of the approximate indexes (HNSW efSearch, IVF-Flat nprobe) against the exact flat
+#index, on synthetic clustered unit vectors like normalized sentence embeddings
+#run from the repository root with: python -m Benchmarks.bench_ann_index [--vectors 200000] [--dim 384]
+
+import argparse
+import time
+
+import numpy as np
+
+from Project.rag.database.ann_index import IndexConfig, build_index, set_search_params
+
+
+#function to build `count` unit vectors around `clusters` random topics, plus `queries` query vectors
+def synthetic_vectors(count: int, dim: int, queries: int, clusters: int = 200, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    def sample(n):
+        vectors = centers[rng.integers(0, clusters, n)] + 0.7 * rng.standard_normal((n, dim), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return sample(count), sample(queries)
+
+#function giving recall@k: the share of the exact top k found in the approximate top k
+def recall_at_k(exact: np.ndarray, approximate: np.ndarray) -> float:
+    return float(np.mean([len(set(e) & set(a)) / len(e) for e, a in zip(exact, approximate)]))
+
+#function to time searching every query one at a time (like /analyze), returning (ms per query, ids)
+def search_latency(index, queries: np.ndarray, k: int):
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        ids.append(index.search(query.reshape(1, -1), k)[1][0])
+    return (time.perf_counter() - start) / len(queries) * 1000, np.array(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=200_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="top_k")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256], help="HNSW efSearch values")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64], help="IVF nprobe values")
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_vectors(args.vectors, args.dim, args.queries)
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<26}{'build s':>9}{'ms/query':>10}{'recall':>8}")
+
+    flat = build_index(args.dim, IndexConfig(kind="flat"))
+    flat.add(vectors)
+    flat_ms, exact = search_latency(flat, queries, args.k)
+    print(f"{'flat (exact)':<26}{0:>9.1f}{flat_ms:>10.3f}{1:>8.3f}")
+
+    for kind, values, parameter in [("hnsw", args.ef_search, "ef_search"), ("ivf", args.nprobe, "nprobe")]:
+        config = IndexConfig(kind=kind)
+        start = time.perf_counter()
+        index = build_index(args.dim, config, vectors)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        for value in values:
+            setattr(config, parameter, value)
+            set_search_params(index, config)
+            ms, ids = search_latency(index, queries, args.k)
+            name = f"{kind} {parameter}={value}" + (f" (nlist={index.nlist})" if kind == "ivf" else "")
+            print(f"{name:<26}{build_seconds:>9.1f}{ms:>10.3f}{recall_at_k(exact, ids):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#Throughput benchmark (chunks per second) of chunk_text() per document against the batched chunk_documents()
+#run from the repository root with: python -m Benchmarks.bench_chunk_documents [--tokenizer NAME] [--workers N]
+
+import argparse
+import random
+import time
+
+from Benchmarks.bench_chunking import local_tokenizer, WORDS
+from Project.rag.chunking.chunking import chunk_text
+from Project.rag.chunking.batch_chunking import chunk_documents
+
+
+#function to build `count` synthetic documents of a few paragraphs each, with some shared boilerplate
+def synthetic_documents(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    boilerplate = "This document is confidential and intended for internal risk review only."
+    docs = []
+    for _ in range(count):
+        paragraphs = [" ".join(rng.choice(WORDS) for _ in range(rng.choice([10, 30, 60, 120, 250]))) for _ in range(rng.randint(3, 40))]
+        docs.append("\n".join(paragraphs + [boilerplate]))
+    return docs
+
+#function to time `fn()` once, returning (seconds, output)
+def timed(fn):
+    start = time.perf_counter()
+    output = fn()
+    return time.perf_counter() - start, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokenizer", help="Pretrained fast tokenizer name, a local WordPiece tokenizer otherwise")
+    parser.add_argument("--documents", type=int, default=2000, help="Number of synthetic documents")
+    parser.add_argument("--workers", type=int, nargs="*", default=[2], help="Worker pool sizes to try")
+    args = parser.parse_args()
+
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    else:
+        tokenizer = local_tokenizer()
+    docs = synthetic_documents(args.documents)
+    options = {"target_tokens": 300, "max_tokens": 400, "overlap_tokens": 50, "min_tokens": 100}
+
+    seconds, expected = timed(lambda: [chunk_text(doc, tokenizer.tokenize, **options) for doc in docs])
+    chunks = sum(len(chunk_list) for chunk_list in expected)
+    print(f"{'implementation':<28}{'seconds':>9}{'chunks/s':>11}{'speedup':>9}  same chunks")
+    print(f"{'chunk_text per document':<28}{seconds:>9.2f}{chunks / seconds:>11.0f}{1:>8.1f}x  -")
+
+    for workers in [1] + args.workers:
+        batched_seconds, actual = timed(lambda: chunk_documents(docs, tokenizer, workers=workers, **options))
+        print(f"{f'chunk_documents workers={workers}':<28}{batched_seconds:>9.2f}{chunks / batched_seconds:>11.0f}"
+              f"{seconds / batched_seconds:>8.1f}x  {'yes' if actual == expected else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#Benchmark of chunk_text() (a tokenizer call per paragraph, overlap and window) against the single tokenization engine
+#run from the repository root with: python -m Benchmarks.bench_chunking [--tokenizer sentence-transformers/all-MiniLM-L6-v2]
+
+import argparse
+import random
+import time
+
+from Project.rag.chunking.chunking import chunk_text
+from Project.rag.chunking.token_chunking import chunk_text_by_tokens, hf_offsets
+
+WORDS = ["revenue", "risk", "contract", "liability", "the", "of", "and", "quarterly", "clause", "counterparty",
+         "indemnification", "termination", "2024", "obligations", "shall", "notwithstanding", "agreement"]
+
+
+#function to build a small WordPiece fast tokenizer, used when no pretrained tokenizer is given (or can be downloaded)
+def local_tokenizer():
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {"[UNK]": 0}
+    for word in WORDS:
+        # Common words are whole tokens like in a real vocabulary, the longest ones are split into pieces
+        pieces = [word] if len(word) < 12 else [word[:4]] + ["##" + word[i:i + 4] for i in range(4, len(word), 4)]
+        for piece in pieces:
+            vocab.setdefault(piece, len(vocab))
+    for character in "0123456789.,":
+        vocab.setdefault(character, len(vocab))
+
+    tokenizer = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]")
+
+#function to build a synthetic document of `paragraphs` paragraphs, a few of them longer than max_tokens
+def synthetic_text(paragraphs: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(paragraphs):
+        length = rng.choice([8, 20, 40, 80, 120]) if rng.random() > 0.02 else 1500
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(length)) + ".")
+    return "\n".join(lines)
+
+#tokenize_fn wrapper counting how often chunk_text() calls the tokenizer
+class CountingTokenizer:
+    def __init__(self, tokenize_fn):
+        self.tokenize_fn = tokenize_fn
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return self.tokenize_fn(text)
+
+#function to time `fn()`, returning (best seconds, output)
+def best_time(fn, repeat):
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokenizer", help="Pretrained fast tokenizer name, a local WordPiece tokenizer otherwise")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[200, 2000, 10000], help="Document sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation, the best one is reported")
+    args = parser.parse_args()
+
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    else:
+        tokenizer = local_tokenizer()
+    offsets_fn = hf_offsets(tokenizer)
+    options = {"target_tokens": 500, "max_tokens": 800, "overlap_tokens": 50, "min_tokens": 100}
+
+    print(f"{'paragraphs':>10}{'tokens':>10}{'chunk_text ms':>15}{'calls':>8}{'by_tokens ms':>14}{'calls':>7}{'speedup':>9}{'chunks':>12}")
+    for paragraphs in args.paragraphs:
+        text = synthetic_text(paragraphs)
+
+        counting = CountingTokenizer(tokenizer.tokenize)
+        legacy_seconds, legacy_chunks = best_time(lambda: chunk_text(text, counting, **options), args.repeat)
+        legacy_calls = counting.calls // args.repeat
+
+        engine_seconds, engine_chunks = best_time(lambda: chunk_text_by_tokens(text, offsets_fn, **options), args.repeat)
+        assert all(chunk["token_count"] <= options["max_tokens"] for chunk in engine_chunks)
+
+        print(f"{paragraphs:>10}{len(offsets_fn(text)):>10}{legacy_seconds * 1000:>15.1f}{legacy_calls:>8}"
+              f"{engine_seconds * 1000:>14.1f}{1:>7}{legacy_seconds / engine_seconds:>8.1f}x"
+              f"{f'{len(legacy_chunks)}/{len(engine_chunks)}':>12}")
+
+
+if __name__ == "__main__":
+    main()
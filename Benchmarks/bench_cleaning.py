@@ -0,0 +1,75 @@
+#Throughput benchmark for clean_extracted_text() against the original eight pass implementation
+#run from the repository root with: python -m Benchmarks.bench_cleaning
+
+import argparse
+import random
+import re
+import time
+
+from Project.rag.ingestion.cleaning import DEFAULT_CLEANER
+
+
+#the original implementation, kept here as the reference the engine has to match byte for byte
+def legacy_clean(text):
+    if not text:
+        return ""
+
+    cleaned_text = re.sub(r'Page \d+ of \d+', '', text)
+    cleaned_text = re.sub(r'Header:.*\n', '', cleaned_text)
+    cleaned_text = re.sub(r'Footer:.*\n', '', cleaned_text)
+    cleaned_text = re.sub(r'\d{1,2}/\d{1,2}/\d{2,4} \d{1,2}:\d{2} (AM|PM)?', '', cleaned_text)
+    cleaned_text = re.sub(r'([a-zA-Z]:)?(\\[a-zA-Z0-9_.-]+)+\\?', '', cleaned_text)
+    cleaned_text = re.sub(r'Tracking ID: \w+', '', cleaned_text)
+    cleaned_text = re.sub(r'\n{2,}', '\n', cleaned_text)
+    cleaned_text = re.sub(r"\s{2,}", " ", cleaned_text)
+    return cleaned_text.strip()
+
+#function to build a synthetic document of roughly `size_mb` megabytes
+def synthetic_text(size_mb: float, artifact_rate: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["revenue", "risk", "contract", "liability", "the", "of", "and", "quarter", "clause", "party"]
+    artifacts = [
+        "Page 3 of 120", "Header: ACME Corp annual report\n", "Footer: confidential\n",
+        "12/31/2024 11:59 PM", "C:\\filings\\2024\\q4.pdf", "Tracking ID: AB12CD34"
+    ]
+
+    lines, size = [], 0
+    while size < size_mb * 1_000_000:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(5, 25)))
+        if rng.random() < artifact_rate:
+            line += " " + rng.choice(artifacts)
+        line += rng.choice(["\n", "\n", "\n\n", "  \n", "\n\n\n"])
+        lines.append(line)
+        size += len(line)
+    return "".join(lines)
+
+#function to time `fn` on `text`, returning (best seconds, output)
+def best_time(fn, text, repeat):
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=20.0, help="Size of each synthetic document")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation, the best one is reported")
+    args = parser.parse_args()
+
+    print(f"{'corpus':<18}{'legacy MB/s':>14}{'engine MB/s':>14}{'speedup':>10}")
+    for label, artifact_rate in [("clean prose", 0.0), ("1% artifacts", 0.01), ("20% artifacts", 0.2)]:
+        text = synthetic_text(args.size_mb, artifact_rate)
+        megabytes = len(text) / 1_000_000
+
+        legacy_seconds, expected = best_time(legacy_clean, text, args.repeat)
+        engine_seconds, actual = best_time(DEFAULT_CLEANER.clean, text, args.repeat)
+        assert actual == expected, f"engine output differs from the legacy output on {label}"
+
+        print(f"{label:<18}{megabytes / legacy_seconds:>14.1f}{megabytes / engine_seconds:>14.1f}{legacy_seconds / engine_seconds:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#Memory / recall / latency benchmark of compressed vector storage (fp16, int8, PQ codes) against float32, with and
+#without exact re-ranking of over-fetched candidates from the full vectors memory mapped from disk
+#run from the repository root with: python -m Benchmarks.bench_compressed_index [--vectors 200000] [--kind flat]
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from Benchmarks.bench_ann_index import recall_at_k, search_latency, synthetic_vectors
+from Project.rag.database.ann_index import INDEX_KINDS, STORAGE_TYPES, IndexConfig, build_index
+from Project.rag.database.vector_store import FullVectorStore, exact_rerank
+
+
+#function to time over-fetching `oversample` * k candidates per query and re-ranking them exactly, returning
+#(ms per query, ids)
+def reranked_latency(index, store: FullVectorStore, queries: np.ndarray, k: int, oversample: int):
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        query = query.reshape(1, -1)
+        candidates = index.search(query, k * oversample)[1]
+        ids.append(exact_rerank(store, query, candidates, k)[1][0])
+    return (time.perf_counter() - start) / len(queries) * 1000, np.array(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=200_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="top_k")
+    parser.add_argument("--kind", choices=INDEX_KINDS, default="flat", help="Index kind holding the codes")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (default: one per 8 dims)")
+    parser.add_argument("--oversample", type=int, default=4, help="Candidates fetched per result when re-ranking")
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_vectors(args.vectors, args.dim, args.queries)
+    exact = faiss.IndexFlatIP(args.dim)
+    exact.add(vectors)
+    _, expected = exact.search(queries, args.k)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FullVectorStore(args.dim, Path(directory) / "vectors.f32") # Full vectors on disk, memory mapped
+        store.append(vectors)
+
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.kind} index, {args.queries} queries, recall@{args.k}, "
+              f"re-rank over-fetches {args.oversample}x (+{4 * args.dim} bytes/vector on disk)")
+        print(f"{'storage':<10}{'bytes/vec':>10}{'build s':>9}{'ms/query':>10}{'recall':>8}{'rerank ms':>11}{'recall':>8}")
+
+        for storage in STORAGE_TYPES:
+            config = IndexConfig(kind=args.kind, storage=storage, pq_m=args.pq_m)
+            start = time.perf_counter()
+            index = build_index(args.dim, config, vectors)
+            index.add(vectors)
+            build_seconds = time.perf_counter() - start
+            bytes_per_vector = len(faiss.serialize_index(index)) / index.ntotal
+
+            ms, ids = search_latency(index, queries, args.k)
+            rerank_ms, reranked = reranked_latency(index, store, queries, args.k, args.oversample)
+            print(f"{storage:<10}{bytes_per_vector:>10.1f}{build_seconds:>9.1f}{ms:>10.3f}{recall_at_k(expected, ids):>8.3f}"
+                  f"{rerank_ms:>11.3f}{recall_at_k(expected, reranked):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#Benchmark of document-level updates: deleting and upserting one document (tombstones, searches skip them) and
+#compacting the deleted vectors away, against rebuilding the whole index, as the corpus grows
+#run from the repository root with: python -m Benchmarks.bench_document_updates [--model all-MiniLM-L6-v2] [--vectors 20000 80000]
+
+import argparse
+import time
+
+import numpy as np
+
+from Benchmarks.bench_ann_index import synthetic_vectors
+from Benchmarks.bench_metadata_store import synthetic_chunks
+from Project.rag.database.ann_index import IndexConfig
+from Project.rag.database.vector_db import VectorDatabase
+from Project.rag.llm.embeddings import EmbeddingService
+
+
+#function to time `fn()` in milliseconds, returning (ms, result)
+def timed_ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path")
+    parser.add_argument("--vectors", type=int, nargs="+", default=[20_000, 80_000], help="Corpus sizes")
+    parser.add_argument("--kinds", nargs="+", choices=["flat", "hnsw", "ivf"], default=["flat", "hnsw"], help="Index kinds")
+    parser.add_argument("--documents", type=int, default=20, help="Documents deleted and upserted per measurement")
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model)
+    service.show_progress_bar = False
+    dim = service.get_embedding_dimension()
+    per_document = 50 # synthetic_chunks' chunks per document
+    service.embed_array(["warm up"]) # The model load isn't part of the measurements
+
+    print(f"one {per_document} chunk document per update (upserts include embedding it), mean of {args.documents}")
+    print(f"{'vectors':>8}  {'index':<6}{'delete ms':>11}{'upsert ms':>11}{'search ms':>11}{'compact ms':>12}{'rebuild ms':>12}")
+    for count in args.vectors:
+        vectors, queries = synthetic_vectors(count, dim, 50)
+        chunks = synthetic_chunks(count, per_document)
+        for kind in args.kinds:
+            vector_db = VectorDatabase(service, IndexConfig(kind=kind, flat_below=0, compact_ratio=None))
+            vector_db.add_vectors(chunks, vectors)
+
+            documents = [f"doc-{d}" for d in range(args.documents)]
+            delete_ms = np.mean([timed_ms(lambda: vector_db.delete_document(document_id))[0] for document_id in documents])
+            upsert_ms = np.mean([
+                timed_ms(lambda: vector_db.upsert_document(document_id, chunks[d * per_document:(d + 1) * per_document]))[0]
+                for d, document_id in enumerate(documents)
+            ])
+
+            # Searches skip the tombstoned vectors inside the scan
+            search_ms, _ = timed_ms(lambda: [vector_db._search_vectors(query.reshape(1, -1), 5) for query in queries])
+            compact_ms, _ = timed_ms(vector_db.compact)
+            rebuild_ms, _ = timed_ms(vector_db.rebuild_index)
+            print(f"{count:>8}  {kind:<6}{delete_ms:>11.2f}{upsert_ms:>11.2f}{search_ms / len(queries):>11.3f}{compact_ms:>12.1f}{rebuild_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
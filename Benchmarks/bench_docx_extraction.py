@@ -0,0 +1,76 @@
+#Benchmark of DOCX extraction: python-docx (text load + core properties load) against the zip-once streaming reader
+#run from the repository root with: python -m Benchmarks.bench_docx_extraction
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+
+from docx import Document
+from pathlib import Path
+from Project.rag.ingestion.docx_extraction import open_docx
+
+SAMPLE_FILES = Path("Tests/ingestion_tests/files/docx") # Same samples the ingestion tests use
+
+
+#the original extraction: one Document() load for the text and another one for the author
+def python_docx_extract(path):
+    text = "\n".join(para.text for para in Document(path).paragraphs)
+    author = Document(path).core_properties.author
+    return text, author
+
+def streaming_extract(path):
+    author, pieces = open_docx(path)
+    return "".join(pieces), author
+
+#function to write a large synthetic docx with `paragraphs` paragraphs and a few tables
+def synthetic_docx(path: Path, paragraphs: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["revenue", "risk", "contract", "liability", "the", "of", "and", "quarter", "clause", "party"]
+    doc = Document()
+    doc.core_properties.author = "Benchmark"
+    for i in range(paragraphs):
+        para = doc.add_paragraph(" ".join(rng.choice(words) for _ in range(rng.randint(10, 60))))
+        para.add_run("\tbold run").bold = True
+        if i % 500 == 0:
+            table = doc.add_table(rows=2, cols=2)
+            table.cell(0, 0).text = "cell text is not part of the paragraphs"
+    doc.save(path)
+
+#function to return (best seconds, peak traced bytes, output) of `fn` on `path`
+def measure(fn, path, repeat):
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn(path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=20000, help="Paragraphs in the synthetic document")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation, the best one is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = Path(tmp) / "synthetic.docx"
+        synthetic_docx(synthetic, args.paragraphs)
+        files = sorted(SAMPLE_FILES.glob("*.docx")) + [synthetic]
+
+        print(f"{'file':<20}{'KB':>8}{'python-docx ms':>16}{'stream ms':>11}{'python-docx peak MB':>21}{'stream peak MB':>16}  same output")
+        for path in files:
+            docx_seconds, docx_peak, expected = measure(python_docx_extract, path, args.repeat)
+            stream_seconds, stream_peak, actual = measure(streaming_extract, path, args.repeat)
+            print(f"{path.name[:19]:<20}{path.stat().st_size / 1024:>8.0f}{docx_seconds * 1000:>16.1f}{stream_seconds * 1000:>11.1f}"
+                  f"{docx_peak / 1e6:>21.1f}{stream_peak / 1e6:>16.1f}  {'yes' if actual == expected else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
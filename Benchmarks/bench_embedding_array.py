@@ -0,0 +1,61 @@
+#Memory/time benchmark of handing encoder output to FAISS: the old list round trip (embed_batch() -> tolist() ->
+#np.array(..., dtype="float32")) against the contiguous float32 array of embed_array()
+#run from the repository root with: python -m Benchmarks.bench_embedding_array [--rows 10000 50000] [--model NAME]
+
+import argparse
+import time
+import tracemalloc
+
+import faiss
+import numpy as np
+
+
+#function to run `fn()` twice, returning (seconds, peak bytes allocated while it ran); tracing slows down
+#allocations, so the time comes from an untraced run
+def measure(fn):
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000], help="Number of embeddings")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--model", help="Also time embed_batch() against embed_array() end to end with this model")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'path':>14}{'seconds':>10}{'peak MB':>10}")
+    for rows in args.rows:
+        # Stand-in for SentenceTransformer.encode() output: normalized float32 rows
+        encoded = np.random.default_rng(0).standard_normal((rows, args.dim), dtype=np.float32)
+        encoded /= np.linalg.norm(encoded, axis=1, keepdims=True)
+
+        paths = [
+            ("list trip", lambda: faiss.IndexFlatIP(args.dim).add(np.array(encoded.tolist(), dtype="float32"))),
+            ("array", lambda: faiss.IndexFlatIP(args.dim).add(np.ascontiguousarray(encoded, dtype=np.float32)))
+        ]
+        for name, fn in paths:
+            seconds, peak = measure(fn)
+            print(f"{rows:>8}{name:>14}{seconds:>10.3f}{peak / 1e6:>10.1f}")
+
+    if args.model:
+        from Benchmarks.bench_embedding_cache import synthetic_batches
+        from Project.rag.llm.embeddings import EmbeddingService
+
+        service = EmbeddingService(args.model)
+        texts = synthetic_batches(1, 2000, 0.0)[0]
+        for name, fn in [("embed_batch", lambda: np.array(service.embed_batch(texts), dtype="float32")),
+                         ("embed_array", lambda: service.embed_array(texts))]:
+            seconds, peak = measure(fn)
+            print(f"{len(texts):>8}{name:>14}{seconds:>10.3f}{peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
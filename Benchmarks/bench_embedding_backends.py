@@ -0,0 +1,47 @@
+#Throughput benchmark (texts per second) of the embedding backends: PyTorch SentenceTransformer, ONNX Runtime and
+#ONNX Runtime with int8 quantized weights, with their cosine agreement with PyTorch on the fixed corpus
+#run from the repository root with: python -m Benchmarks.bench_embedding_backends [--model NAME] [--onnx-dir DIR]
+
+import argparse
+import tempfile
+import time
+
+from Benchmarks.bench_embedding_cache import synthetic_batches
+from Project.rag.llm.embeddings import create_embedding_service
+from Project.rag.llm.onnx_embeddings import cosine_agreement, export_onnx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path")
+    parser.add_argument("--onnx-dir", help="Directory written by export_onnx, the model is exported to a temporary one otherwise")
+    parser.add_argument("--texts", type=int, default=1000, help="Number of synthetic chunk texts")
+    parser.add_argument("--threads", type=int, help="ONNX Runtime intra-op threads")
+    args = parser.parse_args()
+
+    texts = synthetic_batches(1, args.texts, 0.0)[0]
+    with tempfile.TemporaryDirectory() as folder:
+        onnx_dir = args.onnx_dir or export_onnx(args.model, folder)
+        reference = create_embedding_service("torch", args.model)
+        backends = [
+            ("torch", reference),
+            ("onnx", create_embedding_service("onnx", onnx_dir, threads=args.threads)),
+            ("onnx-int8", create_embedding_service("onnx-int8", onnx_dir, threads=args.threads))
+        ]
+
+        baseline = None
+        print(f"{'backend':<12}{'seconds':>9}{'texts/s':>10}{'speedup':>9}{'min cosine':>12}{'mean cosine':>13}")
+        for name, service in backends:
+            service.embed_array(texts[:32]) # Warm up
+            start = time.perf_counter()
+            service.embed_array(texts)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+
+            cosines = cosine_agreement(reference, service)
+            print(f"{name:<12}{seconds:>9.2f}{len(texts) / seconds:>10.0f}{baseline / seconds:>8.1f}x"
+                  f"{cosines.min():>12.5f}{cosines.mean():>13.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#Benchmark of embedding batching on a mixed-length chunk corpus (tiny merged tails to 800-token windows):
+#fixed batches of 32 in arrival order, SentenceTransformer.encode() (32 per batch, sorted by characters, the
+#previous embed_batch) and the length-bucketed token budget batches of embed_array(), with padding waste
+#run from the repository root with: python -m Benchmarks.bench_embedding_batching [--model NAME] [--texts 2000]
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from Benchmarks.bench_chunking import WORDS
+from Project.rag.llm.embeddings import create_embedding_service
+from Project.rag.llm.length_batching import PaddingStats, fixed_batch_padding
+
+
+#function to build `count` chunk texts with the length spread chunk_text() produces
+def mixed_length_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    lengths = [8, 30, 100, 250, 400, 600] # Words
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.choice(lengths))) for _ in range(count)]
+
+#function to time `fn()` once, returning (seconds, output)
+def timed(fn):
+    start = time.perf_counter()
+    output = fn()
+    return time.perf_counter() - start, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path (ONNX export directory for --backend onnx)")
+    parser.add_argument("--backend", default="torch", help="torch, onnx or onnx-int8")
+    parser.add_argument("--texts", type=int, default=2000, help="Number of synthetic chunk texts")
+    parser.add_argument("--max-batch-tokens", type=int, default=4096, help="Token budget of a bucketed batch")
+    args = parser.parse_args()
+
+    texts = mixed_length_texts(args.texts)
+    service = create_embedding_service(args.backend, args.model)
+    service.show_progress_bar = False
+    service.max_batch_tokens = args.max_batch_tokens
+    lengths = service._token_lengths(texts)
+
+    def arrival_order():
+        return np.concatenate([service._encode_batch(texts[start:start + 32]) for start in range(0, len(texts), 32)])
+
+    by_characters = np.argsort([-len(text) for text in texts], kind="stable")
+    runs = [("arrival order, 32/batch", arrival_order, fixed_batch_padding(lengths))]
+    if args.backend == "torch":
+        runs.append(("encode(), 32/batch", lambda: service.model.encode(texts, normalize_embeddings=True, batch_size=32),
+                     fixed_batch_padding([lengths[index] for index in by_characters])))
+    runs.append(("token budget buckets", lambda: service.embed_array(texts), None))
+
+    baseline, expected = None, None
+    print(f"{'batching':<26}{'seconds':>9}{'texts/s':>9}{'speedup':>9}{'batches':>9}{'padding waste':>15}")
+    for name, fn, padding in runs:
+        service.padding_stats = PaddingStats()
+        seconds, output = timed(fn)
+        padding = padding or service.padding_stats
+        baseline = baseline or seconds
+        expected = output if expected is None else expected
+        assert np.allclose(output, expected, atol=1e-4)
+        print(f"{name:<26}{seconds:>9.2f}{len(texts) / seconds:>9.1f}{baseline / seconds:>8.1f}x{padding.batches:>9}{padding.waste:>15.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#Benchmark of EmbeddingService.embed_batch() with and without the two tier embedding cache, on chunk texts where
+#part of every batch was embedded before (overlap windows, re-ingested documents, boilerplate)
+#run from the repository root with: python -m Benchmarks.bench_embedding_cache [--model all-MiniLM-L6-v2]
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from Benchmarks.bench_chunking import WORDS
+from Project.rag.llm.embeddings import EmbeddingService
+from Project.rag.llm.embedding_cache import EmbeddingCache
+
+
+#function to build `batches` batches of chunk texts where about `repeated` of each batch was seen in earlier batches
+def synthetic_batches(batches: int, batch_size: int, repeated: float, seed: int = 0):
+    rng = random.Random(seed)
+    seen, result = [], []
+    for _ in range(batches):
+        batch = []
+        for _ in range(batch_size):
+            if seen and rng.random() < repeated:
+                batch.append(rng.choice(seen))
+            else:
+                batch.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))))
+        seen.extend(batch)
+        result.append(batch)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path")
+    parser.add_argument("--batches", type=int, default=10, help="Number of embed_batch() calls")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per call")
+    parser.add_argument("--repeated", type=float, default=0.4, help="Share of every batch embedded before")
+    args = parser.parse_args()
+
+    batches = synthetic_batches(args.batches, args.batch_size, args.repeated)
+    plain = EmbeddingService(args.model)
+    start = time.perf_counter()
+    for batch in batches:
+        plain.model.encode(batch, normalize_embeddings=True, batch_size=32)
+    plain_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        cached = EmbeddingService(args.model, cache=EmbeddingCache(Path(folder) / "embeddings.sqlite"))
+        start = time.perf_counter()
+        for batch in batches:
+            cached.embed_batch(batch)
+        cached_seconds = time.perf_counter() - start
+        cached.cache.close()
+
+        # A second run (e.g. re-ingesting the same corpus) only reads the disk tier
+        warm = EmbeddingService(args.model, cache=EmbeddingCache(Path(folder) / "embeddings.sqlite"))
+        start = time.perf_counter()
+        for batch in batches:
+            warm.embed_batch(batch)
+        warm_seconds = time.perf_counter() - start
+
+    texts = args.batches * args.batch_size
+    stats = cached.cache.stats
+    print(f"{'run':<24}{'seconds':>9}{'texts/s':>10}{'speedup':>9}{'hit rate':>10}")
+    print(f"{'no cache':<24}{plain_seconds:>9.2f}{texts / plain_seconds:>10.0f}{1:>8.1f}x{'-':>10}")
+    print(f"{'cold cache':<24}{cached_seconds:>9.2f}{texts / cached_seconds:>10.0f}{plain_seconds / cached_seconds:>8.1f}x{stats.hit_rate:>10.2f}")
+    print(f"{'warm cache (disk)':<24}{warm_seconds:>9.2f}{texts / warm_seconds:>10.0f}{plain_seconds / warm_seconds:>8.1f}x{warm.cache.stats.hit_rate:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
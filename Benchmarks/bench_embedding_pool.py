@@ -0,0 +1,49 @@
+#Scaling benchmark of the multi-process embedding pool: texts per second in this process (torch picks the threads)
+#and with 1, 2, 4, ... worker processes of pinned threads, with the scaling efficiency against one worker
+#run from the repository root with: python -m Benchmarks.bench_embedding_pool [--model NAME] [--workers 1 2 4 8]
+
+import argparse
+import os
+import time
+
+from Benchmarks.bench_embedding_cache import synthetic_batches
+from Project.rag.llm.embeddings import create_embedding_service
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path (ONNX export directory for --backend onnx)")
+    parser.add_argument("--backend", default="torch", help="torch, onnx or onnx-int8")
+    parser.add_argument("--texts", type=int, default=4000, help="Number of synthetic chunk texts")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[workers for workers in (1, 2, 4, 8, 16, 32, 64) if workers <= cores], help="Pool sizes to try")
+    args = parser.parse_args()
+
+    texts = synthetic_batches(1, args.texts, 0.0)[0]
+    service = create_embedding_service(args.backend, args.model)
+    service.show_progress_bar = False
+
+    start = time.perf_counter()
+    service.embed_array(texts)
+    seconds = time.perf_counter() - start
+    print(f"{cores} cores")
+    print(f"{'mode':<22}{'seconds':>9}{'texts/s':>10}{'efficiency':>12}")
+    print(f"{'in process':<22}{seconds:>9.2f}{len(texts) / seconds:>10.0f}{'-':>12}")
+
+    single = None
+    for workers in args.workers:
+        pool = service.start_pool(workers=workers, min_texts=1)
+        pool.warm_up() # Model loading isn't part of the throughput
+        start = time.perf_counter()
+        service.embed_array(texts)
+        seconds = time.perf_counter() - start
+        service.stop_pool()
+
+        rate = len(texts) / seconds
+        single = single or rate / workers
+        print(f"{f'pool workers={workers}':<22}{seconds:>9.2f}{rate:>10.0f}{rate / (single * workers):>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#Benchmark of metadata-filtered search: filters applied inside the FAISS scan (VectorDatabase.search(filters=...))
+#against the post-filtering callers did before (fetch top_k * 10, drop what doesn't match), for selective and
+#non-selective filters. Reports ms per query, recall@k against the exact filtered top k and the share of the k
+#results actually returned
+#run from the repository root with: python -m Benchmarks.bench_filtered_search [--vectors 100000] [--kinds flat hnsw ivf]
+
+import argparse
+import time
+
+import numpy as np
+
+from Benchmarks.bench_ann_index import synthetic_vectors
+from Benchmarks.bench_metadata_store import synthetic_chunks
+from Project.rag.database.ann_index import INDEX_KINDS, IndexConfig
+from Project.rag.database.vector_db import VectorDatabase
+
+AUTHORS = 1000 # Distinct authors, one per document in turn, so a filter on n of them matches n / 1000 of the corpus
+POST_FILTER_FETCH = 10 # Post-filtering fetches top_k times this many results
+
+
+#stands in for the embedding model: only the dimension is needed, queries are searched as vectors
+class Dimension:
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_embedding_dimension(self):
+        return self.dim
+
+#function to give the recall@k of `found` against `expected` (both (queries, k), -1 for no result) and the
+#share of the k slots filled
+def recall_and_fill(expected: np.ndarray, found: np.ndarray):
+    recall = np.mean([
+        len(set(e[e != -1]) & set(f[f != -1])) / max((e != -1).sum(), 1)
+        for e, f in zip(expected, found)
+    ])
+    return recall, (found != -1).mean()
+
+#function to time searching every query one at a time, returning (ms per query, ids stacked)
+def per_query(search, queries: np.ndarray):
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        ids.append(search(query.reshape(1, -1)))
+    return (time.perf_counter() - start) / len(queries) * 1000, np.vstack(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="top_k")
+    parser.add_argument("--kinds", nargs="+", choices=INDEX_KINDS, default=list(INDEX_KINDS), help="Index kinds")
+    parser.add_argument("--selectivity", type=float, nargs="+", default=[0.5, 0.05, 0.005, 0.001], help="Shares of the corpus the filters match")
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_vectors(args.vectors, args.dim, args.queries)
+    chunks = synthetic_chunks(args.vectors, per_document=10)
+    for position, chunk in enumerate(chunks):
+        chunk["metadata"] = {**chunk["metadata"], "author": f"author-{position // 10 % AUTHORS}"}
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, top_k={args.k}; post-filter fetches top {args.k * POST_FILTER_FETCH}")
+    print(f"{'index':<6}{'matches':>9}  {'method':<12}{'ms/query':>10}{'recall':>8}{'filled':>8}")
+    for kind in args.kinds:
+        vector_db = VectorDatabase(Dimension(args.dim), IndexConfig(kind=kind, flat_below=0))
+        vector_db.add_vectors(chunks, vectors)
+        for selectivity in args.selectivity:
+            filters = {"author": [f"author-{a}" for a in range(max(1, round(selectivity * AUTHORS)))]}
+            mask = vector_db._filter_index().match(filters)
+            ids = np.flatnonzero(mask)
+            scores = queries @ vectors[ids].T
+            expected = ids[np.argsort(-scores, axis=1, kind="stable")[:, :args.k]]
+
+            def post_filter(query):
+                found = vector_db.index.search(query, args.k * POST_FILTER_FETCH)[1][0]
+                found = found[(found != -1) & mask[np.maximum(found, 0)]][:args.k]
+                return np.pad(found, (0, args.k - len(found)), constant_values=-1).reshape(1, -1)
+
+            rows = [
+                ("post-filter", *per_query(post_filter, queries)),
+                ("in-scan", *per_query(lambda query: vector_db._search_vectors(query, args.k, filters)[1], queries))
+            ]
+            for method, ms, found in rows:
+                recall, filled = recall_and_fill(expected, found)
+                print(f"{kind:<6}{len(ids):>9}  {method:<12}{ms:>10.3f}{recall:>8.3f}{filled:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#Side-by-side benchmark of the html text extraction backends
+#run from the repository root with: python -m Benchmarks.bench_html_extraction [--url URL ...]
+
+import argparse
+import random
+import time
+import urllib.request
+
+from pathlib import Path
+from Project.rag.ingestion.html_extraction import HTML_BACKENDS
+
+SAMPLE_URLS = Path("Tests/ingestion_tests/files/html") # Same samples the ingestion tests use
+
+
+#function to build a large synthetic page with the elements the backends have to drop
+def synthetic_page(sections: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["risk", "policy", "vendor", "audit", "&amp;", "control", "&#8217;s", "report", "data"]
+    parts = ["<!DOCTYPE html><html><head><title>Synthetic</title><style>p { color: red; }</style></head><body>"]
+    parts.append("<nav><ul>" + "".join(f"<li><a href='#s{i}'>Section {i}</a></li>" for i in range(50)) + "</ul></nav>")
+    for i in range(sections):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(20, 80)))
+        cell = " ".join(rng.choice(words) for _ in range(5))
+        parts.append(f"<div class='section' id='s{i}'><h2>Section {i}</h2><p>{text}<br>{text}</p><!-- note -->")
+        parts.append(f"<script>var x{i} = '<p>not text</p>';</script><table><tr><td>{i}</td><td>{cell}</td></tr></table></div>")
+    parts.append("<footer>Copyright</footer></body></html>")
+    return "".join(parts)
+
+#function to download the sample pages, skipping the ones that can't be reached
+def sample_pages(urls):
+    pages = {}
+    for url in urls:
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                pages[url] = response.read().decode(response.headers.get_content_charset() or "utf-8", "replace")
+        except OSError as e:
+            print(f"skipping {url}: {e}")
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", action="append", default=[], help="Extra page to include (can be repeated)")
+    parser.add_argument("--sections", type=int, default=5000, help="Sections in the synthetic page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend, the best one is reported")
+    args = parser.parse_args()
+
+    urls = [line.strip() for f in SAMPLE_URLS.glob("*.txt") for line in f.read_text().splitlines() if line.strip()]
+    pages = sample_pages(urls + args.url)
+    pages["synthetic"] = synthetic_page(args.sections)
+
+    print(f"{'page':<40}{'KB':>8}" + "".join(f"{name + ' ms':>12}" for name in HTML_BACKENDS) + "  same text as bs4")
+    for name, html in pages.items():
+        timings, outputs = {}, {}
+        for backend, extract_text in HTML_BACKENDS.items():
+            best = float("inf")
+            try:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    outputs[backend] = extract_text(html)
+                    best = min(best, time.perf_counter() - start)
+            except ImportError:
+                pass # Optional backend not installed
+            timings[backend] = best
+
+        same = [backend for backend in outputs if backend != "bs4" and outputs[backend] == outputs["bs4"]]
+        print(f"{name[:39]:<40}{len(html) / 1024:>8.0f}"
+              + "".join(f"{timings[b] * 1000:>12.1f}" if timings[b] != float("inf") else f"{'n/a':>12}" for b in HTML_BACKENDS)
+              + f"  {', '.join(same) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
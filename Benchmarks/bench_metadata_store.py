@@ -0,0 +1,91 @@
+#Benchmark of the chunk metadata: the pickled list of dicts (np.save / np.load) against the SQLite MetadataStore,
+#for save time, file size, load time, resident memory after loading (a lower bound for the list, which reuses
+#memory freed by earlier steps) and hydrating one search's results
+#run from the repository root with: python -m Benchmarks.bench_metadata_store [--chunks 100000 200000]
+
+import argparse
+import gc
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from Benchmarks.bench_chunking import WORDS
+from Project.rag.database.metadata_store import MetadataStore
+
+
+#function to build `count` chunk dicts like prepare_chunks', `per_document` chunks per document
+def synthetic_chunks(count: int, per_document: int = 50, seed: int = 0):
+    rng = random.Random(seed)
+    chunks = []
+    for position in range(count):
+        document, chunk = divmod(position, per_document)
+        file_name = f"contract_{document}.pdf"
+        chunks.append({
+            "document_id": f"doc-{document}",
+            "chunk_id": str(chunk),
+            "text": " ".join(rng.choice(WORDS) for _ in range(150)),
+            "file_name": file_name,
+            "source": "pdf",
+            "metadata": {"source_type": "pdf", "file_name": file_name, "author": "unknown"},
+            "created_at": "2026-02-02T22:17:45.123456+00:00",
+            "citation": f"{file_name}#chunk{chunk}"
+        })
+    return chunks
+
+#function giving the resident memory of this process in MB (Linux)
+def rss_mb() -> float:
+    gc.collect()
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / 1e6
+
+#function to time `fn()`, returning (seconds, result)
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[50_000, 100_000, 200_000], help="Corpus sizes")
+    parser.add_argument("--k", type=int, default=5, help="Chunks hydrated per search")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8}  {'format':<14}{'save s':>8}{'file MB':>9}{'load s':>8}{'RSS +MB':>9}{'hydrate ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.chunks:
+            chunks = synthetic_chunks(count)
+            positions = random.Random(1).sample(range(count), args.k)
+            npy_path, sqlite_path = Path(directory) / f"{count}.npy", Path(directory) / f"{count}.sqlite"
+
+            save_s, _ = timed(lambda: np.save(npy_path, np.array(chunks, dtype=object)))
+            store = MetadataStore()
+            store.extend(chunks)
+            store_save_s, _ = timed(lambda: store.save(sqlite_path))
+            store.close()
+            del chunks, store
+
+            # The store first: the pickled list's memory isn't always returned to the OS once freed
+            before = rss_mb()
+            load_s, opened = timed(lambda: MetadataStore.open(sqlite_path))
+            hydrate_s, _ = timed(lambda: opened.get_many(positions))
+            rows = [("sqlite store", store_save_s, sqlite_path, load_s, rss_mb() - before, hydrate_s)]
+            opened.close()
+            del opened
+
+            before = rss_mb()
+            load_s, loaded = timed(lambda: np.load(npy_path, allow_pickle=True).tolist())
+            hydrate_s, _ = timed(lambda: [loaded[position] for position in positions])
+            rows.insert(0, ("pickled list", save_s, npy_path, load_s, rss_mb() - before, hydrate_s))
+            del loaded
+
+            for name, save_seconds, path, load_seconds, rss, hydrate_seconds in rows:
+                print(f"{count:>8}  {name:<14}{save_seconds:>8.2f}{path.stat().st_size / 1e6:>9.1f}{load_seconds:>8.3f}"
+                      f"{rss:>9.1f}{hydrate_seconds * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#Cold start benchmark of a saved vector database directory: load time, resident memory and first search latency
+#when memory mapped against read into memory, per index kind
+#run from the repository root with: python -m Benchmarks.bench_persistence [--model all-MiniLM-L6-v2] [--vectors 200000]
+
+import argparse
+import tempfile
+import time
+
+from Benchmarks.bench_ann_index import synthetic_vectors
+from Benchmarks.bench_metadata_store import rss_mb, synthetic_chunks
+from Project.rag.database.ann_index import INDEX_KINDS, IndexConfig, build_index
+from Project.rag.database.vector_db import VectorDatabase
+from Project.rag.llm.embeddings import EmbeddingService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path")
+    parser.add_argument("--vectors", type=int, default=200_000, help="Corpus size")
+    parser.add_argument("--kinds", nargs="+", choices=INDEX_KINDS, default=list(INDEX_KINDS), help="Index kinds")
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model)
+    dim = service.get_embedding_dimension()
+    vectors, _ = synthetic_vectors(args.vectors, dim, 1)
+    chunks = synthetic_chunks(args.vectors)
+    service.embed_query("warm up") # The model load isn't part of the measurements
+
+    print(f"{args.vectors} vectors x {dim} dims (files in the page cache, as right after a deploy's download)")
+    print(f"{'index':<7}{'load':<8}{'load s':>9}{'RSS +MB':>9}{'1st search ms':>15}")
+    for kind in args.kinds:
+        with tempfile.TemporaryDirectory() as directory:
+            vector_db = VectorDatabase(service, IndexConfig(kind=kind))
+            vector_db.index = build_index(dim, vector_db.index_config, vectors)
+            vector_db.index.add(vectors) # The corpus goes straight into the index, nothing is embedded
+            vector_db.metadata.extend(chunks)
+            vector_db.save_directory(directory)
+            del vector_db
+
+            # Mapped first: memory freed by the in-memory load isn't always returned to the OS
+            for mmap in (True, False):
+                before = rss_mb()
+                start = time.perf_counter()
+                loaded = VectorDatabase(service, IndexConfig(kind=kind))
+                loaded.load_directory(directory, mmap=mmap)
+                load_seconds = time.perf_counter() - start
+                rss = rss_mb() - before
+
+                start = time.perf_counter()
+                loaded.search("termination clause liability", top_k=5, min_similarity=-1)
+                search_ms = (time.perf_counter() - start) * 1000
+                print(f"{kind:<7}{'mmap' if mmap else 'read':<8}{load_seconds:>9.3f}{rss:>9.1f}{search_ms:>15.1f}")
+                del loaded
+
+
+if __name__ == "__main__":
+    main()
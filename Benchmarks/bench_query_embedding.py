@@ -0,0 +1,49 @@
+#Latency benchmark of embedding one search query: encode() + list round trip (the old search() path), the single
+#query fast path, and a query cache hit
+#run from the repository root with: python -m Benchmarks.bench_query_embedding [--model all-MiniLM-L6-v2]
+
+import argparse
+import time
+
+import numpy as np
+
+from Project.rag.llm.embeddings import EmbeddingService
+from Project.rag.llm.embedding_cache import QueryEmbeddingCache
+
+QUERY = "What are the termination and liability risks in this contract?"
+
+
+#function to time `fn()`, returning the median microseconds per call
+def median_us(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per path, the median is reported")
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model, query_cache=QueryEmbeddingCache())
+    service.embed_query(QUERY) # Warm up, and fill the cache
+
+    paths = [
+        ("encode() + list round trip", lambda: np.array([service.model.encode(QUERY, normalize_embeddings=True).tolist()], dtype="float32")),
+        ("single query fast path", lambda: service._encode_one(QUERY)),
+        ("query cache hit", lambda: service.embed_query(QUERY))
+    ]
+    baseline = None
+    print(f"{'path':<30}{'median us':>12}{'speedup':>10}")
+    for name, fn in paths:
+        us = median_us(fn, args.calls if name != "query cache hit" else args.calls * 100)
+        baseline = baseline or us
+        print(f"{name:<30}{us:>12.1f}{baseline / us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#Throughput benchmark of VectorDatabase.search_batch() against looping over search(), end to end (query embedding
+#+ index search + filtering) and for the index search alone, on a synthetic corpus of unit vectors
+#run from the repository root with: python -m Benchmarks.bench_search_batch [--model all-MiniLM-L6-v2] [--vectors 100000]
+
+import argparse
+import random
+import time
+
+from Benchmarks.bench_ann_index import synthetic_vectors
+from Benchmarks.bench_chunking import WORDS
+from Benchmarks.bench_metadata_store import synthetic_chunks
+from Project.rag.database.vector_db import VectorDatabase
+from Project.rag.llm.embeddings import EmbeddingService
+
+
+#function to time `fn()`, returning (seconds, result)
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence transformer name or local path")
+    parser.add_argument("--vectors", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=256, help="Queries per run")
+    parser.add_argument("--k", type=int, default=5, help="top_k")
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model)
+    service.show_progress_bar = False
+    vector_db = VectorDatabase(service)
+    vectors, query_vectors = synthetic_vectors(args.vectors, vector_db.dim, args.queries)
+    vector_db.add_vectors(synthetic_chunks(args.vectors), vectors) # Only the queries are embedded
+
+    rng = random.Random(0)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 20))) for _ in range(args.queries)]
+    vector_db.search_batch(queries[:8], args.k) # Warm up
+
+    loop_s, looped = timed(lambda: [vector_db.search(query, args.k, min_similarity=-1) for query in queries])
+    batch_s, batched = timed(lambda: vector_db.search_batch(queries, args.k, min_similarity=-1))
+    index_loop_s, _ = timed(lambda: [vector_db.index.search(query_vectors[i:i + 1], args.k) for i in range(args.queries)])
+    index_batch_s, _ = timed(lambda: vector_db.index.search(query_vectors, args.k))
+
+    same = sum(
+        [m["citation"] for m in results] == [m["citation"] for m, _ in pairs]
+        for (results, _), pairs in zip(looped, batched)
+    )
+    print(f"{args.vectors} vectors x {vector_db.dim} dims, {args.queries} queries, top_k={args.k}")
+    print(f"{'path':<34}{'total s':>9}{'ms/query':>10}{'speedup':>9}")
+    for name, seconds, baseline in [
+        ("search() loop", loop_s, loop_s),
+        ("search_batch()", batch_s, loop_s),
+        ("index.search, 1 row at a time", index_loop_s, index_loop_s),
+        ("index.search, query matrix", index_batch_s, index_loop_s)
+    ]:
+        print(f"{name:<34}{seconds:>9.2f}{seconds / args.queries * 1000:>10.3f}{baseline / seconds:>8.1f}x")
+    print(f"same top_k ids for {same}/{args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
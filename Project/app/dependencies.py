@@ -1,11 +1,24 @@
 from .services.rag_service import RAGService
 from Project import VectorDatabase
-from Project import EmbeddingService
 from Project import HFLocalGenerationModel
+from Project.rag.llm.embeddings import create_embedding_service
+from Project.rag.llm.embedding_cache import QueryEmbeddingCache
+from Project.rag.database.shared_index import load_shared
 
-embedding = EmbeddingService()
-vector_store = VectorDatabase(embedding_service=embedding)
+import os
+
+# EMBEDDING_BACKEND is torch, onnx or onnx-int8; for the ONNX backends EMBEDDING_MODEL is an export_onnx directory
+embedding = create_embedding_service(
+    backend=os.environ.get("EMBEDDING_BACKEND", "torch"),
+    model_name=os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+    query_cache=QueryEmbeddingCache() # Repeated /analyze queries skip the model
+)
+# VECTOR_DB_DIR is a save_directory() directory; every worker process maps its files read-only, so the index and
+# metadata are held once in the page cache however many workers run, searched with the IndexConfig it was saved
+# with. Without it the database starts empty
+vector_db_dir = os.environ.get("VECTOR_DB_DIR")
+vector_store = load_shared(embedding, vector_db_dir) if vector_db_dir else VectorDatabase(embedding_service=embedding)
 llm_client = HFLocalGenerationModel()
 
 def get_rag_service() -> RAGService:
-    return RAGService(vector_store, llm_client)
\ No newline at end of file
+    return RAGService(vector_store, llm_client)
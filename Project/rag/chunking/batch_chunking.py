@@ -0,0 +1,100 @@
+#Chunks many documents at once, sending the texts to count through the tokenizer in large batches
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from .chunking import iter_paragraphs, send_step, _merge_small_chunks, _raw_chunk_steps
+
+import math
+
+Document = Union[str, Dict] # Raw text, or a normalized document with a "text" field
+
+
+#function to turn a tokenizer into a batch token counter (list of texts -> list of token counts).
+#A Hugging Face fast tokenizer's Rust backend encodes `batch_size` texts per call, giving the same counts as
+#len(tokenizer.tokenize(text)); any other callable is treated as a tokenize_fn and called per text
+def batch_token_counter(tokenizer, batch_size: int = 1024) -> Callable[[List[str]], List[int]]:
+    if not getattr(tokenizer, "is_fast", False):
+        return lambda texts: [len(tokenizer(text)) for text in texts]
+
+    backend = tokenizer.backend_tokenizer
+    encode_batch = getattr(backend, "encode_batch_fast", backend.encode_batch) # No offsets needed when available
+
+    def count(texts: List[str]) -> List[int]:
+        if backend.truncation is not None:
+            backend.no_truncation() # Left enabled by an earlier encode(); transformers sets it again on every call
+        counts = []
+        for start in range(0, len(texts), batch_size):
+            counts.extend(len(encoding.ids) for encoding in encode_batch(texts[start:start + batch_size], add_special_tokens=False))
+        return counts
+
+    return count
+
+#Batched version of chunk_text: returns one chunk list per document, identical to
+#chunk_text(text, tokenizer.tokenize, ...) for a Hugging Face fast tokenizer (or chunk_text(text, tokenizer, ...)
+#for a plain tokenize_fn). All paragraphs of all documents are counted first in large batches; the overlap and
+#window texts that chunking asks for afterwards are batched across documents round by round
+def chunk_documents(
+    docs: Iterable[Document], # Texts or normalized documents to be chunked
+    tokenizer, # Hugging Face fast tokenizer, or a function to tokenize text into a list of tokens
+    target_tokens: int = 500, # Desired number of tokens per chunk
+    max_tokens: int = 800, # Maximum allowed tokens per chunk
+    overlap_tokens: int = 50, # Number of overlapping tokens between chunks
+    min_tokens: int = 100, # Minimum number of tokens required to form a chunk
+    workers: Optional[int] = None, # Worker processes sharing the documents (None or 1 = this process only)
+    batch_size: int = 1024 # Most texts per tokenizer call
+) -> List[List[Dict]]:
+
+    texts = [doc["text"] if isinstance(doc, dict) else doc for doc in docs]
+    options = (target_tokens, max_tokens, overlap_tokens, min_tokens, batch_size)
+
+    if not workers or workers == 1 or len(texts) <= 1:
+        return _chunk_shard(texts, tokenizer, options)
+
+    # Contiguous shards keep the output in input order; a few shards per worker balance uneven documents
+    shard_size = math.ceil(len(texts) / (workers * 4))
+    shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_chunk_shard, shards, repeat(tokenizer), repeat(options))
+        return [chunks for shard in results for chunks in shard]
+
+#function to chunk a list of texts in this process (run inside a worker process when chunk_documents has workers)
+def _chunk_shard(texts: List[str], tokenizer, options) -> List[List[Dict]]:
+    target_tokens, max_tokens, overlap_tokens, min_tokens, batch_size = options
+    count_batch = batch_token_counter(tokenizer, batch_size)
+    counts: Dict[str, int] = {} # text -> token count, shared by all documents so repeated text is counted once
+
+    def count_missing(requested: Iterable[str]):
+        missing = list(dict.fromkeys(text for text in requested if text not in counts))
+        if missing:
+            counts.update(zip(missing, count_batch(missing)))
+
+    paragraph_lists = [list(iter_paragraphs([text])) for text in texts]
+    count_missing(paragraph for paragraphs in paragraph_lists for paragraph in paragraphs)
+
+    raw_chunks: List[List[Dict]] = [[] for _ in texts]
+    active = {} # document index -> (step generator, its pending step)
+    for index, paragraphs in enumerate(paragraph_lists):
+        steps = _raw_chunk_steps(paragraphs, target_tokens, max_tokens, overlap_tokens)
+        active[index] = (steps, next(steps, None))
+
+    while active:
+        # Advance every document until it is done or asks for a text that hasn't been counted yet
+        waiting = {}
+        for index, (steps, step) in active.items():
+            while step is not None:
+                if isinstance(step, dict):
+                    raw_chunks[index].append(step)
+                    step = next(steps, None)
+                elif all(text in counts for text in step):
+                    step = send_step(steps, [counts[text] for text in step])
+                else:
+                    waiting[index] = (steps, step)
+                    break
+
+        # One batch for everything the waiting documents asked for
+        count_missing(text for _, step in waiting.values() for text in step)
+        active = waiting
+
+    return [list(_merge_small_chunks(chunks, min_tokens)) for chunks in raw_chunks]
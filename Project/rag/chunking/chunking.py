@@ -1,6 +1,6 @@
 #Takes the normalized ouput from the ingestion phase and splits the text into smaller chunks
 
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Generator, Iterable, Iterator
 
 def chunk_text(
     text: str, # The text to be chunked
@@ -10,80 +10,147 @@ def chunk_text(
     overlap_tokens: int = 50, # Number of overlapping tokens between chunks
     min_tokens: int = 100 # Minimum number of tokens required to form a chunk
 ) -> List[Dict]:
-    
+
     if not text.strip():
         return []
-    
-    # Split text into paragraphs and clean up whitespace
-    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
-    
-    chunks = [] # List to hold the final chunks
-    current_chunk_texts: List[str] = [] # Texts in the current chunk
-    current_token_count = 0 # Current number of tokens in the chunk
+
+    return list(chunk_stream([text], tokenize_fn, target_tokens, max_tokens, overlap_tokens, min_tokens))
+
+#Streaming version of chunk_text: takes an iterable of text pieces (e.g. cleaned pages) and yields chunks
+#as soon as they are final. Joining the pieces and calling chunk_text gives the same chunks.
+def chunk_stream(
+    pieces: Iterable[str], # Text pieces whose concatenation is the text to be chunked
+    tokenize_fn: Callable[[str], List], # Function to tokenize text into a list of tokens
+    target_tokens: int = 500, # Desired number of tokens per chunk
+    max_tokens: int = 800, # Maximum allowed tokens per chunk
+    overlap_tokens: int = 50, # Number of overlapping tokens between chunks
+    min_tokens: int = 100 # Minimum number of tokens required to form a chunk
+) -> Iterator[Dict]:
 
     # Helper function to count tokens in a given text
     def count_tokens(txt: str) -> int:
         return len(tokenize_fn(txt))
 
-    # Helper function to finalize and store the current chunk
+    chunks = _iter_raw_chunks(iter_paragraphs(pieces), count_tokens, target_tokens, max_tokens, overlap_tokens)
+    return _merge_small_chunks(chunks, min_tokens)
+
+# Split a stream of text pieces into paragraphs and clean up whitespace
+def iter_paragraphs(pieces: Iterable[str]) -> Iterator[str]:
+    partial = "" # Text after the last newline seen so far
+    for piece in pieces:
+        lines = (partial + piece).split("\n")
+        partial = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line.strip()
+
+    if partial.strip():
+        yield partial.strip()
+
+# Group paragraphs into chunks of roughly target_tokens, before small chunks are merged
+def _iter_raw_chunks(
+    paragraphs: Iterable[str],
+    count_tokens: Callable[[str], int],
+    target_tokens: int,
+    max_tokens: int,
+    overlap_tokens: int
+) -> Iterator[Dict]:
+
+    steps = _raw_chunk_steps(paragraphs, target_tokens, max_tokens, overlap_tokens)
+    step = next(steps, None)
+    while step is not None:
+        if isinstance(step, dict):
+            yield step # A finished chunk
+            step = next(steps, None)
+        else:
+            step = send_step(steps, [count_tokens(text) for text in step]) # Texts to count
+
+# Send a value into a step generator, returns its next step or None once it is done
+def send_step(steps: Generator, value):
+    try:
+        return steps.send(value)
+    except StopIteration:
+        return None
+
+# The chunk packing as a generator of steps, so the caller decides how texts are tokenized:
+# yields a list of texts and expects their token counts sent back, or yields a finished chunk (sent back None).
+# chunk_text answers every request right away, chunk_documents batches requests across documents
+def _raw_chunk_steps(
+    paragraphs: Iterable[str],
+    target_tokens: int,
+    max_tokens: int,
+    overlap_tokens: int
+) -> Generator:
+
+    current_chunk_texts: List[str] = [] # Texts in the current chunk
+    current_token_count = 0 # Current number of tokens in the chunk
+
+    # Helper generator to finalize the current chunk, returns None if there is nothing to finalize
     def flush_chunk():
         nonlocal current_chunk_texts, current_token_count
-        
+
         if not current_chunk_texts:
-            return
-        
+            return None
+
         # Finalize the current chunk
         chunk_text = " ".join(current_chunk_texts)
-        chunks.append({
+        chunk = {
                 "text": chunk_text,
                 "token_count": current_token_count
-            })
+            }
 
         # Reset current chunk and prepare overlap
         if overlap_tokens > 0:
             words = chunk_text.split()
             overlap_text = " ".join(words[-overlap_tokens:]) # Get last 'overlap_tokens' words
             current_chunk_texts = [overlap_text] # Start new chunk with overlap
-            current_token_count = count_tokens(overlap_text) # Update token count
-        else: 
+            (current_token_count,) = yield [overlap_text] # Update token count
+        else:
             current_chunk_texts = []
             current_token_count = 0
 
+        return chunk
+
     for paragraph in paragraphs:
-        paragraph_token_count = count_tokens(paragraph) 
+        (paragraph_token_count,) = yield [paragraph]
 
         #fallback for very large paragraphs
         if paragraph_token_count > max_tokens:
-            flush_chunk() # Finalize current chunk before handling large paragraph
+            chunk = yield from flush_chunk() # Finalize current chunk before handling large paragraph
+            if chunk:
+                yield chunk
 
             words = paragraph.split()
-            window_start_position = 0
-
-            # Sliding window approach for large paragraphs
-            while window_start_position < len(words):
-                window_text = " ".join(words[window_start_position:window_start_position + target_tokens])
-                chunks.append({
-                    "text": window_text,  
-                    "token_count": count_tokens(window_text)
-                })
-                
-                # Move start index forward with overlap consideration
-                window_start_position += target_tokens - overlap_tokens 
-            
+
+            # Sliding window approach for large paragraphs, all windows are counted in one request
+            window_texts = [
+                " ".join(words[window_start_position:window_start_position + target_tokens])
+                for window_start_position in range(0, len(words), target_tokens - overlap_tokens) # Move start index forward with overlap consideration
+            ]
+            window_token_counts = yield window_texts
+            for window_text, window_token_count in zip(window_texts, window_token_counts):
+                yield {
+                    "text": window_text,
+                    "token_count": window_token_count
+                }
+
             continue # Move to the next paragraph
-        
+
         # Check if adding the paragraph exceeds target tokens and finalize chunk if needed
         if current_token_count + paragraph_token_count > target_tokens:
-            flush_chunk()
+            chunk = yield from flush_chunk()
+            if chunk:
+                yield chunk
 
         current_chunk_texts.append(paragraph)
         current_token_count += paragraph_token_count
-            
-    flush_chunk() # Final flush for any remaining text
 
-    #merge small chunks
+    chunk = yield from flush_chunk() # Final flush for any remaining text
+    if chunk:
+        yield chunk
 
-    merged_chunks = [] 
+#merge small chunks
+def _merge_small_chunks(chunks: Iterable[Dict], min_tokens: int) -> Iterator[Dict]:
     buffer = None #buffer represents the current chunk being built
     chunk_id = 1
 
@@ -95,11 +162,9 @@ def chunk_text(
             if buffer:
                 buffer["chunk_id"] = chunk_id
                 chunk_id += 1
-                merged_chunks.append(buffer) # Finalize and store the buffer chunk
-            buffer = chunk 
-    
+                yield buffer # Finalize and store the buffer chunk
+            buffer = chunk
+
     # Finalize any remaining buffer chunk
     if buffer:
-        merged_chunks.append(buffer)
-
-    return merged_chunks # Return the final list of all chunks
\ No newline at end of file
+        yield buffer
@@ -0,0 +1,161 @@
+#Chunking engine that tokenizes a document once and cuts chunks and overlap directly in token space
+
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+import re
+
+# (start, end) character span of every token in document order, as pairs or an (n, 2) array
+Offsets = Union[Sequence[Tuple[int, int]], np.ndarray]
+
+LINE_PATTERN = re.compile(r"[^\n]+")
+
+# Every character str.split() splits on (str.isspace())
+WHITESPACE_CODEPOINTS = [
+    *range(0x09, 0x0E), *range(0x1C, 0x21), 0x85, 0xA0, 0x1680, *range(0x2000, 0x200B),
+    0x2028, 0x2029, 0x202F, 0x205F, 0x3000
+]
+_IS_WHITESPACE = np.zeros(WHITESPACE_CODEPOINTS[-1] + 2, dtype=bool) # Lookup table, the last entry stands for "above"
+_IS_WHITESPACE[WHITESPACE_CODEPOINTS] = True
+
+
+#offsets function for whitespace tokens, the same tokens as text.split(), found with array operations
+def whitespace_offsets(text: str) -> np.ndarray:
+    # One element per str index; lone surrogates (e.g. from a bad PDF text layer) are valid str, so pass them through
+    codepoints = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+    is_space = _IS_WHITESPACE[np.minimum(codepoints, len(_IS_WHITESPACE) - 1)]
+
+    # A token starts after whitespace (or at 0) and ends before whitespace (or at the end)
+    padded = np.concatenate(([True], is_space, [True]))
+    starts = np.flatnonzero(~padded[1:-1] & padded[:-2])
+    ends = np.flatnonzero(~padded[1:-1] & padded[2:]) + 1
+    return np.stack([starts, ends], axis=1)
+
+#function to build an offsets function from a Hugging Face fast tokenizer (e.g. EmbeddingService().tokenizer()).
+#The lines of the document go through the Rust tokenizer as one batch (it slows down per token on one huge
+#string, and batches run on all cores), then the spans are shifted to document positions.
+#Special tokens are left out, so counts are what the text itself costs
+def hf_offsets(tokenizer) -> Callable[[str], Offsets]:
+    if not getattr(tokenizer, "is_fast", False):
+        raise ValueError("Offset mapping needs a fast (Rust backed) Hugging Face tokenizer")
+
+    def offsets(text: str) -> Offsets:
+        lines = list(LINE_PATTERN.finditer(text))
+        if not lines:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        encoded = tokenizer(
+            [line.group() for line in lines],
+            add_special_tokens=False,
+            truncation=False, # Also resets truncation a previous encode() left enabled on the backend tokenizer
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False # Paragraphs can be longer than the model's max length on purpose
+        )["offset_mapping"]
+
+        spans = np.array(list(chain.from_iterable(encoded)), dtype=np.int64).reshape(-1, 2)
+        line_starts = np.array([line.start() for line in lines], dtype=np.int64)
+        return spans + np.repeat(line_starts, [len(line_spans) for line_spans in encoded])[:, None]
+
+    return offsets
+
+#Token space version of chunk_text: the document is tokenized once by `offsets_fn` and every budget is a
+#difference of token indices. Chunks are slices of the original text, so their token counts are exact and
+#consecutive chunks share exactly `overlap_tokens` tokens
+def chunk_text_by_tokens(
+    text: str, # The text to be chunked
+    offsets_fn: Callable[[str], Offsets], # Function returning the character span of every token in the text
+    target_tokens: int = 500, # Desired number of tokens per chunk
+    max_tokens: int = 800, # Maximum allowed tokens per chunk
+    overlap_tokens: int = 50, # Number of overlapping tokens between chunks
+    min_tokens: int = 100 # Minimum number of tokens required to form a chunk
+) -> List[Dict]:
+
+    if overlap_tokens >= target_tokens:
+        raise ValueError("overlap_tokens must be smaller than target_tokens")
+    if not text.strip():
+        return []
+
+    spans = np.asarray(offsets_fn(text), dtype=np.int64).reshape(-1, 2) # The only tokenizer call
+    starts, ends = spans[:, 0], spans[:, 1]
+
+    paragraphs = _paragraph_token_ranges(text, starts)
+    ranges = _iter_token_ranges(paragraphs, target_tokens, max_tokens, overlap_tokens)
+
+    chunks = []
+    for chunk_id, (first, last) in enumerate(_merge_small_ranges(ranges, min_tokens), start=1):
+        chunks.append({
+            "text": text[starts[first]:ends[last - 1]],
+            "token_count": int(last - first),
+            "chunk_id": chunk_id,
+            "char_start": int(starts[first]), # Where the chunk is in the original text
+            "char_end": int(ends[last - 1])
+        })
+    return chunks
+
+# Token index range [first, last) of every non blank line: the number of tokens starting before a position
+# is a prefix count, so all line boundaries are looked up in one binary search over the token starts
+def _paragraph_token_ranges(text: str, starts: np.ndarray) -> Iterator[Tuple[int, int]]:
+    boundaries = np.array([line.span() for line in LINE_PATTERN.finditer(text)], dtype=np.int64).reshape(-1, 2)
+    token_ranges = np.searchsorted(starts, boundaries).tolist()
+    for first, last in token_ranges:
+        if last > first:
+            yield first, last
+
+# Group paragraph ranges into chunk ranges of roughly target_tokens, before small chunks are merged.
+# Same greedy packing as chunk_text, but the overlap carried into the next chunk is its last overlap_tokens tokens
+def _iter_token_ranges(
+    paragraphs: Iterable[Tuple[int, int]],
+    target_tokens: int,
+    max_tokens: int,
+    overlap_tokens: int
+) -> Iterator[Tuple[int, int]]:
+
+    chunk_start, chunk_end = 0, 0 # Current chunk [chunk_start, chunk_end), starts with the carried overlap
+    has_new_tokens = False # Whether the current chunk has anything besides the overlap
+
+    for first, last in paragraphs:
+        #fallback for very large paragraphs: sliding windows of target_tokens
+        if last - first > max_tokens:
+            if has_new_tokens:
+                yield chunk_start, chunk_end
+
+            window_start = first
+            while True:
+                window_end = min(window_start + target_tokens, last)
+                yield window_start, window_end
+                if window_end == last:
+                    break
+                window_start = window_end - overlap_tokens
+
+            chunk_start, chunk_end, has_new_tokens = max(window_start, last - overlap_tokens), last, False
+            continue
+
+        # Finalize the chunk if adding the paragraph exceeds target tokens
+        if has_new_tokens and last - chunk_start > target_tokens:
+            yield chunk_start, chunk_end
+            chunk_start, has_new_tokens = max(chunk_start, chunk_end - overlap_tokens), False
+
+        # The overlap is dropped rather than pushing a chunk past max_tokens
+        if chunk_end == chunk_start or last - chunk_start > max_tokens:
+            chunk_start = first
+        chunk_end, has_new_tokens = last, True
+
+    if has_new_tokens:
+        yield chunk_start, chunk_end
+
+# Merge ranges smaller than min_tokens into the previous one; ranges overlap, so the union is counted once
+def _merge_small_ranges(ranges: Iterable[Tuple[int, int]], min_tokens: int) -> Iterator[Tuple[int, int]]:
+    buffer = None
+    for first, last in ranges:
+        if buffer and last - first < min_tokens:
+            buffer = (buffer[0], last)
+        else:
+            if buffer:
+                yield buffer
+            buffer = (first, last)
+
+    if buffer:
+        yield buffer
@@ -0,0 +1,266 @@
+#FAISS index types for the vector database: exact flat search, HNSW graphs and IVF inverted lists, storing
+#float32 vectors or compressed codes (fp16 / int8 scalar quantization, product quantization)
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Optional, Tuple
+
+import faiss
+import math
+import numpy as np
+import threading
+
+INDEX_KINDS = ("flat", "hnsw", "ivf")
+
+STORAGE_TYPES = ("float32", "fp16", "int8", "pq")
+
+MIN_POINTS_PER_CENTROID = 39 # FAISS warns when k-means has fewer training points per list
+PQ_CENTROIDS = 256 # 8 bit codes: each PQ sub-quantizer needs at least this many training vectors
+
+SCALAR_QUANTIZERS = {"fp16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+
+# Exact (flat) scans of query matrices with at least this many floats (queries x dim) are scored with one BLAS
+# matrix product; below it FAISS loops over queries. Its default (128000, 333 queries at 384 dims) leaves batched
+# search on the loop; a single query stays off BLAS, where it is slower. Only lowered while a batch is searched
+# (see blas_for_batch), FAISS's own default applies everywhere else
+BLAS_MIN_QUERY_FLOATS = 1536 # 4 queries at 384 dims, about where BLAS starts to win on one core
+
+_blas_lock = threading.Lock()
+_blas_batches = 0 # Batches searching with the lowered threshold right now
+_blas_default = None # FAISS's threshold before the first of them lowered it
+
+
+#index type and its build / search parameters. Every kind starts as an exact float32 flat index and is rebuilt into
+#the configured one once the corpus reaches flat_below vectors, where a brute-force scan stops being cheap (and
+#int8 / PQ codes have enough vectors to train on)
+@dataclass
+class IndexConfig:
+    kind: str = "flat" # "flat", "hnsw" or "ivf"
+    flat_below: int = 10_000 # Vectors kept in an exact flat index before switching to `kind`
+    hnsw_m: int = 32 # HNSW graph neighbors per node (memory and recall grow with it)
+    ef_construction: int = 200 # HNSW candidate list size while building
+    ef_search: int = 64 # HNSW candidate list size per query: higher = better recall, slower
+    nlist: Optional[int] = None # IVF inverted lists, None for about 4 * sqrt(vectors) when trained
+    nprobe: int = 16 # IVF lists scanned per query: higher = better recall, slower
+    storage: str = "float32" # Vector codes: "float32" (4 bytes/dim), "fp16" (2), "int8" (1) or "pq" (pq_m bytes/vector)
+    pq_m: Optional[int] = None # PQ sub-quantizers (must divide the dimension), None for one per 8 dimensions
+    rerank: bool = False # Re-rank over-fetched candidates with exact scores from the full float32 vectors
+    oversample: int = 4 # Candidates fetched per result when re-ranking
+    compact_ratio: Optional[float] = None # Compact inside the delete once this share of indexed vectors is deleted, None to only compact() explicitly
+    ivf_retrain_growth: Optional[float] = 4 # Retrain an IVF index once it holds this many times MIN_POINTS_PER_CENTROID vectors per list and more lists are due, None to only rebuild_index() explicitly
+    filter_exact_below: int = 10_000 # Filters matching at most this many chunks are scored exactly rather than through an HNSW graph
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind {self.kind!r}, expected one of {INDEX_KINDS}")
+        if self.storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown vector storage {self.storage!r}, expected one of {STORAGE_TYPES}")
+
+    # The settings as a JSON-ready dict, e.g. for a saved directory's manifest
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    # Settings saved by to_dict; fields this version doesn't know are ignored and missing ones keep their defaults
+    @classmethod
+    def from_dict(cls, settings: Dict) -> "IndexConfig":
+        known = {field.name for field in fields(cls)}
+        return cls(**{name: value for name, value in settings.items() if name in known})
+
+
+#context manager lowering FAISS's BLAS threshold to BLAS_MIN_QUERY_FLOATS while a batch of `query_floats` floats
+#(queries x dim) is searched, so a flat scan scores it with one matrix product. The threshold is a process-wide FAISS
+#global: overlapping batches (e.g. from several threads) share the lowered value and the last one to finish restores
+#the previous one. Batches under BLAS_MIN_QUERY_FLOATS leave it alone, they stay on the loop either way
+@contextmanager
+def blas_for_batch(query_floats: int):
+    global _blas_batches, _blas_default
+    if query_floats < BLAS_MIN_QUERY_FLOATS:
+        yield
+        return
+
+    with _blas_lock:
+        if not _blas_batches:
+            _blas_default = faiss.cvar.distance_compute_blas_threshold
+            faiss.cvar.distance_compute_blas_threshold = BLAS_MIN_QUERY_FLOATS
+        _blas_batches += 1
+    try:
+        yield
+    finally:
+        with _blas_lock:
+            _blas_batches -= 1
+            if not _blas_batches:
+                faiss.cvar.distance_compute_blas_threshold = _blas_default
+
+
+#function to unwrap an ID-mapped index (IndexIDMap2 around a flat or HNSW index) to the index that searches
+def base_index(index: faiss.Index) -> faiss.Index:
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap2):
+        return faiss.downcast_index(index.index)
+    return index
+
+#function to give an empty index stable vector IDs: IVF lists store the IDs themselves, other kinds are wrapped in
+#an IndexIDMap2 (ID -> position both ways, so vectors can be reconstructed by ID)
+def with_ids(index: faiss.Index) -> faiss.Index:
+    if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap2(index)
+
+#function to tell if an index stores vector IDs; indexes saved before IDs were stable use positions as IDs
+def has_ids(index: faiss.Index) -> bool:
+    return isinstance(faiss.downcast_index(index), (faiss.IndexIDMap2, faiss.IndexIVF))
+
+#function to add vectors under the given IDs
+def add_with_ids(index: faiss.Index, vectors: np.ndarray, ids: np.ndarray):
+    if has_ids(index):
+        index.add_with_ids(vectors, ids)
+    elif len(ids) and not np.array_equal(ids, np.arange(index.ntotal, index.ntotal + len(ids))):
+        raise ValueError("An index without stored IDs can only take the next positions as IDs")
+    else:
+        index.add(vectors)
+
+#function to give the kind of a FAISS index
+def index_kind(index: faiss.Index) -> str:
+    index = base_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+#function to give how an index stores its vectors (one of STORAGE_TYPES)
+def index_storage(index: faiss.Index) -> str:
+    index = base_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage) # HNSW keeps its codes in a separate flat index
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+    return "float32"
+
+#function to choose the number of PQ sub-quantizers for `dim` dimensions
+def pq_subquantizers(config: IndexConfig, dim: int) -> int:
+    pq_m = config.pq_m or max(1, dim // 8)
+    if dim % pq_m:
+        raise ValueError(f"pq_m={pq_m} must divide the vector dimension {dim}")
+    return pq_m
+
+#function to choose the number of IVF lists for `count` training vectors
+def ivf_lists(config: IndexConfig, count: int) -> int:
+    nlist = config.nlist or int(4 * math.sqrt(count))
+    return max(1, min(nlist, count // MIN_POINTS_PER_CENTROID))
+
+#function to tell if an IVF index has outgrown the lists it was trained with: its k-means ran on the vectors of the
+#rebuild, so as the corpus grows the lists get longer (slower probes) and the centroids stop fitting the data. True
+#once ivf_lists() would give more lists and every list averages ivf_retrain_growth times MIN_POINTS_PER_CENTROID
+#vectors; the lists then grow about geometrically, so retraining costs amortized constant time per added vector
+def ivf_outgrown(index: faiss.Index, config: IndexConfig) -> bool:
+    index = base_index(index)
+    if config.ivf_retrain_growth is None or not isinstance(index, faiss.IndexIVF):
+        return False
+    return ivf_lists(config, index.ntotal) > index.nlist and index.ntotal >= config.ivf_retrain_growth * MIN_POINTS_PER_CENTROID * index.nlist
+
+#function to build an empty inner product index of `config.kind` storing `config.storage` codes; indexes that
+#need training (IVF, int8, PQ) are trained on `vectors`
+def build_index(dim: int, config: IndexConfig, vectors: Optional[np.ndarray] = None) -> faiss.Index:
+    metric = faiss.METRIC_INNER_PRODUCT
+    storage = config.storage
+    if storage == "pq":
+        pq_m = pq_subquantizers(config, dim)
+
+    if config.kind == "hnsw":
+        if storage == "pq":
+            index = faiss.IndexHNSWPQ(dim, pq_m, config.hnsw_m, 8, metric)
+        elif storage in SCALAR_QUANTIZERS:
+            index = faiss.IndexHNSWSQ(dim, SCALAR_QUANTIZERS[storage], config.hnsw_m, metric)
+        else:
+            index = faiss.IndexHNSWFlat(dim, config.hnsw_m, metric)
+        index.hnsw.efConstruction = config.ef_construction
+    elif config.kind == "ivf":
+        if vectors is None or len(vectors) == 0:
+            raise ValueError("An IVF index needs training vectors")
+        nlist = ivf_lists(config, len(vectors))
+        if storage == "pq":
+            index = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, pq_m, 8, metric)
+        elif storage in SCALAR_QUANTIZERS:
+            index = faiss.IndexIVFScalarQuantizer(faiss.IndexFlatIP(dim), dim, nlist, SCALAR_QUANTIZERS[storage], metric)
+        else:
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, metric)
+    else:
+        if storage == "pq":
+            index = faiss.IndexPQ(dim, pq_m, 8, metric)
+        elif storage in SCALAR_QUANTIZERS:
+            index = faiss.IndexScalarQuantizer(dim, SCALAR_QUANTIZERS[storage], metric)
+        else:
+            index = faiss.IndexFlatIP(dim)
+
+    if not index.is_trained:
+        if vectors is None or len(vectors) == 0:
+            raise ValueError(f"A {config.kind} index with {storage} storage needs training vectors")
+        if storage == "pq" and len(vectors) < PQ_CENTROIDS:
+            raise ValueError(f"PQ storage needs at least {PQ_CENTROIDS} training vectors, got {len(vectors)}")
+        index.train(vectors)
+
+    set_search_params(index, config)
+    return index
+
+#function to apply the search parameters of `config` to an index of any kind
+def set_search_params(index: faiss.Index, config: IndexConfig):
+    index = base_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.ef_search
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = config.nprobe
+
+#function to tell if an index's search takes parameters, and so an ID selector; a flat PQ index (IndexPQ) rejects
+#any, so its results are filtered after the search instead
+def accepts_selector(index: faiss.Index) -> bool:
+    return not isinstance(base_index(index), faiss.IndexPQ)
+
+#function to give per-search parameters restricting a search to the IDs `selector` accepts; they replace the
+#index's own, so they carry config's efSearch / nprobe. Keep `selector` referenced while searching. When the
+#selector accepts only `selectivity` of the vectors, efSearch / nprobe grow by 1 / selectivity, so about as many
+#accepted candidates are visited as an unfiltered search would
+def search_parameters(index: faiss.Index, config: IndexConfig, selector: faiss.IDSelector, selectivity: float = 1.0) -> faiss.SearchParameters:
+    index = base_index(index)
+    scale = 1 / max(selectivity, 1e-9)
+    if isinstance(index, faiss.IndexHNSW):
+        ef_search = max(config.ef_search, min(math.ceil(config.ef_search * scale), index.ntotal)) # Never past every node
+        return faiss.SearchParametersHNSW(efSearch=ef_search, sel=selector)
+    if isinstance(index, faiss.IndexIVF):
+        nprobe = max(config.nprobe, min(math.ceil(config.nprobe * scale), index.nlist)) # Never past every list
+        return faiss.SearchParametersIVF(nprobe=nprobe, sel=selector)
+    return faiss.SearchParameters(sel=selector)
+
+#function to read every vector and its ID out of an index (to rebuild it as another kind); compressed codes
+#decode to approximations of the original vectors
+def index_contents(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap2):
+        return faiss.vector_to_array(index.id_map).astype(np.int64), index.index.reconstruct_n(0, index.ntotal)
+    if isinstance(index, faiss.IndexIVF):
+        lists = index.invlists
+        ids = [
+            faiss.rev_swig_ptr(lists.get_ids(list_no), lists.list_size(list_no)).copy()
+            for list_no in range(index.nlist) if lists.list_size(list_no)
+        ]
+        ids = np.concatenate(ids).astype(np.int64) if ids else np.zeros(0, dtype=np.int64)
+        index.set_direct_map_type(faiss.DirectMap.Hashtable) # IVF lists aren't addressable by ID otherwise
+        vectors = index.reconstruct_batch(ids)
+        index.set_direct_map_type(faiss.DirectMap.NoMap) # remove_ids only takes ID arrays with a hashtable
+        return ids, vectors
+    return np.arange(index.ntotal, dtype=np.int64), index.reconstruct_n(0, index.ntotal)
+
+#function to read every vector back out of an index, in ID order
+def index_vectors(index: faiss.Index) -> np.ndarray:
+    ids, vectors = index_contents(index)
+    return vectors[np.argsort(ids, kind="stable")]
+
+#function to remove vectors by ID in place, returning False for indexes that must be rebuilt instead: HNSW graphs
+#can't drop nodes, and an index without stored IDs would shift the positions that serve as IDs
+def remove_ids(index: faiss.Index, ids: np.ndarray) -> bool:
+    if not has_ids(index) or isinstance(base_index(index), faiss.IndexHNSW):
+        return False
+    index.remove_ids(faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64)))
+    return True
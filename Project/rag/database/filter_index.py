@@ -0,0 +1,174 @@
+#Metadata filters for vector search: per-field inverted indexes (value -> vector IDs) over the fields chunks share
+#with their document, and a created_at column for ranges. A filter becomes a bitmap of the matching IDs, which
+#FAISS checks inside the scan, so top_k is taken among matching chunks only
+
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Dict, Optional, Sequence, Tuple
+
+import faiss
+import math
+import numpy as np
+
+VALUE_FIELDS = ("document_id", "file_name", "source", "author") # Matched by value (one, or any of a list)
+RANGE_FIELDS = ("created_at",) # Matched by a range: {"gte": ..., "lt": ...}
+RANGE_OPERATORS = {"gt": np.greater, "gte": np.greater_equal, "lt": np.less, "lte": np.less_equal}
+
+
+#the IDs of every value of each filter field, and the created_at time of each ID. IDs of deleted chunks are
+#dropped from matches (never reused, so their postings can stay). Filters are dicts of conditions that must all
+#hold, e.g. {"source": "pdf", "author": ["alice", "bob"], "created_at": {"gte": "2026-01-01T00:00:00+00:00"}}
+class FilterIndex:
+    def __init__(self):
+        self.size = 0 # One past the highest ID added
+        self._postings = {field: {} for field in VALUE_FIELDS} # field -> value -> list of ID arrays
+        self._times = np.zeros(0, dtype=np.float64) # created_at as a UNIX time by ID, NaN for no chunk
+        self._live = np.zeros(0, dtype=bool)
+
+    # Index chunks under their vector IDs; consecutive chunks of the same document are indexed together
+    def add(self, ids: np.ndarray, chunks: Sequence[Dict]):
+        ids = np.asarray(ids, dtype=np.int64)
+        offset = 0
+        for document, group in groupby(chunks, key=_document_values):
+            count = len(list(group))
+            self.add_document(ids[offset:offset + count], dict(zip(VALUE_FIELDS + RANGE_FIELDS, document)))
+            offset += count
+
+    # Index the IDs of a document's chunks under its field values
+    def add_document(self, ids: np.ndarray, document: Dict):
+        if not len(ids):
+            return
+        self._grow(int(ids.max()) + 1)
+        for field in VALUE_FIELDS:
+            self._postings[field].setdefault(document[field], []).append(ids)
+        self._times[ids] = _timestamp(document["created_at"])
+        self._live[ids] = True
+
+    # Drop deleted IDs from every match
+    def remove(self, ids: np.ndarray):
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[ids < self.size]
+        self._live[ids] = False
+        self._times[ids] = np.nan
+
+    # Boolean mask over IDs [0, size) of the live chunks matching every condition of `filters`
+    def match(self, filters: Dict) -> np.ndarray:
+        if not isinstance(filters, dict):
+            raise ValueError(f"Filters are a dict of field conditions, not {filters!r}")
+        mask = self._live[:self.size].copy()
+        for field, condition in filters.items():
+            if field in VALUE_FIELDS:
+                values = condition if isinstance(condition, (list, tuple, set, frozenset)) else [condition]
+                matching = np.zeros(self.size, dtype=bool)
+                for value in values:
+                    matching[self._ids(field, str(value))] = True
+                mask &= matching
+            elif field in RANGE_FIELDS:
+                if not isinstance(condition, dict) or not condition or set(condition) - set(RANGE_OPERATORS):
+                    raise ValueError(f"A {field} filter is a dict of {sorted(RANGE_OPERATORS)} bounds, not {condition!r}")
+                for operator, bound in condition.items():
+                    with np.errstate(invalid="ignore"): # NaN (no chunk) compares False
+                        mask &= RANGE_OPERATORS[operator](self._times[:self.size], _timestamp(bound))
+            else:
+                raise ValueError(f"Unknown filter field {field!r}, expected one of {VALUE_FIELDS + RANGE_FIELDS}")
+        return mask
+
+    # Index every live chunk of a metadata store
+    @classmethod
+    def from_store(cls, store) -> "FilterIndex":
+        index = cls()
+        for ids, document in store.documents():
+            index.add_document(ids, dict(zip(VALUE_FIELDS + RANGE_FIELDS, _document_values(document))))
+        index._grow(store.next_id)
+        return index
+
+    # IDs with a value, merging the arrays appended for it into one on first use
+    def _ids(self, field: str, value: str) -> np.ndarray:
+        arrays = self._postings[field].get(value)
+        if not arrays:
+            return np.zeros(0, dtype=np.int64)
+        if len(arrays) > 1:
+            arrays[:] = [np.concatenate(arrays)]
+        return arrays[0]
+
+    # Make room for IDs below `size`, doubling the capacity so appends stay amortized O(1)
+    def _grow(self, size: int):
+        if size > len(self._live):
+            capacity = max(size, 2 * len(self._live))
+            times = np.full(capacity, np.nan)
+            times[:self.size] = self._times[:self.size]
+            live = np.zeros(capacity, dtype=bool)
+            live[:self.size] = self._live[:self.size]
+            self._times, self._live = times, live
+        self.size = max(self.size, size)
+
+
+#tombstoned vector IDs as a bitmap FAISS reads in place through an IDSelectorBitmap. Deleting a document sets its
+#bits, so the selector excluding every tombstone is kept up to date in time proportional to the document, instead
+#of being rebuilt over all tombstones after each delete
+class TombstoneBitmap:
+    def __init__(self, ids: Sequence[int] = ()):
+        self.count = 0
+        self._bits = np.zeros(0, dtype=np.uint8) # Bit i of byte i // 8 for ID i, like to_bitmap
+        self._selector = None # (IDSelectorBitmap over _bits, IDSelectorNot of it), until _bits is reallocated
+        self.add(ids)
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Tombstone IDs (not tombstoned yet); the bitmap doubles when it has to grow, so adds stay amortized O(len(ids))
+    def add(self, ids: Sequence[int]):
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        size = int(ids.max()) // 8 + 1
+        if size > len(self._bits):
+            bits = np.zeros(max(size, 2 * len(self._bits)), dtype=np.uint8)
+            bits[:len(self._bits)] = self._bits
+            self._bits, self._selector = bits, None
+        np.bitwise_or.at(self._bits, ids >> 3, np.left_shift(1, ids & 7).astype(np.uint8))
+        self.count += len(ids)
+
+    # Boolean array shaped like `ids`: True where an ID is tombstoned (-1 and IDs past the bitmap aren't)
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.zeros(ids.shape, dtype=bool)
+        inside = (ids >= 0) & (ids >> 3 < len(self._bits))
+        found[inside] = (self._bits[ids[inside] >> 3] >> (ids[inside] & 7)) & 1 == 1
+        return found
+
+    # Selector of the IDs that aren't tombstoned, None while nothing is. It points into the bitmap, so later adds
+    # show through until the bitmap grows
+    def live_selector(self) -> Optional[faiss.IDSelector]:
+        if not self.count:
+            return None
+        if self._selector is None:
+            deleted = faiss.IDSelectorBitmap(self._bits) # Keeps the bitmap referenced
+            self._selector = (deleted, faiss.IDSelectorNot(deleted))
+        return self._selector[1]
+
+
+#function to pack a mask over IDs into the bitmap FAISS's IDSelectorBitmap reads (bit i of byte i // 8 for ID i)
+def to_bitmap(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask, bitorder="little")
+
+#function to give the filter field values of a chunk or document dict, in VALUE_FIELDS + RANGE_FIELDS order
+def _document_values(chunk: Dict) -> Tuple:
+    metadata = chunk.get("metadata") or {}
+    return (
+        str(chunk["document_id"]),
+        str(chunk["file_name"]),
+        str(chunk["source"]),
+        str(metadata.get("author", "unknown")), # The ingestion dispatcher's default
+        chunk["created_at"]
+    )
+
+#function to convert a datetime or ISO 8601 string to a UNIX time; naive times are taken as UTC
+def _timestamp(value) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
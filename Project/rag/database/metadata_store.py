@@ -0,0 +1,296 @@
+#Chunk metadata of the vector database in SQLite: one row per chunk by vector ID, with the fields shared by every
+#chunk of a document stored once. Rows are read only when a search returns them. IDs are never reused: deleted
+#chunks leave their IDs as tombstones until the index has dropped their vectors
+
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+DOCUMENT_FIELDS = ("document_id", "file_name", "source", "metadata", "created_at") # Stored once per document
+CHUNK_FIELDS = ("chunk_id", "text", "citation") # Stored per chunk
+NUMPY_MAGIC = b"\x93NUMPY" # Start of the .npy files the metadata used to be pickled to
+
+_BATCH = 500 # IDs per SELECT, under SQLite's bound parameter limit
+MMAP_BYTES = 1 << 40 # SQLite memory mapping of read-only stores, capped at its compile-time limit (2 GB by default)
+
+
+#chunk dicts by vector ID (the `position` column, named when IDs were index positions); path=None keeps them in
+#an in-memory database. Keys a chunk has beyond the Chunk schema are kept too, so a hydrated chunk equals the dict
+#that was added. A read-only store reads its file through a memory map, whose pages are shared with other processes
+#reading the same file
+class MetadataStore:
+    def __init__(self, path=None, read_only: bool = False):
+        self.path = Path(path) if path is not None else None
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._db = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            self._db.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+            self._read_counts()
+            return
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path is not None else ":memory:", check_same_thread=False)
+        self._create_tables()
+        self._read_counts()
+
+    # Create the tables missing from a new store or one saved by an older version
+    def _create_tables(self):
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                document_key INTEGER PRIMARY KEY,
+                document_id TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                UNIQUE (document_id, file_name, source, metadata, created_at)
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                position INTEGER PRIMARY KEY,
+                document_key INTEGER NOT NULL REFERENCES documents (document_key),
+                chunk_id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                citation TEXT NOT NULL,
+                extra TEXT
+            )"""
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS tombstones (position INTEGER PRIMARY KEY)") # Deleted IDs still in the index
+        self._db.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS documents_by_id ON documents (document_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_by_document ON chunks (document_key)")
+        self._db.commit()
+
+    # Live chunk count, the next free ID and the tombstone count; stores saved before deletes existed have no
+    # tombstones or settings, and ones saved before the tombstone count was kept count their table once
+    def _read_counts(self):
+        tables = {name for (name,) in self._db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self._count = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        settings = dict(self._db.execute("SELECT name, value FROM settings").fetchall()) if "settings" in tables else {}
+        if "next_id" not in settings:
+            settings["next_id"] = self._db.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM chunks").fetchone()[0]
+        self._has_tombstones = "tombstones" in tables
+        if "tombstones" not in settings:
+            settings["tombstones"] = self._db.execute("SELECT COUNT(*) FROM tombstones").fetchone()[0] if self._has_tombstones else 0
+        self.next_id = settings["next_id"]
+        self.tombstone_count = settings["tombstones"] # Deleted IDs whose vectors may still be in the index
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, vector_id: int) -> Dict:
+        return self.get_many([vector_id])[0]
+
+    # Every live chunk in ID order, read in pages rather than all at once
+    def __iter__(self) -> Iterator[Dict]:
+        ids = self.ids()
+        for start in range(0, len(ids), _BATCH):
+            yield from self.get_many(ids[start:start + _BATCH])
+
+    # IDs of the live chunks, ascending
+    def ids(self) -> np.ndarray:
+        with self._lock:
+            rows = self._db.execute("SELECT position FROM chunks ORDER BY position").fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    # IDs of deleted chunks whose vectors may still be in the index, ascending
+    def tombstones(self) -> np.ndarray:
+        if not self._has_tombstones:
+            return np.zeros(0, dtype=np.int64)
+        with self._lock:
+            rows = self._db.execute("SELECT position FROM tombstones ORDER BY position").fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    # Every document with live chunks, as (IDs of its chunks, its document fields), read in one pass
+    def documents(self) -> Iterator[Tuple[np.ndarray, Dict]]:
+        with self._lock:
+            rows = self._db.execute(
+                """SELECT d.document_key, d.document_id, d.file_name, d.source, d.metadata, d.created_at, c.position
+                   FROM documents d JOIN chunks c ON c.document_key = d.document_key
+                   ORDER BY d.document_key, c.position"""
+            ).fetchall()
+        for _, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            document_id, file_name, source, metadata, created_at = group[0][1:6]
+            document = {
+                "document_id": document_id,
+                "file_name": file_name,
+                "source": source,
+                "metadata": json.loads(metadata),
+                "created_at": created_at
+            }
+            yield np.array([row[6] for row in group], dtype=np.int64), document
+
+    # Append chunks under the next IDs, which their vectors are added to the index with; returns the IDs
+    def extend(self, chunks: Sequence[Dict]) -> np.ndarray:
+        self._check_writable()
+        with self._lock:
+            documents = {} # document fields -> document_key, looked up once per document of the batch
+            rows = []
+            for offset, chunk in enumerate(chunks):
+                fields = _document_fields(chunk)
+                if fields not in documents:
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO documents (document_id, file_name, source, metadata, created_at) VALUES (?, ?, ?, ?, ?)",
+                        fields
+                    )
+                    documents[fields] = self._db.execute(
+                        "SELECT document_key FROM documents WHERE document_id = ? AND file_name = ? AND source = ? AND metadata = ? AND created_at = ?",
+                        fields
+                    ).fetchone()[0]
+
+                extra = {key: value for key, value in chunk.items() if key not in DOCUMENT_FIELDS + CHUNK_FIELDS}
+                rows.append((
+                    self.next_id + offset,
+                    documents[fields],
+                    *(str(chunk[field]) for field in CHUNK_FIELDS),
+                    json.dumps(extra) if extra else None
+                ))
+
+            self._db.executemany(
+                "INSERT INTO chunks (position, document_key, chunk_id, text, citation, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            ids = np.arange(self.next_id, self.next_id + len(rows), dtype=np.int64)
+            self._set_next_id(self.next_id + len(rows))
+            self._db.commit()
+            self._count += len(rows)
+        return ids
+
+    # Delete every chunk of a document (all its versions), tombstoning their IDs; returns the IDs. Uses the
+    # document_id and document_key indexes, so it costs time in the document's size, not the store's
+    def delete_document(self, document_id: str) -> np.ndarray:
+        self._check_writable()
+        with self._lock:
+            keys = [key for (key,) in self._db.execute("SELECT document_key FROM documents WHERE document_id = ?", (str(document_id),))]
+            ids = []
+            for key in keys:
+                ids.extend(position for (position,) in self._db.execute("SELECT position FROM chunks WHERE document_key = ?", (key,)))
+                self._db.execute("DELETE FROM chunks WHERE document_key = ?", (key,))
+                self._db.execute("DELETE FROM documents WHERE document_key = ?", (key,))
+            self._db.executemany("INSERT OR IGNORE INTO tombstones (position) VALUES (?)", [(i,) for i in ids])
+            self._set_tombstone_count(self.tombstone_count + len(ids)) # Live IDs, so none was tombstoned already
+            self._db.commit()
+            self._count -= len(ids)
+        return np.array(sorted(ids), dtype=np.int64)
+
+    # Forget tombstones once the index no longer holds their vectors
+    def clear_tombstones(self, ids: Sequence[int]):
+        self._check_writable()
+        with self._lock:
+            cleared = self._db.executemany("DELETE FROM tombstones WHERE position = ?", [(int(i),) for i in ids]).rowcount
+            self._set_tombstone_count(self.tombstone_count - cleared)
+            self._db.commit()
+
+    # Chunks with the given IDs, in that order (one query per 500 IDs)
+    def get_many(self, positions: Sequence[int]) -> List[Dict]:
+        positions = [int(position) for position in positions]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(positions))
+            for start in range(0, len(unique), _BATCH):
+                batch = unique[start:start + _BATCH]
+                cursor = self._db.execute(
+                    f"""SELECT c.position, d.document_id, c.chunk_id, c.text, d.file_name, d.source, d.metadata,
+                               d.created_at, c.citation, c.extra
+                        FROM chunks c JOIN documents d ON d.document_key = c.document_key
+                        WHERE c.position IN ({",".join("?" * len(batch))})""",
+                    batch
+                )
+                for position, *row in cursor:
+                    found[position] = row
+
+        missing = [position for position in positions if position not in found]
+        if missing:
+            raise IndexError(f"No chunks with IDs {missing[:10]}")
+        return [_hydrate(found[position]) for position in positions]
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError(f"The metadata store {self.path} is open read-only")
+
+    def _set_next_id(self, next_id: int):
+        self._db.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('next_id', ?)", (next_id,))
+        self.next_id = next_id
+
+    def _set_tombstone_count(self, count: int):
+        self._db.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('tombstones', ?)", (count,))
+        self.tombstone_count = count
+
+    # Write a consistent copy of the store to `path` (replacing any file there)
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path is not None and path.resolve() == self.path.resolve():
+            return # Already written there on every extend
+        path.unlink(missing_ok=True)
+        target = sqlite3.connect(str(path))
+        with self._lock:
+            self._db.backup(target)
+        target.close()
+
+    # Copy a saved store into a new in-memory store, which can be added to without changing the file
+    @classmethod
+    def copy_of(cls, path) -> "MetadataStore":
+        store = cls()
+        source = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        source.backup(store._db)
+        source.close()
+        store._create_tables()
+        store._read_counts()
+        return store
+
+    # Open a saved store in place (nothing is read until a chunk is), or import the pickled list that save()
+    # used to write with np.save into an in-memory store
+    @classmethod
+    def open(cls, path) -> "MetadataStore":
+        with open(path, "rb") as f:
+            legacy = f.read(len(NUMPY_MAGIC)) == NUMPY_MAGIC
+        if not legacy:
+            return cls(path)
+
+        store = cls()
+        store.extend(np.load(path, allow_pickle=True).tolist())
+        return store
+
+
+#function to give the fields of a chunk shared by its whole document, as stored
+def _document_fields(chunk: Dict) -> tuple:
+    created_at = chunk["created_at"]
+    return (
+        str(chunk["document_id"]),
+        str(chunk["file_name"]),
+        str(chunk["source"]),
+        json.dumps(chunk.get("metadata", {}), sort_keys=True), # Sorted so equal dicts share a document row
+        created_at if isinstance(created_at, str) else created_at.isoformat()
+    )
+
+#function to rebuild a chunk dict from its row, with the keys in prepare_chunks' order
+def _hydrate(row) -> Dict:
+    document_id, chunk_id, text, file_name, source, metadata, created_at, citation, extra = row
+    chunk = {
+        "document_id": document_id,
+        "chunk_id": chunk_id,
+        "text": text,
+        "file_name": file_name,
+        "source": source,
+        "metadata": json.loads(metadata),
+        "created_at": created_at,
+        "citation": citation
+    }
+    if extra:
+        chunk.update(json.loads(extra))
+    return chunk
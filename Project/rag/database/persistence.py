@@ -0,0 +1,102 @@
+#On-disk format of a saved vector database: one directory with the index, the metadata store and (when kept) the
+#full vectors of a generation, and a manifest naming them. The manifest is replaced atomically after the files
+#are written, so readers always see an index and metadata saved together
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+import json
+import os
+
+import faiss
+
+from Project.rag.ingestion.manifest import file_fingerprint
+
+FORMAT_VERSION = 2 # 2: vector IDs with tombstones, so indexed vectors can outnumber live chunks
+MANIFEST_FILE = "manifest.json"
+FILE_PATTERNS = {"index": "index-{:06d}.faiss", "metadata": "metadata-{:06d}.sqlite", "vectors": "vectors-{:06d}.f32"}
+
+
+#function to give the next generation number of a directory (1 for a new one)
+def next_generation(directory) -> int:
+    path = Path(directory) / MANIFEST_FILE
+    return json.loads(path.read_text())["generation"] + 1 if path.exists() else 1
+
+#function to give the file names of a generation, for the given parts ("index", "metadata", "vectors")
+def generation_files(generation: int, parts) -> Dict[str, str]:
+    return {part: FILE_PATTERNS[part].format(generation) for part in parts}
+
+#function to describe a written file for the manifest: name, size and content checksum
+def file_entry(path) -> Dict:
+    path = Path(path)
+    return {"name": path.name, "bytes": path.stat().st_size, "checksum": file_fingerprint(path)}
+
+#function to build a manifest; `files` maps parts to file_entry() dicts
+def build_manifest(
+    generation: int, model_name: Optional[str], backend: Optional[str], dimension: int, count: int, vectors: int, tombstones: int, index: Dict, files: Dict
+) -> Dict:
+    return {
+        "format_version": FORMAT_VERSION,
+        "generation": generation,
+        "saved_at": datetime.now(timezone.utc).isoformat(),
+        "model_name": model_name,
+        "backend": backend, # Embedding backend that produced the vectors ("torch", "onnx", "onnx-int8")
+        "dimension": dimension,
+        "count": count, # Live chunks in the metadata store
+        "vectors": vectors, # Vectors in the index: the live chunks' and the tombstoned ones' not yet compacted away
+        "tombstones": tombstones,
+        "index": index, # {"kind": ..., "storage": ..., "config": IndexConfig.to_dict()}
+        "files": files
+    }
+
+#function telling whether queries embedded by backend `query` can search vectors embedded by backend `saved`.
+#The float backends give the same vectors, a quantized one (e.g. "onnx-int8") only agrees with itself; an unknown
+#backend (None, e.g. a directory saved before backends were recorded) is assumed compatible
+def backends_compatible(saved: Optional[str], query: Optional[str]) -> bool:
+    if saved is None or query is None or saved == query:
+        return True
+    return not (saved.endswith("-int8") or query.endswith("-int8"))
+
+#function to write the manifest; written to a temp file first so a crash never leaves a half written manifest
+def write_manifest(directory, manifest: Dict):
+    path = Path(directory) / MANIFEST_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, path)
+
+#function to delete the files of older generations (processes that still map them keep their pages)
+def remove_stale_files(directory, manifest: Dict):
+    current = {entry["name"] for entry in manifest["files"].values()}
+    for pattern in FILE_PATTERNS.values():
+        for path in Path(directory).glob(pattern.replace("{:06d}", "*")):
+            if path.name not in current:
+                path.unlink(missing_ok=True)
+
+#function to read a manifest, raising ValueError for a format newer than this code or missing / altered files.
+#Sizes are always checked; checksums (a full read of every file) only with verify_checksums
+def read_manifest(directory, verify_checksums: bool = False) -> Dict:
+    directory = Path(directory)
+    path = directory / MANIFEST_FILE
+    if not path.exists():
+        raise ValueError(f"No {MANIFEST_FILE} in {directory}")
+    manifest = json.loads(path.read_text())
+    if manifest["format_version"] > FORMAT_VERSION:
+        raise ValueError(f"{directory} was saved in format {manifest['format_version']}, newer than {FORMAT_VERSION}")
+
+    for part, entry in manifest["files"].items():
+        file_path = directory / entry["name"]
+        if not file_path.exists() or file_path.stat().st_size != entry["bytes"]:
+            raise ValueError(f"The {part} file {file_path} is missing or doesn't match the manifest")
+        if verify_checksums and file_fingerprint(file_path) != entry["checksum"]:
+            raise ValueError(f"The {part} file {file_path} doesn't match its checksum")
+    return manifest
+
+#function to read an index, memory mapping it read-only when `mmap`: flat codes (flat, scalar quantizer, PQ
+#and HNSW storage) are mapped in place and IVF inverted lists are mapped as on-disk lists. Pages are read on demand
+#and shared with other processes mapping the same file. A mapped index can't be added to
+def read_index(path, kind: str, mmap: bool = True) -> faiss.Index:
+    if not mmap:
+        return faiss.read_index(str(path))
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if kind == "ivf" else faiss.IO_FLAG_MMAP_IFC
+    return faiss.read_index(str(path), flags)
@@ -0,0 +1,57 @@
+#Sharing one saved vector database between worker processes (e.g. uvicorn --workers N): every worker memory maps
+#the same read-only files of a save_directory() directory, so the index and metadata pages sit once in the OS
+#page cache and each extra worker only costs its own heap
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import os
+
+from .ann_index import IndexConfig
+from .persistence import read_manifest
+from .vector_db import VectorDatabase
+
+
+#memory of a process, from /proc/<pid>/smaps_rollup (Linux)
+@dataclass
+class ProcessMemory:
+    rss_mb: float # Resident pages, including pages shared with other processes
+    pss_mb: float # Resident pages, with each shared page split between the processes mapping it
+    private_mb: float # Resident pages mapped by this process only: what one more worker costs
+
+#function to read the memory of a process (this one by default)
+def process_memory(pid="self") -> ProcessMemory:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return ProcessMemory(
+        rss_mb=fields["Rss"],
+        pss_mb=fields["Pss"],
+        private_mb=fields["Private_Clean"] + fields["Private_Dirty"]
+    )
+
+#function to ask the kernel to read a directory's files into the page cache in the background, so the first
+#searches of freshly started workers don't each wait on the disk (a no-op where posix_fadvise is missing)
+def prefetch_directory(directory):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for entry in read_manifest(directory)["files"].values():
+        fd = os.open(Path(directory) / entry["name"], os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+#function to attach a worker to a saved directory: the database is memory mapped read-only (see load_directory),
+#so it can be searched but not added to. Without an index_config the one saved in the manifest is used
+def load_shared(
+    embedding_service, directory, index_config: Optional[IndexConfig] = None, allow_backend_mismatch: bool = False
+) -> VectorDatabase:
+    prefetch_directory(directory)
+    vector_db = VectorDatabase(embedding_service, index_config)
+    vector_db.load_directory(directory, mmap=True, allow_backend_mismatch=allow_backend_mismatch)
+    return vector_db
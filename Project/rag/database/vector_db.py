@@ -1,15 +1,36 @@
 import faiss
+import math
 import numpy as np
 
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from Project import Chunk #path defined 
+from .metadata_store import MetadataStore
+from .ann_index import (
+    IndexConfig, accepts_selector, add_with_ids, blas_for_batch, build_index, index_contents, index_kind, index_storage,
+    ivf_outgrown, remove_ids, search_parameters, set_search_params, with_ids
+)
+from .filter_index import FilterIndex, TombstoneBitmap, to_bitmap
+from .vector_store import FullVectorStore, drop_ids, exact_rerank, exact_search
+from . import persistence
 
 class VectorDatabase:
-    def __init__(self, embedding_service):
+    def __init__(self, embedding_service, index_config: Optional[IndexConfig] = None, vectors_path = None, metadata_path = None):
         self.embedding_service = embedding_service
         self.dim = embedding_service.get_embedding_dimension()
-        self.index = faiss.IndexFlatIP(self.dim) # Create a FAISS index
-        self.metadata = []  # list of dicts corresponding to each vector
+        self.index_config = index_config or IndexConfig() # Exact flat search unless configured otherwise
+        self._saved_config = index_config is None # Take the config a loaded directory was saved with
+        self.index = with_ids(faiss.IndexFlatIP(self.dim)) # Create a FAISS index, flat until the corpus reaches flat_below
+        self.metadata = MetadataStore(metadata_path)  # chunk dicts by vector ID, in SQLite (in memory without a path)
+
+        # Full float32 vectors for exact re-ranking by vector ID, in a memory mapped file at vectors_path (in memory without one)
+        self.full_vectors = FullVectorStore(self.dim, vectors_path) if self.index_config.rerank else None
+        if self.full_vectors is not None and len(self.full_vectors) != self.metadata.next_id:
+            # Re-ranking reads a vector's row by its ID, so rows left by another database would be scored instead
+            raise ValueError(f"{vectors_path} holds {len(self.full_vectors)} rows but {self.metadata.next_id} vector IDs were handed out")
+        self.read_only = False # Set by load_directory(mmap=True): the index and metadata are mapped from disk
+        self._deleted: Optional[TombstoneBitmap] = None # Tombstones read on the first search, kept up to date after
+        self._filters: Optional[FilterIndex] = None # Inverted indexes of the filter fields, built on the first filtered search
     
     #ensure chunks are properly formatted and consists of the required keys
     def _validate_chunk(self, formatted):
@@ -46,47 +67,293 @@ class VectorDatabase:
 
     # Add chunks to the FAISS index
     def add_chunks(self, chunks : List[Dict]):
+        self._check_writable()
         for chunk in chunks:
             self._validate_chunk(chunk) #raises an exception if format is incorrect
 
         texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.embedding_service.embed_batch(texts)
-        vectors = np.array(embeddings, dtype="float32")
-        self.index.add(vectors)
-        self.metadata.extend(chunks)
+        vectors = self.embedding_service.embed_array(texts) # Contiguous float32, straight from the encoder
+        self.add_vectors(chunks, vectors)
 
-    # Search the FAISS index for similar vectors
-    def search(self, query: str, top_k: int = 5, min_similarity = 0.75):
-        query_embedding = self.embedding_service.embed_text(query)
-        query_vector = np.array([query_embedding], dtype="float32") # FAISS expects 2D array
-        scores, indices = self.index.search(query_vector, top_k) #scores shape (1, top_k), indices shape (1, top_k) 
+    # Add chunks with their already embedded (len(chunks), dim) float32 vectors; returns the vector IDs they got
+    def add_vectors(self, chunks: List[Dict], vectors: np.ndarray) -> np.ndarray:
+        self._check_writable()
+        ids = self.metadata.extend(chunks)
+        add_with_ids(self.index, vectors, ids)
+        if self.full_vectors is not None:
+            self.full_vectors.append(vectors) # IDs are handed out in order, so a vector's row is its ID
+        if self._filters is not None:
+            self._filters.add(ids, chunks)
 
-        results = []  
-        filtered_scores = []
+        # Large enough for the configured index, or an IVF index grown past the lists it was trained with
+        configured = (index_kind(self.index), index_storage(self.index)) == (self.index_config.kind, self.index_config.storage)
+        if not configured and self.index.ntotal >= self.index_config.flat_below:
+            self.rebuild_index()
+        elif configured and ivf_outgrown(self.index, self.index_config):
+            self.rebuild_index()
+        return ids
 
-        #filter results below the min similarity
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1 or score < min_similarity:
-                continue   # Not relevant
+    # Delete every chunk of a document; returns how many were deleted. Their IDs are tombstoned and excluded from
+    # every search until compaction drops their vectors: on an explicit compact(), or here once compact_ratio of the
+    # index is dead when that is set. Costs time in the document's size, not the corpus'
+    def delete_document(self, document_id: str) -> int:
+        self._check_writable()
+        deleted = self.metadata.delete_document(document_id)
+        if self._deleted is not None:
+            self._deleted.add(deleted)
+        if self._filters is not None:
+            self._filters.remove(deleted)
+        ratio = self.index_config.compact_ratio
+        if ratio is not None and self.index.ntotal and self.metadata.tombstone_count >= ratio * self.index.ntotal:
+            self.compact()
+        return len(deleted)
+
+    # Replace a document's chunks with `chunks` (every one with that document_id; none only deletes). The new
+    # chunks are embedded before the old ones are deleted, so a failing model leaves the document as it was
+    def upsert_document(self, document_id: str, chunks: List[Dict]) -> np.ndarray:
+        self._check_writable()
+        for chunk in chunks:
+            self._validate_chunk(chunk)
+            if str(chunk["document_id"]) != str(document_id):
+                raise ValueError(f"Chunk of document {chunk['document_id']!r} upserted as {document_id!r}")
+
+        vectors = self.embedding_service.embed_array([chunk["text"] for chunk in chunks]) if chunks else None
+        self.delete_document(document_id)
+        return self.add_vectors(chunks, vectors) if chunks else np.zeros(0, dtype=np.int64)
+
+    # Drop the vectors of deleted chunks from the index: removed in place from flat and IVF indexes, by a rebuild of
+    # HNSW graphs (which can't drop nodes). Returns the number of vectors dropped
+    def compact(self) -> int:
+        self._check_writable()
+        tombstones = self.metadata.tombstones()
+        if not len(tombstones):
+            return 0
+        if not remove_ids(self.index, tombstones):
+            self.rebuild_index()
+        self.metadata.clear_tombstones(tombstones)
+        self._deleted = None
+        return len(tombstones)
+
+    # Rebuild the index as index_config.kind / storage from its live vectors (trains IVF and codes on them),
+    # dropping deleted ones; IDs are kept. The full vectors are used when kept, since compressed codes only decode to
+    # approximations. With every chunk deleted there is nothing to train on, so the index starts over flat
+    def rebuild_index(self):
+        self._check_writable()
+        ids = self.metadata.ids()
+        if self.full_vectors is not None and len(self.full_vectors) == self.metadata.next_id:
+            vectors = self.full_vectors.get(ids)
+        else:
+            indexed_ids, vectors = index_contents(self.index)
+            live = np.isin(indexed_ids, ids)
+            ids, vectors = indexed_ids[live], vectors[live]
+        index = with_ids(build_index(self.dim, self.index_config, vectors) if len(ids) else faiss.IndexFlatIP(self.dim))
+        add_with_ids(index, vectors, ids)
+        self.index = index
+
+    # Change search parameters (HNSW efSearch, IVF nprobe) of the current and future indexes
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None):
+        if ef_search is not None:
+            self.index_config.ef_search = ef_search
+        if nprobe is not None:
+            self.index_config.nprobe = nprobe
+        set_search_params(self.index, self.index_config)
 
-            results.append(self.metadata[idx]) 
-            filtered_scores.append(score)
+    # Search the FAISS index for similar vectors; `filters` restricts the search to chunks matching every condition,
+    # e.g. {"source": "pdf", "author": ["alice", "bob"], "created_at": {"gte": "2026-01-01T00:00:00+00:00"}} (see
+    # filter_index.py), and top_k is taken among those
+    def search(self, query: str, top_k: int = 5, min_similarity = 0.75, filters: Optional[Dict] = None):
+        query_vector = self.embedding_service.embed_query(query).reshape(1, -1) # FAISS expects 2D array
+        scores, indices = self._search_vectors(query_vector, top_k, filters) #scores shape (1, top_k), indices shape (1, top_k) 
 
-        if not results:
+        #filter results below the min similarity
+        relevant = (indices[0] != -1) & (scores[0] >= min_similarity)
+        if not relevant.any():
             return [], None
-        
-        return results, filtered_scores
 
-    # Save and load the FAISS index and metadata 
+        results = self.metadata.get_many(indices[0][relevant]) #only the returned chunks are read
+        return results, list(scores[0][relevant])
+
+    # Search several queries at once: one encoder call for all of them and one index search over the query matrix.
+    # Returns, per query, its (metadata, score) pairs at or above min_similarity, best first; `filters` applies to
+    # every query
+    def search_batch(self, queries: List[str], top_k: int = 5, min_similarity = 0.75, filters: Optional[Dict] = None) -> List[List[Tuple[Dict, float]]]:
+        if not queries:
+            return []
+
+        query_vectors = self.embedding_service.embed_queries(queries)
+        with blas_for_batch(query_vectors.size): # One matrix product for a flat scan of the whole batch
+            scores, indices = self._search_vectors(query_vectors, top_k, filters) #shapes (queries, top_k)
+        relevant = (indices != -1) & (scores >= min_similarity) #filter every query at once
+
+        chunks = iter(self.metadata.get_many(indices[relevant])) #one read for the returned chunks of every query
+        return [
+            [(next(chunks), score) for score in row_scores[keep].tolist()]
+            for row_scores, keep in zip(scores, relevant)
+        ]
+
+    # Search the index with a (queries, dim) matrix; with re-ranking, top_k * oversample candidates are fetched
+    # from the (compressed) index and the top_k by exact score are kept. Deleted IDs, and with `filters` the
+    # chunks not matching them, are skipped inside the scan, so they never take the place of a result
+    def _search_vectors(self, query_vectors: np.ndarray, top_k: int, filters: Optional[Dict] = None):
+        k = top_k if self.full_vectors is None else top_k * self.index_config.oversample
+        selector, selectivity = self._tombstones().live_selector(), 1.0
+        if filters is not None:
+            mask = self._filter_index().match(filters) # Deleted chunks never match
+            ids = np.flatnonzero(mask)
+            if not len(ids):
+                return np.full((len(query_vectors), top_k), -np.inf, dtype=np.float32), np.full((len(query_vectors), top_k), -1)
+
+            # Few matches: an HNSW graph would walk past them, so their vectors are scored directly. So are those of
+            # a flat PQ index, which takes no selector (its codes decode by ID)
+            scored = self.full_vectors is not None or index_kind(self.index) == "hnsw" or not accepts_selector(self.index)
+            if len(ids) <= self.index_config.filter_exact_below and scored:
+                vectors = self.full_vectors.get(ids) if self.full_vectors is not None else self.index.reconstruct_batch(ids)
+                return exact_search(vectors, ids, query_vectors, top_k)
+            selector = faiss.IDSelectorBitmap(to_bitmap(mask)) # Keeps the bitmap referenced
+            selectivity = len(ids) / self.index.ntotal
+
+        if selector is None:
+            scores, ids = self.index.search(query_vectors, k)
+        elif not accepts_selector(self.index):
+            # A flat PQ index takes no selector, so it over-fetches and drops the excluded results after the search:
+            # by the tombstone count, which bounds the deleted results, or for a filter by twice 1 / selectivity (it
+            # matches over filter_exact_below chunks, so only a bounded share of the index is fetched, none decoded)
+            if filters is None:
+                scores, ids = self.index.search(query_vectors, k + len(self._deleted))
+                excluded = self._deleted.contains(ids)
+            else:
+                scores, ids = self.index.search(query_vectors, min(self.index.ntotal, math.ceil(2 * k / selectivity)))
+                excluded = ~mask[ids] # Deleted chunks never match; -1 is dropped anyway
+            scores, ids = drop_ids(scores, ids, excluded, k)
+        else:
+            params = search_parameters(self.index, self.index_config, selector, selectivity)
+            scores, ids = self.index.search(query_vectors, k, params=params)
+        if self.full_vectors is None:
+            return scores, ids
+        return exact_rerank(self.full_vectors, query_vectors, ids, top_k)
+
+    # Bitmap of the tombstoned IDs searches skip, read from the metadata store on first use and kept up to date after
+    def _tombstones(self) -> TombstoneBitmap:
+        if self._deleted is None:
+            self._deleted = TombstoneBitmap(self.metadata.tombstones() if self.metadata.tombstone_count else ())
+        return self._deleted
+
+    # Inverted indexes of the filter fields, read from the metadata store on first use and kept up to date after
+    def _filter_index(self) -> FilterIndex:
+        if self._filters is None:
+            self._filters = FilterIndex.from_store(self.metadata)
+        return self._filters
+
+    # Save and load the FAISS index and metadata (a SQLite copy of the metadata store)
     def save(self, index_path, metadata_path):
         faiss.write_index(self.index, index_path)
-        np.save(metadata_path, np.array(self.metadata, dtype=object))
+        self.metadata.save(metadata_path)
 
-    # Load the FAISS index and metadata
+    # Load the FAISS index and open the metadata in place: no chunk is read until a search returns it.
+    # Metadata pickled with np.save by older versions is imported into memory
     def load(self, index_path, metadata_path):
         self.index = faiss.read_index(index_path)
-        self.metadata = np.load(metadata_path, allow_pickle=True).tolist()
-        
-        
-        
+        set_search_params(self.index, self.index_config)
+        self.metadata = MetadataStore.open(metadata_path)
+        self.read_only = False
+        self._deleted = None
+        self._filters = None
+
+        # Re-ranking reads the full vectors by vector ID, so there must be a row for every ID handed out
+        if self.full_vectors is not None and len(self.full_vectors) != self.metadata.next_id:
+            raise ValueError(f"Full vectors hold {len(self.full_vectors)} rows but {self.metadata.next_id} vector IDs were handed out")
+
+    # Save everything into one directory: the index, the metadata store and the full vectors of a new generation,
+    # then a manifest (dimension, model, counts, checksums) naming them, replaced atomically; older generations are
+    # removed. Returns the manifest
+    def save_directory(self, directory) -> Dict:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        generation = persistence.next_generation(directory)
+        parts = ["index", "metadata"] + (["vectors"] if self.full_vectors is not None else [])
+        files = persistence.generation_files(generation, parts)
+
+        faiss.write_index(self.index, str(directory / files["index"]))
+        self.metadata.save(directory / files["metadata"])
+        if self.full_vectors is not None:
+            self.full_vectors.save(directory / files["vectors"])
+
+        manifest = persistence.build_manifest(
+            generation,
+            model_name=getattr(self.embedding_service, "model_name", None),
+            backend=getattr(self.embedding_service, "backend", None),
+            dimension=self.dim,
+            count=len(self.metadata),
+            vectors=self.index.ntotal,
+            tombstones=self.metadata.tombstone_count,
+            index={"kind": index_kind(self.index), "storage": index_storage(self.index), "config": self.index_config.to_dict()},
+            files={part: persistence.file_entry(directory / name) for part, name in files.items()}
+        )
+        persistence.write_manifest(directory, manifest)
+        persistence.remove_stale_files(directory, manifest)
+        return manifest
+
+    # Load a directory written by save_directory. With mmap (the default) the index, metadata and full vectors are
+    # memory mapped read-only, so loading is near-instant whatever the corpus size and pages are read as searches
+    # touch them; the database can then only be searched. mmap=False reads them into memory, ready for more chunks.
+    # A database created without an index_config takes the one the directory was saved with (re-ranking, oversample,
+    # efSearch, nprobe, ...), so a compressed index isn't silently searched without its full vectors.
+    # Raises ValueError when the directory was saved by another model or dimension, or its files don't match the
+    # manifest (checksums are only compared with verify_checksums, which reads every file). A quantized embedding
+    # backend (onnx-int8) is refused against vectors of another backend, or another backend against its vectors,
+    # unless allow_backend_mismatch: queries would only be ~0.98 cosine to the indexed vectors
+    def load_directory(self, directory, mmap: bool = True, verify_checksums: bool = False, allow_backend_mismatch: bool = False) -> Dict:
+        directory = Path(directory)
+        manifest = persistence.read_manifest(directory, verify_checksums)
+        model_name = getattr(self.embedding_service, "model_name", None)
+        backend = getattr(self.embedding_service, "backend", None)
+        config = self.index_config
+        if self._saved_config and "config" in manifest["index"]:
+            config = IndexConfig.from_dict(manifest["index"]["config"])
+        if manifest["dimension"] != self.dim:
+            raise ValueError(f"{directory} holds {manifest['dimension']}-dim vectors, the embedding model gives {self.dim}")
+        if manifest["model_name"] and model_name and manifest["model_name"] != model_name:
+            raise ValueError(f"{directory} was embedded with {manifest['model_name']}, not {model_name}")
+        if not allow_backend_mismatch and not persistence.backends_compatible(manifest.get("backend"), backend):
+            raise ValueError(
+                f"{directory} was embedded with the {manifest['backend']} backend, not {backend}; "
+                "pass allow_backend_mismatch=True to search it anyway"
+            )
+        if config.rerank and "vectors" not in manifest["files"]:
+            raise ValueError(f"{directory} has no full vectors to re-rank with")
+
+        files = {part: directory / entry["name"] for part, entry in manifest["files"].items()}
+        index = persistence.read_index(files["index"], manifest["index"]["kind"], mmap)
+        if mmap:
+            metadata = MetadataStore(files["metadata"], read_only=True)
+            full_vectors = FullVectorStore(self.dim, files["vectors"], read_only=True) if config.rerank else None
+        else:
+            metadata = MetadataStore.copy_of(files["metadata"])
+            full_vectors = None
+            if config.rerank:
+                full_vectors = FullVectorStore(self.dim)
+                full_vectors.append(np.fromfile(files["vectors"], dtype=np.float32))
+
+        # Format 1 directories had no deletes: one vector per chunk and one full vector row per vector
+        found = [index.ntotal, len(metadata), metadata.tombstone_count]
+        expected = [manifest.get("vectors", manifest["count"]), manifest["count"], manifest.get("tombstones", 0)]
+        if full_vectors is not None:
+            found.append(len(full_vectors))
+            expected.append(metadata.next_id)
+        if found != expected:
+            raise ValueError(f"{directory} holds {found} vectors / chunks / tombstones / rows, expected {expected}")
+
+        self.index_config = config
+        self.index = index
+        set_search_params(self.index, self.index_config)
+        self.metadata = metadata
+        self.full_vectors = full_vectors
+        self.read_only = mmap
+        self._deleted = None
+        self._filters = None
+        return manifest
 
+    # Mapped indexes abort the process when added to, so writes are refused up front
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError("This vector database was loaded memory mapped (read-only); load it with mmap=False to add chunks")
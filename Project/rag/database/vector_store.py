@@ -0,0 +1,119 @@
+#Full precision copy of the indexed vectors, kept next to a compressed index for exact re-ranking
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import shutil
+
+
+#float32 vectors by position, appended to a raw file and read through a read-only memory map, so only the rows
+#being re-ranked are paged in; path=None keeps them in memory instead. read_only opens an existing file (e.g. a
+#saved directory on a read-only mount) without creating or touching it, and refuses appends
+class FullVectorStore:
+    def __init__(self, dim: int, path=None, read_only: bool = False):
+        self.dim = dim
+        self.path = Path(path) if path is not None else None
+        self.read_only = read_only
+        self._rows = np.zeros((0, dim), dtype=np.float32) # In memory rows, when there is no path
+        self._map: Optional[np.memmap] = None
+        self._count = 0
+
+        if self.path is not None:
+            if not read_only:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.touch()
+            self._count = self._rows_in_file()
+        elif read_only:
+            raise ValueError("A read-only full vector store needs the path of an existing file")
+
+    # Rows in the file at path; a size that isn't a whole number of rows means it was written for another dimension
+    def _rows_in_file(self) -> int:
+        size = self.path.stat().st_size
+        if size % (4 * self.dim):
+            raise ValueError(f"{self.path} holds {size} bytes, not a whole number of {self.dim}-dim float32 rows")
+        return size // (4 * self.dim)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, vectors: np.ndarray):
+        if self.read_only:
+            raise ValueError(f"{self.path} was opened read-only")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if self.path is None:
+            self._rows = np.concatenate([self._rows, vectors])
+        else:
+            with open(self.path, "ab") as file:
+                file.write(vectors.tobytes())
+            self._map = None # Mapped again with the new length on the next read
+        self._count += len(vectors)
+
+    # Write every row to a raw float32 file at `path`
+    def save(self, path):
+        path = Path(path)
+        if self.path is not None and path.resolve() == self.path.resolve():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path is not None:
+            shutil.copyfile(self.path, path)
+        else:
+            self._rows.tofile(path)
+
+    # Rows at the given positions (fancy indexing copies just those rows)
+    def get(self, positions: np.ndarray) -> np.ndarray:
+        return self.all()[positions]
+
+    # Every row, as a read-only memory map when backed by a file
+    def all(self) -> np.ndarray:
+        if self.path is None:
+            return self._rows
+        if self._count == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self._map is None:
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+        return self._map
+
+
+#function to re-rank each query's candidate positions (rows of `candidates`, -1 for none) by their exact inner
+#product with the query, keeping the top_k; returns (scores, indices) shaped (queries, top_k) like index.search
+def exact_rerank(store: FullVectorStore, query_vectors: np.ndarray, candidates: np.ndarray, top_k: int):
+    query_vectors = query_vectors.reshape(len(candidates), -1)
+    valid = candidates != -1
+    positions, inverse = np.unique(candidates[valid], return_inverse=True) # Each row read once, in file order
+    rows = store.get(positions)
+
+    exact = np.full(candidates.shape, -np.inf, dtype=np.float32)
+    exact[valid] = np.einsum("ij,ij->i", rows[inverse], query_vectors[np.nonzero(valid)[0]])
+
+    order = np.argsort(-exact, axis=1, kind="stable")[:, :top_k]
+    scores = np.take_along_axis(exact, order, axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    indices[scores == -np.inf] = -1
+    return scores, indices
+
+#function to drop the `excluded` results (a boolean array shaped like `ids`) from search results (rows of `ids`, best
+#first), keeping the first top_k left per query; rows with fewer are padded with -1 like index.search
+def drop_ids(scores: np.ndarray, ids: np.ndarray, excluded: np.ndarray, top_k: int):
+    keep = (ids != -1) & ~excluded
+    order = np.argsort(~keep, axis=1, kind="stable")[:, :top_k] # Kept results first, in their order
+    scores = np.take_along_axis(scores, order, axis=1)
+    ids = np.take_along_axis(ids, order, axis=1)
+    dropped = ~np.take_along_axis(keep, order, axis=1)
+    scores[dropped], ids[dropped] = -np.inf, -1
+    return scores, ids
+
+#function to score every query against a small set of vectors (rows of `vectors`, with vector IDs `ids`) by exact
+#inner product, keeping the top_k; returns (scores, indices) shaped (queries, top_k) like index.search
+def exact_search(vectors: np.ndarray, ids: np.ndarray, query_vectors: np.ndarray, top_k: int):
+    exact = query_vectors @ np.asarray(vectors, dtype=np.float32).T
+    if exact.shape[1] < top_k: # Pad so there are top_k columns, as index.search does
+        exact = np.hstack([exact, np.full((len(exact), top_k - exact.shape[1]), -np.inf, dtype=np.float32)])
+        ids = np.concatenate([ids, np.full(top_k - len(ids), -1, dtype=np.int64)])
+
+    order = np.argpartition(-exact, top_k - 1, axis=1)[:, :top_k] if top_k < exact.shape[1] else np.tile(np.arange(top_k), (len(exact), 1))
+    order = np.take_along_axis(order, np.argsort(-np.take_along_axis(exact, order, axis=1), axis=1, kind="stable"), axis=1)
+    scores = np.take_along_axis(exact, order, axis=1)
+    indices = ids[order]
+    indices[scores == -np.inf] = -1
+    return scores, indices
@@ -0,0 +1,121 @@
+#Rule based text cleaning engine used by clean_extracted_text()
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, Pattern, Tuple
+
+import re # Regular expressions for text cleaning
+
+
+# Patterns used by the cleaning functions, compiled once at import time
+PAGE_NUMBER_PATTERN = re.compile(r'Page \d+ of \d+')
+HEADER_PATTERN = re.compile(r'Header:.*\n')
+FOOTER_PATTERN = re.compile(r'Footer:.*\n')
+TIMESTAMP_PATTERN = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4} \d{1,2}:\d{2} (AM|PM)?')
+FILE_PATH_PATTERN = re.compile(r'([a-zA-Z]:)?(\\[a-zA-Z0-9_.-]+)+\\?')
+TRACKING_ID_PATTERN = re.compile(r'Tracking ID: \w+')
+EXTRA_NEWLINES_PATTERN = re.compile(r'\n{2,}')
+EXTRA_SPACES_PATTERN = re.compile(r"\s{2,}")
+WHITESPACE_SPLIT_PATTERN = re.compile(r"(\s+)")
+
+
+#a single substitution applied by the TextCleaner
+@dataclass(frozen=True)
+class CleaningRule:
+    name: str # Name used to identify the rule, e.g. when removing it
+    pattern: Pattern # Precompiled pattern to replace
+    replacement: str = "" # Replacement for every match, removal by default
+    anchor: Optional[str] = None # Literal every match contains; the pass is skipped when it is absent
+    max_prefix: int = 0 # Most characters a match can have before its first anchor
+
+    def apply(self, text: str) -> str:
+        if self.anchor is None:
+            return self.pattern.sub(self.replacement, text)
+
+        # A substring check is much cheaper than a regex pass and never allocates a copy of the text
+        if self.anchor not in text:
+            return text
+
+        # Patterns starting with the anchor already get a fast literal prefix search from the regex engine
+        if not self.max_prefix:
+            return self.pattern.sub(self.replacement, text)
+        return self._sub_near_anchors(text)
+
+    # Same result as pattern.sub(), but only tries to match within max_prefix characters before each anchor,
+    # instead of at every position of the text. Any match has its first anchor in that window, so the
+    # leftmost match found this way is the one re.sub() would find.
+    def _sub_near_anchors(self, text: str) -> str:
+        pieces = []
+        last_end = 0 # End of the previous match, matches never overlap
+        position = text.find(self.anchor)
+
+        while position != -1:
+            match = None
+            for start in range(max(last_end, position - self.max_prefix), position + 1):
+                match = self.pattern.match(text, start)
+                if match:
+                    break
+
+            if match:
+                pieces.append(text[last_end:match.start()])
+                pieces.append(match.expand(self.replacement))
+                last_end = match.end()
+                position = text.find(self.anchor, last_end)
+            else:
+                position = text.find(self.anchor, position + 1)
+
+        if not pieces:
+            return text
+        pieces.append(text[last_end:])
+        return "".join(pieces)
+
+
+# The removal rules of clean_extracted_text(), in the order they have always been applied
+DEFAULT_RULES: Tuple[CleaningRule, ...] = (
+    CleaningRule("page_numbers", PAGE_NUMBER_PATTERN, anchor="Page "),
+    CleaningRule("headers", HEADER_PATTERN, anchor="Header:"),
+    CleaningRule("footers", FOOTER_PATTERN, anchor="Footer:"),
+    CleaningRule("timestamps", TIMESTAMP_PATTERN, anchor="/", max_prefix=2), # \d{1,2} before the first "/"
+    CleaningRule("file_paths", FILE_PATH_PATTERN, anchor="\\", max_prefix=2), # optional drive letter and ":"
+    CleaningRule("tracking_ids", TRACKING_ID_PATTERN, anchor="Tracking ID: "),
+)
+
+
+#function to collapse whitespace in one pass, same result as the "\n{2,}" -> "\n" pass followed by the "\s{2,}" -> " " pass
+def _collapse_whitespace_run(match) -> str:
+    run = match.group()
+    # A run of only newlines becomes one newline; any other run is still 2+ long after that, so becomes a space
+    return "\n" if run.count("\n") == len(run) else " "
+
+def collapse_whitespace(text: str) -> str:
+    return EXTRA_SPACES_PATTERN.sub(_collapse_whitespace_run, text)
+
+
+#applies removal rules in order, then collapses whitespace and strips the result
+class TextCleaner:
+    def __init__(self, rules: Iterable[CleaningRule] = DEFAULT_RULES, collapse_whitespace: bool = True):
+        self.rules = tuple(rules)
+        self.collapse_whitespace = collapse_whitespace
+
+    # Rules run in order because removing one match can create another (e.g. a header removal joins two lines),
+    # so fusing them into one alternation would change the output. Instead each pass only looks near its anchor.
+    def clean(self, text: str) -> str:
+        if not text:
+            return ""
+
+        for rule in self.rules:
+            text = rule.apply(text)
+
+        if self.collapse_whitespace:
+            text = collapse_whitespace(text)
+        return text.strip()
+
+    # New cleaner with extra rules appended after the existing ones
+    def with_rules(self, *rules: CleaningRule) -> "TextCleaner":
+        return TextCleaner(self.rules + rules, self.collapse_whitespace)
+
+    # New cleaner without the rules with the given names
+    def without_rules(self, *names: str) -> "TextCleaner":
+        return TextCleaner((rule for rule in self.rules if rule.name not in names), self.collapse_whitespace)
+
+
+DEFAULT_CLEANER = TextCleaner()
@@ -1,7 +1,7 @@
-from docx import Document
 from urllib.parse import urlparse  # For URL parsing
 from pathlib import Path
-from .text_preprocessing import extract_html_text, extract_pdf_text, extract_docx_text
+from .docx_extraction import open_docx, read_docx_author
+from .text_preprocessing import extract_html_text, html_to_text, iter_pdf_text
 from Project.rag.utils.custom_exceptions import UnsupportedFileTypeError
 
 SUPPORTED_EXTENSIONS = {
@@ -11,8 +11,8 @@ SUPPORTED_EXTENSIONS = {
 
 #function to retrieve document properties like title and author
 def retrieve_document_props(file_path):
-    props = Document(file_path).core_properties # Access core properties  
-    return Path(file_path).name, props.author or "unknown" 
+    author = read_docx_author(file_path) # dc:creator from docProps/core.xml, without loading the whole document
+    return Path(file_path).name, author or "unknown" 
 
 
 #function to check if a string is a URL
@@ -30,34 +30,67 @@ def detect_file_type(file_path):
     return SUPPORTED_EXTENSIONS[ext]
 
 #function to extract text and metadata based on file type
-def extract(file_path):
+#`pdf_workers` caps the processes used for very large pdfs (None = CPU count, 1 = always in this process)
+def extract(file_path, fetcher=None, pdf_workers=None):
+    extracted = extract_stream(file_path, fetcher, pdf_workers)
+    extracted["text"] = "".join(extracted["text"]) # string returned from PyPDF2 / python-docx / BeautifulSoup
+    return extracted
+
+#function to extract metadata and a lazy stream of text pieces (pages for PDFs, paragraphs for DOCX).
+#Joining the pieces gives the same text as extract(); large documents never have to be held as one string
+def extract_stream(file_path, fetcher=None, pdf_workers=None):
     #string object for file path is created to account for both URL and local file paths
     if is_url(str(file_path)):
         file_type = "html"
         file_name = file_path
         author = urlparse(file_path).netloc or "unknown" #unknown is for safety
-        raw_text = extract_html_text(file_path)
+        text_pieces = iter([extract_html_text(file_path, fetcher)])
     else:
         file_type = detect_file_type(file_path)
 
         if file_type == "pdf":
-            raw_text = extract_pdf_text(file_path)
+            text_pieces = iter_pdf_text(file_path, pdf_workers)
             # PDFs are not Office packages; don't call python-docx on them.
             file_name = Path(file_path).name
             author = "unknown"
         elif file_type == "docx":
-            raw_text = extract_docx_text(file_path)
-            file_name, author = retrieve_document_props(file_path)
+            # One open of the package gives both the author and the paragraph stream
+            author, text_pieces = open_docx(file_path)
+            file_name, author = Path(file_path).name, author or "unknown"
         else:
             raise UnsupportedFileTypeError(file_type)  # Just a safety check
     
     
-    #extracted text and metadata dictionary
+    #extracted text stream and metadata dictionary
     return {
-        "text": raw_text,        # string returned from PyPDF2 / python-docx / BeautifulSoup
+        "text": text_pieces,     # iterator of text pieces, consumed once
         "metadata": {
             "source_type": file_type,
             "file_name": file_name,
             "author": author
         }
-    }
\ No newline at end of file
+    }
+
+#function to build the same dictionary as extract() for a URL whose HTML was already fetched (e.g. by URLFetcher.fetch_many).
+#`text` is the already extracted text when the HTTP cache had it, in which case the HTML isn't parsed again
+def extract_fetched_html(url, html, text=None):
+    return {
+        "text": text if text is not None else html_to_text(html),
+        "metadata": {
+            "source_type": "html",
+            "file_name": url,
+            "author": urlparse(url).netloc or "unknown" #unknown is for safety
+        }
+    }
+
+#function to build the same dictionary as extract() for a pdf whose pages were already extracted
+#(e.g. as page ranges spread over the ingest_many() process pool)
+def extract_pdf_pages(file_path, pages):
+    return {
+        "text": "\n".join(pages),
+        "metadata": {
+            "source_type": "pdf",
+            "file_name": Path(file_path).name,
+            "author": "unknown"
+        }
+    }
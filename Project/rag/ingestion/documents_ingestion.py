@@ -1,10 +1,362 @@
-from .text_preprocessing import clean_extracted_text, normalize_document
-from .dispatcher import extract
+from .text_preprocessing import (
+    clean_extracted_text, clean_page_range, iter_clean_extracted_text, join_clean_page_ranges, normalize_document
+)
+from .dispatcher import extract, extract_stream, extract_fetched_html, extract_pdf_pages, is_url, SUPPORTED_EXTENSIONS
+from .fetching import FetchResult, URLFetcher, get_default_fetcher
+from .manifest import IngestionManifest, file_fingerprint, headers_fingerprint
+from .pdf_extraction import extract_page_range, page_ranges, should_split
+from Project.rag.chunking.chunking import chunk_stream
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from pypdf import PdfReader
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import os
+import time
+
+
+DOWNLOAD_POLL_SECONDS = 0.05 # How often a busy pool checks for finished downloads to submit
 
 
 #function to handle the complete ingestion process
-def ingestion(file_path):  
-    extracted = extract(file_path)     # PDF / HTML / DOCX
+#`pdf_workers` caps the processes used for very large pdfs (None = CPU count, 1 = always in this process)
+def ingestion(file_path, document_id=None, pdf_workers=None):
+    extracted = extract(file_path, pdf_workers=pdf_workers)     # PDF / HTML / DOCX
     cleaned_text = clean_extracted_text(extracted["text"])
     extracted["text"] = cleaned_text
-    return normalize_document(extracted) 
\ No newline at end of file
+    return normalize_document(extracted, document_id)
+
+
+#function to ingest and chunk a document page by page, so peak memory depends on page size rather than
+#document size. Returns the normalized document (with empty text) and a lazy iterator of chunks that is
+#identical to chunk_text(ingestion(file_path)["text"], tokenize_fn, ...)
+def ingestion_chunks(file_path, tokenize_fn, **chunk_options):
+    extracted = extract_stream(file_path)
+    pieces = iter_clean_extracted_text(extracted["text"])
+    document = normalize_document({"text": "", "metadata": extracted["metadata"]})
+    return document, chunk_stream(pieces, tokenize_fn, **chunk_options)
+
+
+#running totals for a bulk ingestion run
+@dataclass
+class IngestionStats:
+    files: int = 0 # Number of sources processed so far
+    succeeded: int = 0 # Sources that produced a document
+    failed: int = 0 # Sources whose extraction raised an error
+    skipped: int = 0 # Sources skipped because the manifest says they are unchanged
+    elapsed: float = 0.0 # Wall clock seconds for the whole run
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.succeeded / self.elapsed if self.elapsed > 0 else 0.0
+
+
+#function to expand a directory (or a mix of directories, files and URLs) into a flat list of sources
+def collect_sources(paths) -> List:
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+
+    sources = []
+    for path in paths:
+        if not is_url(str(path)) and Path(path).is_dir():
+            # Only pick up the file types the dispatcher knows how to extract
+            sources.extend(
+                p for p in sorted(Path(path).rglob("*"))
+                if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS
+            )
+        else:
+            sources.append(path)
+    return sources
+
+
+#function run inside a worker process; never raises so one bad file can't take down the batch
+def _ingest_one(file_path, pdf_workers=None) -> Dict:
+    start = time.perf_counter()
+    try:
+        document, error = ingestion(file_path, pdf_workers=pdf_workers), None
+    except Exception as e:
+        document, error = None, f"{type(e).__name__}: {e}"
+
+    return {
+        "source": str(file_path),
+        "document": document,
+        "error": error,
+        "seconds": time.perf_counter() - start # Per-file extraction + cleaning + normalization time
+    }
+
+
+#function run inside a pool worker: parse, clean and normalize a URL downloaded by URLFetcher.fetch_many(), in the
+#same result format as _ingest_one(). "parsed_text" carries the parsed text back when the fetcher has a cache entry
+#waiting for it (see _remember_parsed_text), None otherwise
+def _ingest_fetched(fetch_result: FetchResult) -> Dict:
+    start = time.perf_counter()
+    document, error, parsed_text = None, None, None
+    if fetch_result.error is not None:
+        error = f"Exception: {fetch_result.error}" # Same format as the errors raised by extract()
+    else:
+        try:
+            extracted = extract_fetched_html(fetch_result.url, fetch_result.html, fetch_result.text)
+            if fetch_result.cached is not None and fetch_result.text is None:
+                parsed_text = extracted["text"]
+            extracted["text"] = clean_extracted_text(extracted["text"])
+            document = normalize_document(extracted)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    return {
+        "source": fetch_result.url,
+        "document": document,
+        "error": error,
+        "parsed_text": parsed_text,
+        "seconds": fetch_result.seconds + time.perf_counter() - start # Fetch + parsing + cleaning time
+    }
+
+#function to store the parsed text a worker sent back in the fetcher's cache (in this process, where the cache
+#lives) and drop it from the result
+def _remember_parsed_text(result: Dict, fetch_result: FetchResult, fetcher: URLFetcher) -> Dict:
+    parsed_text = result.pop("parsed_text", None)
+    if parsed_text is not None:
+        fetcher.remember_text(fetch_result, parsed_text)
+    return result
+
+
+#function to ingest many files across a process pool, yielding results as soon as each file finishes
+def ingest_many(
+    paths, # A directory, a single path/URL, or an iterable of paths/URLs/directories
+    workers: Optional[int] = None, # Number of worker processes (defaults to the CPU count)
+    stats: Optional[IngestionStats] = None, # Optional stats object updated in place while results stream out
+    fetcher: Optional[URLFetcher] = None # Fetcher used for URLs (defaults to the shared one)
+) -> Iterator[Dict]:
+    sources = collect_sources(paths)
+    urls = [source for source in sources if is_url(str(source))]
+    files = [source for source in sources if not is_url(str(source))]
+    stats = stats if stats is not None else IngestionStats()
+    start = time.perf_counter()
+
+    def record(result):
+        stats.files += 1
+        if result["error"] is None:
+            stats.succeeded += 1
+        else:
+            stats.failed += 1
+        stats.elapsed = time.perf_counter() - start
+        return result
+
+    # URLs are I/O bound: the fetcher's threads only download them, in the background, and each page is parsed
+    # and cleaned on the same pool as the files as soon as its download finishes
+    fetcher = fetcher or get_default_fetcher()
+    fetched = fetcher.fetch_many(urls) if urls else None
+
+    for result in _ingest_files(files, workers or os.cpu_count() or 1, fetched, fetcher):
+        yield record(result)
+
+
+#function run inside a pool worker: a pdf big enough to split is only counted and handed back, so the parent can
+#spread its page ranges over the whole pool; anything else is ingested right here (a smaller pdf from the reader
+#that counted its pages, rather than parsing it again)
+def _ingest_or_split(file_path, workers: int) -> Dict:
+    start = time.perf_counter()
+    if Path(file_path).suffix.lower() == ".pdf":
+        try:
+            reader = PdfReader(file_path)
+            page_count = len(reader.pages)
+        except Exception:
+            return _ingest_one(file_path, pdf_workers=1) # Let it report the error
+
+        if should_split(page_count, workers):
+            return {"source": str(file_path), "split_pages": page_count, "seconds": time.perf_counter() - start}
+        document, error = None, None
+        try:
+            extracted = extract_pdf_pages(file_path, [page.extract_text() or "" for page in reader.pages])
+            extracted["text"] = clean_extracted_text(extracted["text"])
+            document = normalize_document(extracted)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {"source": str(file_path), "document": document, "error": error, "seconds": time.perf_counter() - start}
+
+    return _ingest_one(file_path, pdf_workers=1) # Never start a pool inside a pool worker
+
+#function run inside a pool worker: extract a page range of a split pdf and clean all of it but the lines at its
+#seams with the neighbouring ranges, so the parent never cleans the whole document (see clean_page_range)
+def _extract_clean_range(path, start: int, stop: int) -> Tuple[str, Optional[str], Optional[str]]:
+    return clean_page_range("\n".join(extract_page_range(path, start, stop)))
+
+
+#page ranges of one split pdf, cleaned by their workers, collected as they finish and put back in order
+@dataclass
+class _SplitPdf:
+    source: object
+    seconds: float # Time spent before splitting (counting pages)
+    started: float # perf_counter() when the ranges were queued
+    ranges: List[Optional[Tuple]] = field(default_factory=list) # clean_page_range() of each range
+    remaining: int = 0
+    error: Optional[str] = None # First error raised by one of the ranges
+
+    # Join the cleaned ranges (cleaning only the lines at their seams) and normalize, in the same result format
+    # as _ingest_one()
+    def result(self) -> Dict:
+        document, error = None, self.error
+        if error is None:
+            try:
+                extracted = extract_pdf_pages(self.source, [join_clean_page_ranges(self.ranges)]) # One piece, already cleaned
+                document = normalize_document(extracted)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+        return {
+            "source": str(self.source),
+            "document": document,
+            "error": error,
+            "seconds": self.seconds + time.perf_counter() - self.started # Wall clock, the ranges overlap
+        }
+
+
+#function to run the ingestion of local files (and of the pages `fetched` downloads) across a process pool,
+#yielding results as they complete. PDFs with many pages are split into page ranges that run on the same pool,
+#so one huge file can't keep a single worker busy long after every other file is done
+def _ingest_files(files: List, workers: int, fetched=None, fetcher: Optional[URLFetcher] = None) -> Iterator[Dict]:
+    def downloading():
+        return fetched is not None and fetched.remaining > 0
+
+    # Single worker: skip the pool entirely, mostly useful for debugging and tiny batches.
+    # A lone large pdf still gets its pages extracted in parallel
+    if workers == 1 or (len(files) <= 1 and not downloading()):
+        for source in files:
+            yield _ingest_one(source, pdf_workers=workers)
+            while downloading(): # Hand out downloads that finished meanwhile
+                fetch_result = fetched.poll()
+                if fetch_result is None:
+                    break
+                yield _remember_parsed_text(_ingest_fetched(fetch_result), fetch_result, fetcher)
+        for fetch_result in fetched or ():
+            yield _remember_parsed_text(_ingest_fetched(fetch_result), fetch_result, fetcher)
+        return
+
+    pending_sources = iter(files)
+    pending_ranges = deque() # (_SplitPdf, range index, start, stop) of split pdfs, submitted before new files
+    max_in_flight = workers * 4 # Bound the queue so finished results don't pile up unread
+
+    while True:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = {} # future -> (source or FetchResult, None) for whole sources, (_SplitPdf, range index) for page ranges
+            broken = False
+
+            def submit_fetched(fetch_result):
+                in_flight[executor.submit(_ingest_fetched, fetch_result)] = (fetch_result, None)
+
+            # Page ranges first, then finished downloads (already held in memory), then new files
+            def submit_next():
+                if pending_ranges:
+                    split, index, start, stop = pending_ranges.popleft()
+                    in_flight[executor.submit(_extract_clean_range, split.source, start, stop)] = (split, index)
+                    return True
+                fetch_result = fetched.poll() if downloading() else None
+                if fetch_result is not None:
+                    submit_fetched(fetch_result)
+                    return True
+                source = next(pending_sources, None)
+                if source is None:
+                    return False
+                in_flight[executor.submit(_ingest_or_split, source, workers)] = (source, None)
+                return True
+
+            def queue_ranges(source, page_count, seconds):
+                split = _SplitPdf(source, seconds, time.perf_counter())
+                for index, (start, stop) in enumerate(page_ranges(page_count, workers)):
+                    pending_ranges.append((split, index, start, stop))
+                    split.ranges.append(None)
+                    split.remaining += 1
+
+            while len(in_flight) < max_in_flight and submit_next():
+                pass
+
+            while in_flight or (downloading() and not broken):
+                if not in_flight:
+                    submit_fetched(next(fetched)) # Only downloads left: wait for the next one
+                    continue
+                # While downloads are still running, wake up now and then to submit the ones that finished
+                timeout = DOWNLOAD_POLL_SECONDS if downloading() and not broken else None
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    owner, range_index = in_flight.pop(future)
+
+                    if range_index is not None:
+                        # One page range of a split pdf; the document is finished once all of its ranges are
+                        try:
+                            owner.ranges[range_index] = future.result()
+                        except Exception as e:
+                            broken = broken or isinstance(e, BrokenProcessPool)
+                            owner.error = owner.error or f"{type(e).__name__}: {e}"
+                        owner.remaining -= 1
+                        if not owner.remaining:
+                            yield owner.result()
+                        continue
+
+                    source = owner.url if isinstance(owner, FetchResult) else str(owner)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # A worker died (e.g. a crash inside a native parser); fail the in-flight sources only
+                        broken = True
+                        result = {"source": source, "document": None, "error": f"{type(e).__name__}: {e}", "seconds": 0.0}
+
+                    if isinstance(owner, FetchResult):
+                        yield _remember_parsed_text(result, owner, fetcher)
+                        continue
+                    if "split_pages" in result:
+                        if not broken:
+                            queue_ranges(owner, result["split_pages"], result["seconds"])
+                            continue
+                        result = {"source": source, "document": None, "error": "BrokenProcessPool: pool broke before the pages were extracted", "seconds": result["seconds"]}
+                    yield result
+
+                if not broken:
+                    while len(in_flight) < max_in_flight and submit_next():
+                        pass
+
+        if not broken:
+            return
+        # Restart with a fresh pool for whatever has not been submitted yet
+
+
+#function to ingest only the sources that are new or changed since the last run recorded in `manifest`.
+#Unchanged sources are skipped before extraction; documents keep the same ID across runs. Each result also
+#carries its "fingerprint"; call manifest.set_chunks() once a document is indexed and manifest.save() at the end
+def ingest_changed(
+    paths, # A directory, a single path/URL, or an iterable of paths/URLs/directories
+    manifest: IngestionManifest, # Manifest from the previous run, updated in place
+    workers: Optional[int] = None, # Number of worker processes (defaults to the CPU count)
+    stats: Optional[IngestionStats] = None, # Optional stats object, `skipped` counts the unchanged sources
+    fetcher: Optional[URLFetcher] = None # Fetcher used for URLs (defaults to the shared one)
+) -> Iterator[Dict]:
+    stats = stats if stats is not None else IngestionStats()
+
+    sources = collect_sources(paths)
+    fetcher = fetcher or get_default_fetcher()
+    url_headers = fetcher.head_many(source for source in sources if is_url(str(source))) # Checked concurrently
+
+    changed = {} # str(source) -> (source, fingerprint)
+    for source in sources:
+        try:
+            fingerprint = headers_fingerprint(url_headers[str(source)]) if is_url(str(source)) else file_fingerprint(source)
+        except OSError:
+            fingerprint = None # Let ingestion report the error for this file
+
+        if manifest.is_unchanged(source, fingerprint):
+            stats.skipped += 1
+        else:
+            changed[str(source)] = (source, fingerprint)
+
+    for result in ingest_many([source for source, _ in changed.values()], workers=workers, stats=stats, fetcher=fetcher):
+        source, fingerprint = changed[result["source"]]
+        result["fingerprint"] = fingerprint
+
+        if result["document"] is not None:
+            document_id = manifest.document_id(source)
+            result["document"]["id"] = document_id
+            manifest.record(source, fingerprint, document_id)
+        yield result
@@ -0,0 +1,124 @@
+#Streaming DOCX reader: opens the package once and parses its xml parts directly instead of loading python-docx's object model
+
+from typing import Iterator, Optional, Tuple
+from xml.etree import ElementTree
+
+import zipfile
+
+# Namespaces used by the parts that are read
+W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DC_NAMESPACE = "{http://purl.org/dc/elements/1.1/}"
+RELATIONSHIPS_NAMESPACE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+W_BODY = W_NAMESPACE + "body"
+W_P = W_NAMESPACE + "p"
+W_R = W_NAMESPACE + "r"
+W_HYPERLINK = W_NAMESPACE + "hyperlink"
+W_BR = W_NAMESPACE + "br"
+W_TYPE = W_NAMESPACE + "type"
+
+# Run children that python-docx turns into text, other than w:t and w:br which depend on the element
+RUN_CHARACTERS = {
+    W_NAMESPACE + "tab": "\t",
+    W_NAMESPACE + "ptab": "\t",
+    W_NAMESPACE + "cr": "\n",
+    W_NAMESPACE + "noBreakHyphen": "-",
+}
+W_T = W_NAMESPACE + "t"
+
+# Where the parts usually are, used when the package relationships don't say otherwise
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+DEFAULT_CORE_PART = "docProps/core.xml"
+
+
+#function to find the main document part and the core properties part from the package relationships (_rels/.rels)
+def _package_parts(archive: zipfile.ZipFile) -> Tuple[str, Optional[str]]:
+    document_part, core_part = DEFAULT_DOCUMENT_PART, None
+    try:
+        relationships = ElementTree.fromstring(archive.read("_rels/.rels"))
+    except KeyError:
+        return document_part, DEFAULT_CORE_PART if DEFAULT_CORE_PART in archive.namelist() else None
+
+    for relationship in relationships.iter(RELATIONSHIPS_NAMESPACE + "Relationship"):
+        kind, target = relationship.get("Type", ""), relationship.get("Target", "").lstrip("/")
+        if kind.endswith("/officeDocument"):
+            document_part = target
+        elif kind.endswith("/metadata/core-properties"):
+            core_part = target
+    return document_part, core_part
+
+#function to read the author (dc:creator) from the core properties, "" when it isn't set like python-docx
+def _read_author(archive: zipfile.ZipFile, core_part: Optional[str]) -> str:
+    if core_part is None or core_part not in archive.namelist():
+        return ""
+    creator = ElementTree.fromstring(archive.read(core_part)).find(DC_NAMESPACE + "creator")
+    return creator.text or "" if creator is not None else ""
+
+#function to get the text of a run the way python-docx's Run.text does
+def _run_text(run) -> str:
+    parts = []
+    for child in run:
+        if child.tag == W_T:
+            parts.append(child.text or "")
+        elif child.tag == W_BR:
+            # Line breaks are newlines; page and column breaks have no text
+            parts.append("\n" if child.get(W_TYPE, "textWrapping") == "textWrapping" else "")
+        elif child.tag in RUN_CHARACTERS:
+            parts.append(RUN_CHARACTERS[child.tag])
+    return "".join(parts)
+
+#function to get the text of a paragraph the way python-docx's Paragraph.text does:
+#only runs directly in the paragraph or directly in one of its hyperlinks count
+def paragraph_text(paragraph) -> str:
+    parts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(run) for run in child if run.tag == W_R)
+    return "".join(parts)
+
+#function to yield the text of each body paragraph, with "\n" separators, parsing the document part incrementally.
+#Like Document(path).paragraphs, paragraphs inside tables, text boxes etc. are not included.
+#The archive is closed once the stream is exhausted or closed
+def _iter_paragraph_pieces(archive: zipfile.ZipFile, document_part: str) -> Iterator[str]:
+    try:
+        with archive.open(document_part) as stream:
+            depth, body_depth, index = 0, None, 0
+            for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if element.tag == W_BODY and body_depth is None:
+                        body_depth = depth
+                    continue
+
+                depth -= 1
+                if body_depth is not None and depth == body_depth:
+                    # A direct child of the body is complete
+                    if element.tag == W_P:
+                        if index:
+                            yield "\n"
+                        yield paragraph_text(element)
+                        index += 1
+                    element.clear() # Processed, so its subtree doesn't have to stay in memory
+                elif element.tag == W_BODY:
+                    body_depth = None # Only the first body counts, like python-docx
+    finally:
+        archive.close()
+
+#function to open a docx file once and return its author ("" if not set) and a lazy stream of its text pieces.
+#Joining the pieces gives the same text as "\n".join(p.text for p in Document(path).paragraphs)
+def open_docx(path) -> Tuple[str, Iterator[str]]:
+    archive = zipfile.ZipFile(path)
+    try:
+        document_part, core_part = _package_parts(archive)
+        author = _read_author(archive, core_part)
+    except Exception:
+        archive.close()
+        raise
+    return author, _iter_paragraph_pieces(archive, document_part)
+
+#function to read only the author of a docx file ("" if not set), same value as Document(path).core_properties.author
+def read_docx_author(path) -> str:
+    with zipfile.ZipFile(path) as archive:
+        return _read_author(archive, _package_parts(archive)[1])
@@ -0,0 +1,302 @@
+#Pooled, concurrent URL fetching used for HTML ingestion
+
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Optional
+from urllib.parse import urlparse
+
+from .http_cache import CachedPage, HTTPCache
+
+import queue
+import threading
+import time
+import requests # For fetching HTML content from URLs
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504} # Responses worth trying again
+
+
+#running totals for everything a fetcher has downloaded
+@dataclass
+class FetchStats:
+    requests: int = 0 # HTTP requests sent, including retries
+    succeeded: int = 0 # URLs fetched successfully
+    failed: int = 0 # URLs that failed after all retries
+    retries: int = 0 # Requests that were retries of an earlier attempt
+    bytes: int = 0 # Response body bytes received for successful URLs
+    total_latency: float = 0.0 # Sum of per-URL fetch seconds (retries and backoff included)
+    max_latency: float = 0.0 # Slowest URL
+    elapsed: float = 0.0 # Wall clock seconds from the first fetch to the latest completed one
+
+    @property
+    def avg_latency(self) -> float:
+        fetched = self.succeeded + self.failed
+        return self.total_latency / fetched if fetched else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+#outcome of fetching one URL; never raised, so one bad URL can't stop a batch
+@dataclass
+class FetchResult:
+    url: str
+    html: Optional[str] # Response body, None on failure
+    status: Optional[int] # HTTP status of the response, None on failure
+    bytes: int # Size of the response body
+    seconds: float # Time spent on this URL, retries and backoff included
+    error: Optional[str] = None
+    text: Optional[str] = None # Extracted text from the cache, set when the page hasn't changed since it was parsed
+    cached: Optional[CachedPage] = None # Cache entry for this response, used to remember its extracted text
+
+
+#fetches URLs over one pooled requests.Session, with a global and a per-host concurrency limit and retries
+class URLFetcher:
+    def __init__(
+        self,
+        max_concurrency: int = 16, # Most requests in flight at once across all hosts
+        per_host: int = 4, # Most requests in flight at once to a single host
+        retries: int = 3, # Extra attempts after a connection error, timeout or retryable status
+        backoff: float = 0.5, # Seconds before the first retry, doubled on every further retry
+        timeout: float = 10, # Per-request timeout in seconds
+        cache: Optional[HTTPCache] = None # On-disk cache, pages are then revalidated with conditional requests
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = FetchStats()
+
+        # One session keeps TCP/TLS connections alive between requests to the same host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="url-fetch")
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._started_at: Optional[float] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    # Send one request, retrying with exponential backoff; raises the last requests exception
+    def _get(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        attempt = 0
+        while True:
+            with self._lock:
+                self.stats.requests += 1
+                if attempt:
+                    self.stats.retries += 1
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    response.raise_for_status() # Raise an exception for bad status codes (4xx, 5xx)
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.retries:
+                    raise
+
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def _record(self, seconds: float, size: int, ok: bool):
+        with self._lock:
+            if ok:
+                self.stats.succeeded += 1
+                self.stats.bytes += size
+            else:
+                self.stats.failed += 1
+            self.stats.total_latency += seconds
+            self.stats.max_latency = max(self.stats.max_latency, seconds)
+            self.stats.elapsed = time.perf_counter() - self._started_at
+
+    # Download one URL, raising the same errors extract_html_text() always raised
+    def _download(self, url: str) -> FetchResult:
+        start = time.perf_counter()
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = start
+
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        headers = cached.conditional_headers() if cached is not None else {}
+
+        try:
+            with self._host_slot(urlparse(url).netloc):
+                response = self._get(url, headers)
+        except requests.exceptions.ConnectionError:
+            self._record(time.perf_counter() - start, 0, ok=False)
+            raise Exception(f"Connection failed: Unable to reach {url}")
+        except requests.exceptions.Timeout:
+            self._record(time.perf_counter() - start, 0, ok=False)
+            raise Exception(f"Request timeout: {url} took too long to respond")
+        except requests.exceptions.HTTPError as e:
+            self._record(time.perf_counter() - start, 0, ok=False)
+            raise Exception(f"HTTP error: {e}")
+        except requests.exceptions.RequestException as e:
+            self._record(time.perf_counter() - start, 0, ok=False)
+            raise Exception(f"Request failed: {e}")
+
+        seconds = time.perf_counter() - start
+        self._record(seconds, len(response.content), ok=True)
+
+        # Not modified: serve the cached body, and the cached text if it has been parsed before
+        if cached is not None and response.status_code == 304:
+            self.cache.record_hit(cached)
+            return FetchResult(url, cached.body, 304, 0, seconds, text=cached.text, cached=cached)
+
+        html = response.text # Get HTML content
+        if self.cache is None:
+            return FetchResult(url, html, response.status_code, len(response.content), seconds)
+
+        self.cache.record_miss()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        self.cache.store(url, etag, last_modified, html)
+        return FetchResult(
+            url, html, response.status_code, len(response.content), seconds,
+            cached=CachedPage(url, etag, last_modified, html) if etag or last_modified else None
+        )
+
+    # Fetch one URL and return its HTML
+    def fetch(self, url: str) -> str:
+        return self._download(url).html
+
+    # Fetch one URL and return its text; `parse` only runs when the cache doesn't already have the text
+    def fetch_text(self, url: str, parse: Callable[[str], str]) -> str:
+        result = self._download(url)
+        if result.text is not None:
+            return result.text
+        text = parse(result.html)
+        self.remember_text(result, text)
+        return text
+
+    # Cache the text extracted from a fetched page, so the next unchanged fetch can skip parsing
+    def remember_text(self, result: FetchResult, text: str):
+        if self.cache is not None and result.cached is not None and result.text is None:
+            self.cache.store_text(result.cached, text)
+
+    def _fetch_result(self, url: str) -> FetchResult:
+        start = time.perf_counter()
+        try:
+            return self._download(url)
+        except Exception as e:
+            return FetchResult(url, None, None, 0, time.perf_counter() - start, str(e))
+
+    def _head(self, url: str) -> Optional[Mapping[str, str]]:
+        try:
+            with self._host_slot(urlparse(url).netloc):
+                response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        return response.headers
+
+    # Send a HEAD request for each URL concurrently, on the same session and host limits as downloads, and return
+    # url -> response headers (None when the request failed); used to check validators without downloading
+    def head_many(self, urls: Iterable[str]) -> Dict[str, Optional[Mapping[str, str]]]:
+        urls = list(dict.fromkeys(str(url) for url in urls))
+        return dict(zip(urls, self._executor.map(self._head, urls)))
+
+    # Fetch many URLs concurrently. Downloads start right away in the background; results come out as
+    # each URL finishes, so iterating can be delayed (e.g. while local files are being processed)
+    def fetch_many(self, urls: Iterable[str]) -> Iterator[FetchResult]:
+        return _FetchBatch(self, urls)
+
+
+#schedules one fetch_many() call: hosts are served round robin and never get more than per_host requests,
+#so a long list of URLs on one host can't occupy every worker while other hosts wait
+class _FetchBatch:
+    def __init__(self, fetcher: URLFetcher, urls: Iterable[str]):
+        self.fetcher = fetcher
+        self.results: "queue.Queue[FetchResult]" = queue.Queue()
+        self.lock = threading.RLock() # Done callbacks can run inline inside _schedule()
+        self.waiting = defaultdict(deque) # host -> URLs not submitted yet
+        self.hosts = deque() # Hosts with waiting URLs, in round robin order
+        self.active = defaultdict(int) # host -> requests in flight
+        self.in_flight = 0
+        self.remaining = 0 # Results not yet handed out
+
+        for url in urls:
+            host = urlparse(str(url)).netloc
+            if not self.waiting[host]:
+                self.hosts.append(host)
+            self.waiting[host].append(str(url))
+            self.remaining += 1
+
+        self._schedule()
+
+    def _schedule(self):
+        with self.lock:
+            skipped = 0 # Hosts in a row that are already at their limit
+            while self.hosts and self.in_flight < self.fetcher.max_concurrency and skipped < len(self.hosts):
+                host = self.hosts[0]
+                self.hosts.rotate(-1)
+                if self.active[host] >= self.fetcher.per_host:
+                    skipped += 1
+                    continue
+
+                skipped = 0
+                url = self.waiting[host].popleft()
+                if not self.waiting[host]:
+                    self.hosts.remove(host)
+                self.active[host] += 1
+                self.in_flight += 1
+                future = self.fetcher._executor.submit(self.fetcher._fetch_result, url)
+                future.add_done_callback(lambda f, host=host: self._done(host, f))
+
+    def _done(self, host: str, future):
+        with self.lock:
+            self.active[host] -= 1
+            self.in_flight -= 1
+        self.results.put(future.result())
+        self._schedule()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> FetchResult:
+        if self.remaining == 0:
+            raise StopIteration
+        self.remaining -= 1
+        return self.results.get()
+
+    # Return a finished result without blocking, or None if nothing has finished yet
+    def poll(self) -> Optional[FetchResult]:
+        if self.remaining == 0:
+            return None
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            return None
+        self.remaining -= 1
+        return result
+
+
+_default_fetcher: Optional[URLFetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+#shared fetcher used when the caller doesn't pass one, so single extract() calls still reuse connections
+def get_default_fetcher() -> URLFetcher:
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = URLFetcher()
+        return _default_fetcher
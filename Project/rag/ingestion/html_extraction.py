@@ -0,0 +1,185 @@
+#Pluggable backends that turn an html document into the text kept for ingestion
+
+from bs4 import BeautifulSoup # HTML parsing
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+from html.parser import HTMLParser
+from typing import Callable, Dict, List
+
+import re
+
+SKIPPED_TAGS = frozenset(["script", "style", "nav", "footer"]) # Elements whose text is never kept
+
+# Elements whose strings BeautifulSoup gives a special string class, which get_text() leaves out
+HIDDEN_STRING_TAGS = frozenset(["template", "rt", "rp"])
+
+# Elements html.parser based BeautifulSoup closes as soon as they open
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta",
+    "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame", "image", "isindex",
+    "nextid", "spacer"
+])
+
+
+#reference backend: builds a full BeautifulSoup tree, decomposes the skipped elements and calls get_text
+def bs4_html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove scripts, styles, nav & footer
+    for element in soup(list(SKIPPED_TAGS)):
+        element.decompose()
+
+    return soup.get_text(separator='\n', strip=True)
+
+
+#html.parser handler that collects the same strings as BeautifulSoup's get_text(strip=True) as the document
+#streams through, keeping only a stack of open tag names instead of a tree. Character references are
+#resolved the way BeautifulSoup's html.parser builder resolves them
+class _StreamingTextParser(HTMLParser):
+    _DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+    _HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.open_tags: List[str] = [] # Open elements, closed the way BeautifulSoup's html.parser builder closes them
+        self.skipping = 0 # Number of open skipped elements
+        self.hiding = 0 # Number of open elements whose strings get_text() leaves out
+        self.closed_void_tags: List[str] = [] # Void elements whose redundant end tag (e.g. </br>) is ignored
+        self.pending: List[str] = [] # Data since the last tag, BeautifulSoup merges it into one string
+        self.strings: List[str] = []
+
+    # A tag, comment or declaration ends the current string
+    def _end_string(self):
+        if self.pending:
+            text = "".join(self.pending).strip()
+            self.pending = []
+            if text:
+                self.strings.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_string()
+        if tag in VOID_TAGS:
+            self.closed_void_tags.append(tag)
+            return
+        self.open_tags.append(tag)
+        self.skipping += tag in SKIPPED_TAGS
+        self.hiding += tag in HIDDEN_STRING_TAGS
+
+    # <tag/> opens and closes in one go, so the only effect is ending the current string
+    def handle_startendtag(self, tag, attrs):
+        self._end_string()
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_void_tags:
+            self.closed_void_tags.remove(tag) # Doesn't even end the current string
+            return
+        self._end_string()
+        if tag not in self.open_tags:
+            return # Stray end tags are ignored
+        # Closing an element also closes everything opened inside it
+        while True:
+            closed = self.open_tags.pop()
+            self.skipping -= closed in SKIPPED_TAGS
+            self.hiding -= closed in HIDDEN_STRING_TAGS
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skipping and not self.hiding:
+            self.pending.append(data)
+
+    def handle_entityref(self, name):
+        # Unknown names are kept as literal text, without the semicolon
+        self.handle_data(EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name) or f"&{name}")
+
+    def handle_charref(self, name):
+        base, pattern = 10, self._DECIMAL_REFERENCE
+        if name.startswith(("x", "X")):
+            name, base, pattern = name[1:], 16, self._HEX_REFERENCE
+
+        try:
+            number, extra_data = int(name, base), ""
+        except ValueError:
+            # A reference without a semicolon: the leading digits are the reference, the rest is text
+            match = pattern.search(name)
+            if match is None:
+                self.handle_data(name)
+                return
+            number, extra_data = int(match.group(1), base), match.group(2)
+
+        self.handle_data(UnicodeDammit.numeric_character_reference(number)[0])
+        self.handle_data(extra_data)
+
+    def handle_comment(self, data):
+        self._end_string()
+
+    def handle_decl(self, decl):
+        self._end_string()
+
+    def handle_pi(self, data):
+        self._end_string()
+
+    def unknown_decl(self, data):
+        self._end_string()
+        # CDATA sections are their own string in BeautifulSoup, and get_text keeps them
+        if data.upper().startswith("CDATA[") and not self.skipping:
+            self.pending.append(data[len("CDATA["):])
+            self._end_string()
+
+
+#streaming backend: same text as the bs4 backend without building a tree
+def stream_html_to_text(html: str) -> str:
+    parser = _StreamingTextParser()
+    parser.feed(html)
+    parser.close()
+    parser._end_string()
+    return "\n".join(parser.strings)
+
+
+#C backend using lxml's parser (optional dependency). libxml2 repairs malformed html differently from
+#html.parser, so text can differ slightly on broken pages
+def lxml_html_to_text(html: str) -> str:
+    try:
+        import lxml.html
+    except ImportError:
+        raise ImportError("The 'lxml' html backend requires the lxml package: pip install lxml")
+
+    if not html.strip():
+        return ""
+    root = lxml.html.document_fromstring(html)
+
+    strings = []
+    stack = [root] # Iterative walk: element text first, then each child followed by its tail
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            text = item.strip()
+            if text:
+                strings.append(text)
+            continue
+
+        if not isinstance(item.tag, str) or item.tag in SKIPPED_TAGS:
+            continue # Comments, processing instructions and skipped elements (their tails are pushed separately)
+
+        for child in reversed(item):
+            if child.tail:
+                stack.append(child.tail)
+            stack.append(child)
+        if item.text:
+            stack.append(item.text)
+
+    return "\n".join(strings)
+
+
+HTML_BACKENDS: Dict[str, Callable[[str], str]] = {
+    "bs4": bs4_html_to_text,
+    "stream": stream_html_to_text,
+    "lxml": lxml_html_to_text,
+}
+
+DEFAULT_HTML_BACKEND = "stream"
+
+#function to look up an html backend by name
+def get_html_backend(name: str) -> Callable[[str], str]:
+    if name not in HTML_BACKENDS:
+        raise ValueError(f"Unknown html backend: {name} (choose from {', '.join(HTML_BACKENDS)})")
+    return HTML_BACKENDS[name]
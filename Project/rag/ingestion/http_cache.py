@@ -0,0 +1,133 @@
+#On-disk HTTP cache for ingested web pages, revalidated with conditional requests
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import sqlite3
+import threading
+import time
+
+
+#hit/miss counters of an HTTPCache
+@dataclass
+class CacheStats:
+    hits: int = 0 # Revalidated with a 304, body served from the cache
+    misses: int = 0 # Full downloads (not cached, or changed on the server)
+    text_hits: int = 0 # Hits that also had the extracted text, so parsing was skipped
+    evictions: int = 0 # Entries dropped to stay under max_bytes
+    size_bytes: int = 0 # Current size of the cached bodies and texts
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+#a cached response, plus the text extracted from it once it has been parsed
+@dataclass
+class CachedPage:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: str
+    text: Optional[str] = None
+
+    # Headers that ask the server to answer 304 if the page hasn't changed
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+#SQLite backed cache keyed by URL, evicting the least recently used pages once max_bytes is exceeded
+class HTTPCache:
+    def __init__(self, path, max_bytes: int = 512 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock() # Fetcher threads share the connection
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT NOT NULL,
+                text TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+        self._db.commit()
+        self.stats.size_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # Look up a page and mark it as recently used
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body, text FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CachedPage(url, *row)
+
+    # Store a freshly downloaded page; pages without an ETag or Last-Modified can't be revalidated so aren't kept
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        if not etag and not last_modified:
+            return
+        self._write(url, etag, last_modified, body, None)
+
+    # Attach the extracted text to a page, as long as the cached body is still the one it was extracted from
+    def store_text(self, page: CachedPage, text: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body FROM pages WHERE url = ?", (page.url,)
+            ).fetchone()
+        if row == (page.etag, page.last_modified, page.body):
+            self._write(page.url, page.etag, page.last_modified, page.body, text)
+
+    def record_hit(self, page: CachedPage):
+        with self._lock:
+            self.stats.hits += 1
+            if page.text is not None:
+                self.stats.text_hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.stats.misses += 1
+
+    def _write(self, url, etag, last_modified, body, text):
+        size = len(body.encode("utf-8")) + (len(text.encode("utf-8")) if text is not None else 0)
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, body, text, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, text, size, time.time())
+            )
+            self.stats.size_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._db.commit()
+
+    # Drop least recently used pages until the cache fits in max_bytes; called with the lock held
+    def _evict(self):
+        while self.stats.size_bytes > self.max_bytes:
+            row = self._db.execute("SELECT url, size FROM pages ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                return
+            self._db.execute("DELETE FROM pages WHERE url = ?", (row[0],))
+            self.stats.size_bytes -= row[1]
+            self.stats.evictions += 1
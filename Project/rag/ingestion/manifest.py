@@ -0,0 +1,107 @@
+#Persistent manifest used to skip sources that have not changed since the last ingestion run
+
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+import hashlib
+import json
+import os
+import uuid
+
+from .dispatcher import is_url
+from .fetching import URLFetcher, get_default_fetcher
+
+
+#function to hash a local file's content without reading it into memory at once
+def file_fingerprint(file_path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return f"sha256:{digest.hexdigest()}"
+
+#function to fingerprint a URL from the validators in its response headers, returns None when the server gives us
+#nothing to compare (or the request failed)
+def headers_fingerprint(headers: Optional[Mapping[str, str]]) -> Optional[str]:
+    if headers is None:
+        return None # Can't tell if it changed, so treat it as changed
+    if headers.get("ETag"):
+        return f"etag:{headers['ETag']}"
+    if headers.get("Last-Modified"):
+        return f"last-modified:{headers['Last-Modified']}"
+    return None
+
+#function to fingerprint a URL with a HEAD request through `fetcher` (defaults to the shared one)
+def url_fingerprint(url, fetcher: Optional[URLFetcher] = None) -> Optional[str]:
+    fetcher = fetcher or get_default_fetcher()
+    return headers_fingerprint(fetcher.head_many([url])[str(url)])
+
+#function to fingerprint any source the dispatcher accepts
+def source_fingerprint(source, fetcher: Optional[URLFetcher] = None) -> Optional[str]:
+    if is_url(str(source)):
+        return url_fingerprint(str(source), fetcher)
+    return file_fingerprint(source)
+
+
+#maps each source to its fingerprint, a stable document ID and the chunk/vector IDs created from it
+class IngestionManifest:
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {} # source -> entry
+        if self.path.exists():
+            self.load()
+
+    # Load the manifest from disk
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.entries = data.get("entries", {})
+
+    # Save the manifest; written to a temp file first so a crash never leaves a half written manifest
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "entries": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, source) -> Optional[Dict]:
+        return self.entries.get(str(source))
+
+    #a source is unchanged only if it was seen before with the same, known fingerprint
+    def is_unchanged(self, source, fingerprint: Optional[str]) -> bool:
+        entry = self.get(source)
+        return fingerprint is not None and entry is not None and entry["fingerprint"] == fingerprint
+
+    #document ID for a source; a modified source keeps its ID so its old chunks can be replaced
+    def document_id(self, source) -> str:
+        entry = self.get(source)
+        return entry["document_id"] if entry else str(uuid.uuid4())
+
+    # Record a successfully ingested source
+    def record(self, source, fingerprint: Optional[str], document_id: str):
+        previous = self.get(source) or {}
+        self.entries[str(source)] = {
+            "fingerprint": fingerprint,
+            "document_id": document_id,
+            # Keep the previous IDs until the caller replaces them, so stale vectors can still be found
+            "chunk_ids": previous.get("chunk_ids", []),
+            "vector_ids": previous.get("vector_ids", [])
+        }
+
+    # Record the chunk and vector IDs created for a source once it has been chunked and indexed
+    def set_chunks(self, source, chunk_ids: List, vector_ids: Optional[List] = None):
+        entry = self.entries[str(source)]
+        entry["chunk_ids"] = list(chunk_ids)
+        entry["vector_ids"] = list(vector_ids or [])
+
+    # Remove a source, returning its entry so the caller can delete its vectors
+    def remove(self, source) -> Optional[Dict]:
+        return self.entries.pop(str(source), None)
+
+    # Sources in the manifest that are not in `sources` (deleted or moved since the last run)
+    def missing_sources(self, sources) -> List[str]:
+        current = {str(s) for s in sources}
+        return [source for source in self.entries if source not in current]
@@ -0,0 +1,60 @@
+#PDF text extraction, split into page ranges across worker processes for very large documents
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pypdf import PdfReader
+from typing import Iterator, List, Optional, Tuple
+
+import math
+import os
+
+PARALLEL_MIN_PAGES = 200 # Below this many pages, starting worker processes costs more than it saves
+MIN_PAGES_PER_RANGE = 25 # Every range re-opens the PDF in its worker, so ranges shouldn't be too small
+RANGES_PER_WORKER = 2 # More ranges than workers, so a few slow pages don't leave the other workers idle
+
+
+#function to count the pages of a pdf without extracting anything
+def pdf_page_count(path) -> int:
+    return len(PdfReader(path).pages)
+
+#function to decide whether a pdf is large enough to be extracted in parallel
+def should_split(page_count: int, workers: int, min_pages: int = PARALLEL_MIN_PAGES) -> bool:
+    return workers > 1 and page_count >= min_pages
+
+#function to split `page_count` pages into contiguous (start, stop) ranges for `workers` processes
+def page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    size = max(MIN_PAGES_PER_RANGE, math.ceil(page_count / (workers * RANGES_PER_WORKER)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+#function run inside a worker process: the text of pages [start, stop), "" for pages without text
+def extract_page_range(path, start: int, stop: int) -> List[str]:
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+#function to yield the text of each page in order. Large pdfs are split into page ranges that are extracted
+#concurrently in a process pool and put back in order; small ones (or workers=1) are read in this process.
+#At most `workers` ranges are in flight, and a range is released once its pages are yielded, so memory is
+#bounded by a few ranges rather than the whole document
+def iter_pdf_pages(path, workers: Optional[int] = None, min_pages: int = PARALLEL_MIN_PAGES) -> Iterator[str]:
+    workers = workers or os.cpu_count() or 1
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+
+    if not should_split(page_count, workers, min_pages):
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    del reader # Each worker opens its own reader
+    ranges = page_ranges(page_count, workers)
+    workers = min(workers, len(ranges))
+    pending = iter(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(executor.submit(extract_page_range, path, *page_range) for page_range in islice(pending, workers))
+        while in_flight:
+            pages = in_flight.popleft().result() # Ranges come back in page order whatever order they finish in
+            for page_range in islice(pending, 1): # Refill the slot before yielding, so workers stay busy
+                in_flight.append(executor.submit(extract_page_range, path, *page_range))
+            yield from pages
+            del pages
@@ -1,69 +1,184 @@
-from pypdf import PdfReader
-from docx import Document
-from bs4 import BeautifulSoup # HTML parsing
 from datetime import datetime, timezone
 
-import re # Regular expressions for text cleaning
 import uuid 
-import requests # For fetching HTML content from URLs
+
+from .docx_extraction import open_docx
+from .fetching import get_default_fetcher
+from .pdf_extraction import iter_pdf_pages
+from .html_extraction import DEFAULT_HTML_BACKEND, get_html_backend
+from .cleaning import (
+    DEFAULT_CLEANER, PAGE_NUMBER_PATTERN, TIMESTAMP_PATTERN, FILE_PATH_PATTERN,
+    TRACKING_ID_PATTERN, WHITESPACE_SPLIT_PATTERN
+)
 
 
 #function to extract text from each page in the pdf document 
 #or return an empty string if nothing is returned
-def extract_pdf_text(path):
-    reader = PdfReader(path)    
-    return "\n".join(page.extract_text() or "" for page in reader.pages)
+def extract_pdf_text(path, workers=None):
+    return "".join(iter_pdf_text(path, workers))
+
+#function to yield the text of the pdf one page at a time, with "\n" separators between pages,
+#so joining the pieces gives exactly extract_pdf_text(path).
+#Very large pdfs are extracted in parallel page ranges across `workers` processes (see pdf_extraction.py)
+def iter_pdf_text(path, workers=None):
+    for page_number, page_text in enumerate(iter_pdf_pages(path, workers)):
+        if page_number:
+            yield "\n"
+        yield page_text
 
 #function to extract text from the each paragraph in the html document 
 def extract_docx_text(path):
-    doc = Document(path)
-    return "\n".join(para.text for para in doc.paragraphs)
+    return "".join(iter_docx_text(path))
+
+#function to yield the text of each paragraph in the docx document, with "\n" separators.
+#document.xml is parsed incrementally straight from the zip, giving the same text as python-docx's paragraphs
+def iter_docx_text(path):
+    yield from open_docx(path)[1]
 
 #function to extract text from html content
-def extract_html_text(file_path):
-    # Fetch HTML content from the URL and handle potential request errors
-    try:
-        response = requests.get(file_path, timeout=10) # Fetch HTML content from URL with 10s timeout
-        response.raise_for_status() # Raise an exception for bad status codes (4xx, 5xx)
-        html = response.text # Get HTML content
-    except requests.exceptions.ConnectionError:
-        raise Exception(f"Connection failed: Unable to reach {file_path}")
-    except requests.exceptions.Timeout:
-        raise Exception(f"Request timeout: {file_path} took too long to respond")
-    except requests.exceptions.HTTPError as e:
-        raise Exception(f"HTTP error: {e}")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Request failed: {e}")
-    
-    # Parse HTML and extract text    
-    soup = BeautifulSoup(html, 'html.parser')
-
-    # Remove scripts, styles, nac & footer
-    for element in soup(['script', 'style', 'nav', 'footer']):
-        element.decompose()
-
-    return soup.get_text(separator='\n', strip=True)
+#URLs are fetched through a pooled URLFetcher (the shared default one unless a fetcher is passed in)
+def extract_html_text(file_path, fetcher=None):
+    # Fetch HTML content from the URL, errors are raised with the same messages as a plain requests.get().
+    # With an HTTP cache, unchanged pages come back as the text parsed last time and skip parsing
+    return (fetcher or get_default_fetcher()).fetch_text(file_path, html_to_text)
+
+#function to extract the visible text from an html document that has already been fetched.
+#Scripts, styles, nav & footer are dropped; `backend` picks the parser (see html_extraction.HTML_BACKENDS)
+def html_to_text(html, backend=DEFAULT_HTML_BACKEND):
+    return get_html_backend(backend)(html)
 
 #function to clean the extracted text
 # Removes things like Page numbers, Headers/footers, Timestamps, File paths, Tracking IDs
 def clean_extracted_text(text):
-    if not text:
-        return ""
-     
-    cleaned_text = re.sub(r'Page \d+ of \d+', '', text)  # Remove page numbers
-    cleaned_text = re.sub(r'Header:.*\n', '', cleaned_text)  # Remove headers
-    cleaned_text = re.sub(r'Footer:.*\n', '', cleaned_text)  # Remove footers
-    cleaned_text = re.sub(r'\d{1,2}/\d{1,2}/\d{2,4} \d{1,2}:\d{2} (AM|PM)?', '', cleaned_text)  # Remove timestamps
-    cleaned_text = re.sub(r'([a-zA-Z]:)?(\\[a-zA-Z0-9_.-]+)+\\?', '', cleaned_text)  # Remove file paths
-    cleaned_text = re.sub(r'Tracking ID: \w+', '', cleaned_text)  # Remove tracking IDs
-    cleaned_text = re.sub(r'\n{2,}', '\n', cleaned_text)  # Remove extra newlines
-    cleaned_text = re.sub(r"\s{2,}", " ", cleaned_text)   # Remove extra spaces
-    return cleaned_text.strip()
+    return DEFAULT_CLEANER.clean(text)
+
+#function to split a stream of text pieces into lines, each keeping its "\n" (the last one may not have it)
+def _iter_lines(pieces):
+    partial = ""
+    for piece in pieces:
+        lines = (partial + piece).split("\n")
+        partial = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if partial:
+        yield partial
+
+#function to drop everything from `marker` to the end of the line, joining the line with the next one.
+#Matches re.sub(marker + '.*\\n', '', text): only lines that end in "\n" are touched
+def _iter_remove_to_line_end(lines, marker):
+    carried = ""
+    for line in lines:
+        position = line.find(marker) if line.endswith("\n") else -1
+        if position == -1:
+            yield carried + line
+            carried = ""
+        else:
+            carried += line[:position]
+    if carried:
+        yield carried
+
+#function to collapse whitespace across line boundaries the same way as the two whitespace passes + strip()
+def _iter_collapse_whitespace(lines):
+    started = False # Leading whitespace is dropped, like strip()
+    run_length, run_first, run_all_newlines = 0, "", True # The whitespace run waiting to be written
+
+    for line in lines:
+        for part in WHITESPACE_SPLIT_PATTERN.split(line):
+            if not part:
+                continue
+            if part[0].isspace():
+                if not run_length:
+                    run_first = part[0]
+                run_length += len(part)
+                run_all_newlines = run_all_newlines and part.count("\n") == len(part)
+                continue
+
+            if started and run_length:
+                # A run of only newlines becomes one newline, any other run of 2+ becomes a space
+                if run_length == 1:
+                    yield run_first
+                else:
+                    yield "\n" if run_all_newlines else " "
+            yield part
+            started = True
+            run_length, run_first, run_all_newlines = 0, "", True
+    # Trailing whitespace is never written, like strip()
+
+#function to clean a stream of text pieces (e.g. pdf pages) without joining them into one string.
+#Joining the yielded pieces gives exactly clean_extracted_text("".join(pieces)); memory is bounded by the longest line
+def iter_clean_extracted_text(pieces):
+    # Page numbers never span lines, so they can be removed line by line
+    lines = (PAGE_NUMBER_PATTERN.sub('', line) for line in _iter_lines(pieces))
+
+    # Header/footer removal eats the newline, so removed lines are joined onto the next one
+    # before the following passes run, just like the whole-string passes
+    lines = _iter_remove_to_line_end(lines, "Header:")
+    lines = _iter_remove_to_line_end(lines, "Footer:")
+
+    lines = (TIMESTAMP_PATTERN.sub('', line) for line in lines)
+    lines = (FILE_PATH_PATTERN.sub('', line) for line in lines)
+    lines = (TRACKING_ID_PATTERN.sub('', line) for line in lines)
+
+    yield from _iter_collapse_whitespace(lines)
+
+#function to clean one line the way clean_extracted_text would inside a longer text, when neither it nor the lines
+#before it hold a header / footer marker (they are the only rules that join lines); None when this line does
+def _clean_plain_line(line):
+    line = PAGE_NUMBER_PATTERN.sub('', line)
+    if "Header:" in line or "Footer:" in line:
+        return None
+    line = TIMESTAMP_PATTERN.sub('', line)
+    line = FILE_PATH_PATTERN.sub('', line)
+    return TRACKING_ID_PATTERN.sub('', line)
+
+#function to tell if cleaning can be cut before lines[j]: none of the lines around it joins the next (no header or
+#footer markers in lines[j-3:j+1]) and the whitespace between lines[j-1] and lines[j] is only their "\n", so
+#clean_extracted_text of the text around the cut is the cleaned text before it, "\n", and the cleaned text after it
+def _is_clean_cut(lines, j):
+    around = [_clean_plain_line(line) for line in lines[j - 3:j + 1]]
+    if None in around:
+        return False
+    before, after = around[2], around[3]
+    return bool(before) and not before[-1].isspace() and bool(after) and not after[0].isspace()
+
+#function run in the worker extracting a range of a split pdf (its pages joined with "\n"): cleans everything
+#between the first and last line where cleaning can be cut, leaving the raw lines before and after them for
+#join_clean_page_ranges to clean with the neighbouring ranges. Returns (head, body, tail), tail None without a cut
+def clean_page_range(text):
+    lines = text.split("\n")
+    candidates = range(3, len(lines) - 1) # lines[j] must end in "\n" and have 3 lines before it in this range
+    first = next((j for j in candidates if _is_clean_cut(lines, j)), None)
+    if first is None:
+        return text, None, None
+    last = next(j for j in reversed(candidates) if _is_clean_cut(lines, j))
+
+    offsets = [0]
+    for line in lines[:last]:
+        offsets.append(offsets[-1] + len(line) + 1)
+    start, stop = offsets[first], offsets[last]
+    return text[:start], clean_extracted_text(text[start:stop]), text[stop:]
+
+#function to put back the (head, body, tail) of each range of a pdf from clean_page_range, in page order: the raw
+#lines at each seam between ranges are cleaned here, a few per range. Gives exactly clean_extracted_text of the
+#ranges joined with "\n"
+def join_clean_page_ranges(ranges):
+    pieces, pending = [], [] # Cleaned text so far, raw text since the last cut
+    for head, body, tail in ranges:
+        pending.append(head)
+        if tail is None:
+            continue
+        pieces.append(clean_extracted_text("\n".join(pending)))
+        if body:
+            pieces.append(body)
+        pending = [tail]
+    pieces.append(clean_extracted_text("\n".join(pending)))
+    return "\n".join(pieces)
 
 #function to normalize document with cleaned extracted text
-def normalize_document(extracted):
+#a stable document_id (e.g. from the ingestion manifest) can be passed in, otherwise a new one is generated
+def normalize_document(extracted, document_id=None):
     return { 
-        "id": str(uuid.uuid4()), # Unique identifier for the document
+        "id": document_id or str(uuid.uuid4()), # Unique identifier for the document
         "text": extracted["text"].strip(), # Cleaned and normalized text content
         "file_name": extracted["metadata"]["file_name"], #human readable file name
         "source": extracted["metadata"]["source_type"], # Original source of the document
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import List
 
+import numpy as np
+
 class EmbeddingModel(ABC):
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
@@ -10,6 +12,20 @@ class EmbeddingModel(ABC):
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         pass
 
+    # Embed texts as a contiguous (len(texts), dim) float32 array (what the vector database adds);
+    # models that produce arrays should override this so no Python lists are built
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.asarray(self.embed_batch(texts), dtype=np.float32)
+        return np.ascontiguousarray(embeddings.reshape(len(texts), -1))
+
+    # Embed a search query as a float32 vector (what the vector database searches with)
+    def embed_query(self, text: str) -> np.ndarray:
+        return np.asarray(self.embed_text(text), dtype=np.float32)
+
+    # Embed several search queries as a (len(texts), dim) float32 array
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        return self.embed_array(texts)
+
 
 class GenerationModel(ABC):
     @abstractmethod
@@ -0,0 +1,266 @@
+#Caches of embeddings: a two tier (memory LRU + SQLite) cache of chunk embeddings keyed by model and text hash,
+#and a small in-memory LRU/TTL cache of query embeddings
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+#hit/miss counters of an EmbeddingCache
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0 # Served from the in-memory LRU
+    disk_hits: int = 0 # Served from the SQLite store (and promoted to memory)
+    misses: int = 0 # Not cached, had to be encoded
+    memory_evictions: int = 0 # Entries dropped from memory to stay under memory_entries
+    disk_evictions: int = 0 # Entries dropped from disk to stay under max_bytes
+    size_bytes: int = 0 # Current size of the vectors on disk
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+#hit/miss counters of a QueryEmbeddingCache
+@dataclass
+class QueryCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0 # Entries dropped to stay under max_entries
+    expirations: int = 0 # Entries found older than ttl_seconds
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+#function to normalize a text before hashing it: whitespace runs are collapsed and the ends stripped, which
+#doesn't change what a whitespace pre-tokenizing model (like the default MiniLM) sees
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+#function to build the cache key of a text for a model
+def cache_key(model_name: str, text: str) -> Tuple[str, str]:
+    return model_name, hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+#caches float32 vectors per (model name, text hash). Lookups check memory first, then disk; path=None keeps
+#the cache in memory only. Both tiers evict the least recently used entries once they are full
+class EmbeddingCache:
+    def __init__(
+        self,
+        path=None, # SQLite file for the disk tier, None for a memory only cache
+        memory_entries: int = 50_000, # Most vectors kept in memory
+        max_bytes: int = 1024 * 1024 * 1024 # Most vector bytes kept on disk
+    ):
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.stats = EmbeddingCacheStats()
+        self._memory: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+            self._db.commit()
+            self.stats.size_bytes = self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    # Look up the vectors of many texts, None where a text isn't cached
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        keys = [cache_key(model_name, text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(keys)
+
+        with self._lock:
+            on_disk: Dict[Tuple[str, str], List[int]] = {} # Keys missing from memory -> positions
+            for position, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[position] = vector
+                    self.stats.memory_hits += 1
+                else:
+                    on_disk.setdefault(key, []).append(position)
+
+            found = self._read_disk(model_name, [text_hash for _, text_hash in on_disk]) if on_disk else {}
+            for key, positions in on_disk.items():
+                vector = found.get(key[1])
+                if vector is None:
+                    self.stats.misses += len(positions)
+                    continue
+                self._remember(key, vector)
+                self.stats.disk_hits += len(positions)
+                for position in positions:
+                    vectors[position] = vector
+
+        return vectors
+
+    # Store the vectors of freshly encoded texts in both tiers
+    def put_many(self, model_name: str, texts: Sequence[str], vectors: Sequence[np.ndarray]):
+        rows = {}
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model_name, text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows[key[1]] = vector.tobytes()
+
+            if self._db is not None and rows:
+                self._write_disk(model_name, rows)
+
+    # Add to the memory tier, dropping the least recently used entries beyond memory_entries; lock held
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.memory_evictions += 1
+
+    # Read many vectors from disk and mark them as recently used; lock held
+    def _read_disk(self, model_name: str, text_hashes: List[str]) -> Dict[str, np.ndarray]:
+        if self._db is None:
+            return {}
+
+        found = {}
+        for start in range(0, len(text_hashes), 500): # Stay under SQLite's limit of bound parameters
+            batch = text_hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                (model_name, *batch)
+            ).fetchall()
+            found.update((text_hash, np.frombuffer(vector, dtype=np.float32)) for text_hash, vector in rows)
+
+        if found:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                [(now, model_name, text_hash) for text_hash in found]
+            )
+            self._db.commit()
+        return found
+
+    # Write many vectors in one transaction, then evict down to max_bytes; lock held
+    def _write_disk(self, model_name: str, rows: Dict[str, bytes]):
+        now = time.time()
+        text_hashes = list(rows)
+        for start in range(0, len(text_hashes), 500):
+            batch = text_hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            previous = self._db.execute(
+                f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                (model_name, *batch)
+            ).fetchone()[0]
+            self.stats.size_bytes -= previous
+
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+            [(model_name, text_hash, vector, now) for text_hash, vector in rows.items()]
+        )
+        self.stats.size_bytes += sum(len(vector) for vector in rows.values())
+        self._evict()
+        self._db.commit()
+
+    # Drop least recently used vectors until the disk tier fits in max_bytes; lock held
+    def _evict(self):
+        while self.stats.size_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                return
+            for model_name, text_hash, size in rows:
+                if self.stats.size_bytes <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", (model_name, text_hash))
+                self.stats.size_bytes -= size
+                self.stats.disk_evictions += 1
+
+
+#bounded LRU cache of query embeddings with an optional time to live, kept per EmbeddingService (so the model is
+#implied). Vectors are stored read-only and handed out as they are, a hit is a dict lookup
+class QueryEmbeddingCache:
+    def __init__(
+        self,
+        max_entries: int = 4096, # Most queries kept
+        ttl_seconds: Optional[float] = 3600 # Age after which a query is embedded again, None to keep until evicted
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = QueryCacheStats()
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict() # text -> (vector, expiry time)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Cached vector of a query, or None
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = normalize_text(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    # Store the vector of a query, dropping the least recently used queries beyond max_entries
+    def put(self, query: str, vector: np.ndarray):
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        vector.flags.writeable = False # Shared by every caller that hits
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        key = normalize_text(query)
+
+        with self._lock:
+            self._entries[key] = (vector, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,72 @@
+#Pool of worker processes that each load the embedding model once and encode shards of large batches
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Optional
+
+import math
+import os
+
+import numpy as np
+
+_worker_service = None # The embedding service of a worker process, loaded by _init_worker
+
+
+#function run once in every worker process: pins its threads, then loads the model (without caches or a pool)
+def _init_worker(backend: str, model_path: str, threads: int):
+    global _worker_service
+    import torch
+    from .embeddings import create_embedding_service
+
+    torch.set_num_threads(threads)
+    kwargs = {"threads": threads} if backend != "torch" else {} # ONNX Runtime sizes its own thread pool
+    _worker_service = create_embedding_service(backend, model_path, **kwargs)
+    _worker_service.show_progress_bar = False
+
+#function run in a worker process to encode one shard
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return _worker_service._encode_local(texts)
+
+
+#shards batches over `workers` processes with `threads_per_worker` threads each (by default the cores are
+#split evenly), and returns the embeddings in input order. Use it as a context manager or call close()
+class EmbeddingPool:
+    def __init__(
+        self,
+        backend: str = "torch", # Backend name, see create_embedding_service
+        model_path: str = "all-MiniLM-L6-v2", # Model name or local path (export directory for the ONNX backends)
+        workers: Optional[int] = None, # Worker processes, all cores by default
+        threads_per_worker: Optional[int] = None, # Intra-op threads per worker, cores // workers by default
+        shards_per_worker: int = 4 # Shards per worker per batch, so uneven texts still balance
+    ):
+        cores = os.cpu_count() or 1
+        self.workers = workers or cores
+        self.threads_per_worker = threads_per_worker or max(1, cores // self.workers)
+        self.shards_per_worker = shards_per_worker
+
+        # Spawned rather than forked: forking a process that already runs torch's thread pools can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend, model_path, self.threads_per_worker)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    # Encode texts across the workers; contiguous shards keep the rows in input order
+    def encode(self, texts: List[str]) -> np.ndarray:
+        shard_size = max(1, math.ceil(len(texts) / (self.workers * self.shards_per_worker)))
+        shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+        return np.concatenate(list(self._executor.map(_encode_shard, shards)))
+
+    # Load the model in every worker now instead of on the first batch
+    def warm_up(self):
+        list(self._executor.map(_encode_shard, [["warm up"]] * self.workers))
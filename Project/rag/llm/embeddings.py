@@ -1,10 +1,78 @@
 from sentence_transformers import SentenceTransformer
-from typing import List
+from tqdm.auto import tqdm
+from typing import List, Optional
 from .base import EmbeddingModel
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache, normalize_text
+from .embedding_pool import EmbeddingPool
+from .length_batching import PaddingStats, token_budget_batches
+
+import numpy as np
+import torch
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+#function to get the dimension of a SentenceTransformer's embeddings
+def embedding_dimension(model: SentenceTransformer) -> int:
+    get_dimension = getattr(model, "get_embedding_dimension", None) # Renamed in sentence-transformers v6
+    return get_dimension() if get_dimension else model.get_sentence_embedding_dimension()
+
+#function to build the embedding backend named by `backend`: "torch" runs the SentenceTransformer `model_name`,
+#"onnx" / "onnx-int8" run the (int8 quantized) graph in the directory export_onnx wrote to `model_name`.
+#Other keyword arguments (cache, query_cache, ...) go to the service
+def create_embedding_service(backend: str = "torch", model_name: str = "all-MiniLM-L6-v2", **kwargs) -> "EmbeddingService":
+    if backend == "torch":
+        return EmbeddingService(model_name, **kwargs)
+    if backend in ("onnx", "onnx-int8"):
+        from .onnx_embeddings import ONNXEmbeddingService
+        return ONNXEmbeddingService(model_name, quantized=backend == "onnx-int8", **kwargs)
+    raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+
 
 class EmbeddingService(EmbeddingModel):
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None
+    ):
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self._init_state("torch", model_name, model_name, cache, query_cache)
+
+    # State shared by every backend (caches, batching, pool mode); backends set their model, then call this
+    def _init_state(
+        self,
+        backend: str,
+        model_path: str,
+        cache_name: str,
+        cache: Optional[EmbeddingCache] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        max_batch_tokens: int = 4096
+    ):
+        self.cache = cache # Texts embedded before are served from here instead of being encoded again
+        self.cache_name = cache_name # Cache key of this model and backend, whose vectors differ slightly from other backends'
+        self.query_cache = query_cache # Repeated search queries are served from here
+        self.backend, self.model_path = backend, model_path # What pool workers load
+        self.show_progress_bar = True
+        self.pool: Optional[EmbeddingPool] = None
+        self.pool_min_texts = 0
+        self.max_batch_tokens = max_batch_tokens # Token budget of a batch (texts x longest text), see token_budget_batches
+        self.max_batch_size = 256
+        self.padding_stats = PaddingStats() # Real against padded tokens of every batch encoded so far
+
+    # Pool mode: batches of at least `min_texts` texts are sharded over worker processes, each loading the model
+    # once with its threads pinned (see EmbeddingPool); smaller batches stay in this process
+    def start_pool(self, workers: Optional[int] = None, threads_per_worker: Optional[int] = None, min_texts: int = 512) -> EmbeddingPool:
+        self.stop_pool()
+        self.pool = EmbeddingPool(self.backend, self.model_path, workers, threads_per_worker)
+        self.pool_min_texts = min_texts
+        return self.pool
+
+    def stop_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
 
     #get the tokenizer from the model
     def tokenizer(self):
@@ -12,20 +80,122 @@ class EmbeddingService(EmbeddingModel):
 
     # Get the dimension of the embeddings produced by the model
     def get_embedding_dimension(self) -> int:
-        return self.model.get_sentence_embedding_dimension()
+        return embedding_dimension(self.model)
 
     # Embed a single text string
     def embed_text(self, text: str) -> List[float]:
-        embedding = self.model.encode(text, normalize_embeddings=True)
-        return embedding.tolist()
+        return self.embed_query(text).tolist()
+
+    # Embed a search query as a float32 vector, served from the query cache when it was seen recently
+    def embed_query(self, text: str) -> np.ndarray:
+        if self.query_cache is not None:
+            embedding = self.query_cache.get(text)
+            if embedding is not None:
+                return embedding
+
+        embedding = self._encode_one(text)
+        if self.query_cache is not None:
+            self.query_cache.put(text, embedding)
+        return embedding
+
+    # Embed several search queries in one encoder call into a (len(texts), dim) float32 array; with a query
+    # cache only the queries it misses are encoded (each once), and they are cached for embed_query too
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        if self.query_cache is None:
+            return self.embed_array(texts)
+
+        output = np.empty((len(texts), self.get_embedding_dimension()), dtype=np.float32)
+        missing = {} # normalized query -> rows it fills
+        for row, text in enumerate(texts):
+            embedding = self.query_cache.get(text)
+            if embedding is None:
+                missing.setdefault(normalize_text(text), []).append(row)
+            else:
+                output[row] = embedding
+
+        if missing:
+            queries = [texts[rows[0]] for rows in missing.values()]
+            for query, rows, embedding in zip(queries, missing.values(), self._encode(queries)):
+                output[rows] = embedding
+                self.query_cache.put(query, embedding)
+        return output
+
+    # Single text fast path: one forward pass without encode()'s batching, sorting and progress bar,
+    # giving the same vector as encode(text, normalize_embeddings=True)
+    def _encode_one(self, text: str) -> np.ndarray:
+        return self._encode_batch([text])[0]
     
-    # Embed a batch of text strings
+    # Embed a batch of text strings (as lists, for callers that want Python floats)
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        embeddings = self.model.encode(
-            texts,
-            normalize_embeddings=True,
-            batch_size=32,
-            show_progress_bar=True
-        )
-        return embeddings.tolist()
+        return self.embed_array(texts).tolist()
+
+    # Embed a batch of text strings into a contiguous float32 array, row i being texts[i];
+    # with a cache only the texts it misses are encoded (each once)
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.get_embedding_dimension()), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts)
+
+        embeddings = self.cache.get_many(self.cache_name, texts)
+        missing = {} # normalized text -> first text with that cache key, so duplicates are encoded once
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                missing.setdefault(normalize_text(text), text)
+
+        encoded = {}
+        if missing:
+            encoded = dict(zip(missing, self._encode(list(missing.values()))))
+            self.cache.put_many(self.cache_name, list(missing.values()), list(encoded.values()))
+
+        # Hits and fresh rows are copied straight into the output, in input order
+        output = np.empty((len(texts), self.get_embedding_dimension()), dtype=np.float32)
+        for row, (text, embedding) in enumerate(zip(texts, embeddings)):
+            output[row] = encoded[normalize_text(text)] if embedding is None else embedding
+        return output
+
+    # Encode texts into normalized vectors, on the pool when it is started and the batch is large enough
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self.pool is not None and texts and len(texts) >= self.pool_min_texts:
+            return self.pool.encode(texts)
+        return self._encode_local(texts)
+
+    # Encode texts in this process: texts are sorted by tokenized length and cut into batches against the
+    # token budget, so each batch pads to a similar length; rows are written back in input order
+    def _encode_local(self, texts: List[str]) -> np.ndarray:
+        output = np.empty((len(texts), self.get_embedding_dimension()), dtype=np.float32)
+        if not texts:
+            return output
+
+        lengths = self._token_lengths(texts)
+        batches = token_budget_batches(lengths, self.max_batch_tokens, self.max_batch_size)
+        for batch in tqdm(batches, desc="Batches", disable=not self.show_progress_bar or len(batches) == 1):
+            output[batch] = self._encode_batch([texts[index] for index in batch])
+            self.padding_stats.add([lengths[index] for index in batch])
+        return output
+
+    # Tokenized length of every text as the model sees it (special tokens included, truncated to max_seq_length)
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        return self.model.tokenizer(
+            [text.strip() for text in texts], # Stripped like SentenceTransformer
+            truncation=True,
+            max_length=self.model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            return_length=True
+        )["length"]
+
+    # Encode one batch with a single forward pass
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        if self.model.default_prompt_name or getattr(self.model, "truncate_dim", None):
+            # Prompts and truncation are applied by encode()
+            return self.model.encode(texts, normalize_embeddings=True, batch_size=len(texts), show_progress_bar=False)
 
+        preprocess = getattr(self.model, "preprocess", None) or self.model.tokenize # tokenize() before v6
+        features = {
+            name: value.to(self.model.device)
+            for name, value in preprocess(texts).items() if isinstance(value, torch.Tensor)
+        }
+        with torch.inference_mode():
+            embeddings = self.model(features)["sentence_embedding"]
+        return torch.nn.functional.normalize(embeddings, p=2, dim=1).float().cpu().numpy()
@@ -0,0 +1,47 @@
+#Groups texts of similar tokenized length into batches sized by a token budget instead of a fixed count
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+
+#tokens a model actually ran on against the real tokens of the texts
+@dataclass
+class PaddingStats:
+    batches: int = 0
+    texts: int = 0
+    real_tokens: int = 0 # Tokens of the texts (special tokens included, after truncation)
+    padded_tokens: int = 0 # Batch size x longest text of the batch, summed over batches
+
+    @property
+    def waste(self) -> float:
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+    def add(self, lengths: Sequence[int]):
+        self.batches += 1
+        self.texts += len(lengths)
+        self.real_tokens += int(sum(lengths))
+        self.padded_tokens += len(lengths) * int(max(lengths))
+
+
+#function to cut texts into batches (arrays of indices into `lengths`) from the longest to the shortest text:
+#a batch grows while (texts x its longest text) fits in max_batch_tokens and it has at most max_batch_size texts,
+#so long texts go in small batches, short ones in large batches, and each batch pads to a similar length
+def token_budget_batches(lengths: Sequence[int], max_batch_tokens: int = 4096, max_batch_size: int = 256) -> List[np.ndarray]:
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind="stable") # Longest first: a batch pads to its first text
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = min(max(max_batch_tokens // longest, 1), max_batch_size)
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+#function giving the padding of fixed size batches in arrival order, for comparison
+def fixed_batch_padding(lengths: Sequence[int], batch_size: int = 32) -> PaddingStats:
+    stats = PaddingStats()
+    for start in range(0, len(lengths), batch_size):
+        stats.add(lengths[start:start + batch_size])
+    return stats
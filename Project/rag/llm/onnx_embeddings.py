@@ -0,0 +1,162 @@
+#Embedding backend running an exported ONNX graph of a sentence transformer on ONNX Runtime (CPU),
+#optionally with int8 dynamically quantized weights. Everything is loaded from a local directory
+
+from pathlib import Path
+from typing import List, Optional
+
+from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
+from .base import EmbeddingModel
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from .embeddings import EmbeddingService, embedding_dimension
+
+import json
+import numpy as np
+import torch
+
+ONNX_FILE = "model.onnx"
+QUANTIZED_FILE = "model_int8.onnx"
+CONFIG_FILE = "embedding_config.json"
+
+# Fixed corpus the backends are compared on
+AGREEMENT_CORPUS = [
+    "The supplier shall indemnify the buyer against all third party claims.",
+    "Quarterly revenue grew 12% while operating margin declined.",
+    "Either party may terminate this agreement with 30 days written notice.",
+    "Liability is capped at the fees paid in the twelve months preceding the claim.",
+    "The board approved the acquisition subject to regulatory review.",
+    "Customer data must be encrypted at rest and in transit.",
+    "Late payments accrue interest at 1.5% per month.",
+    "Reset my password",
+    "I forgot my login credentials",
+    "The sky is blue",
+    "Force majeure events include natural disasters, war and pandemics.",
+    "Counterparty credit risk increased after the rating downgrade.",
+    "This document is confidential and intended for internal risk review only.",
+    "The warranty period is two years from the date of delivery.",
+    "Net income for fiscal year 2024 was $4.2 million.",
+    "a"
+]
+
+
+#the sentence transformer as one graph: token ids in, pooled and L2-normalized sentence embeddings out
+class _SentenceEmbeddingGraph(torch.nn.Module):
+    def __init__(self, model: SentenceTransformer, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        embeddings = self.model(dict(zip(self.input_names, inputs)))["sentence_embedding"]
+        return torch.nn.functional.normalize(embeddings, p=2, dim=1)
+
+#function to export a sentence transformer (hub name or local path) into `output_dir`: the ONNX graph, its int8
+#dynamically quantized copy, the tokenizer files and a small config, all ONNXEmbeddingService needs offline
+def export_onnx(model_name: str, output_dir, quantize: bool = True, opset: int = 17) -> Path:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu").eval()
+    tokenizer = model.tokenizer
+    input_names = list(tokenizer.model_input_names)
+    sample = tokenizer(["Sample text", "Another sample text"], padding=True, return_tensors="pt")
+
+    with torch.inference_mode():
+        torch.onnx.export(
+            _SentenceEmbeddingGraph(model, input_names),
+            tuple(sample[name] for name in input_names),
+            str(output_dir / ONNX_FILE),
+            input_names=input_names,
+            output_names=["sentence_embedding"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "sentence_embedding": {0: "batch"}},
+            opset_version=opset,
+            dynamo=False
+        )
+
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        "source_model": model_name,
+        "dimension": embedding_dimension(model),
+        "max_seq_length": model.max_seq_length
+    }
+    (output_dir / CONFIG_FILE).write_text(json.dumps(config, indent=2))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(output_dir / ONNX_FILE), str(output_dir / QUANTIZED_FILE), weight_type=QuantType.QInt8)
+    return output_dir
+
+
+#EmbeddingService running a directory written by export_onnx on ONNX Runtime's CPU provider; the caches,
+#embed_batch and embed_text behave as with the PyTorch model
+class ONNXEmbeddingService(EmbeddingService):
+    def __init__(
+        self,
+        model_dir, # Directory written by export_onnx
+        quantized: bool = False, # Run the int8 quantized graph
+        cache: Optional[EmbeddingCache] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        max_batch_tokens: int = 4096, # Token budget of an inference call (texts x longest text)
+        threads: Optional[int] = None # ONNX Runtime intra-op threads, None for its default (all cores)
+    ):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The ONNX embedding backend requires the onnxruntime package: pip install onnxruntime")
+
+        model_dir = Path(model_dir)
+        config = json.loads((model_dir / CONFIG_FILE).read_text())
+        self.model_name = config["source_model"] # Same vectors as the source model, so saved databases are compatible
+        self.model = None
+        self.dimension = config["dimension"]
+        self.max_seq_length = config["max_seq_length"]
+        backend = "onnx-int8" if quantized else "onnx"
+        self._init_state(backend, str(model_dir), f"{self.model_name}:{backend}", cache, query_cache, max_batch_tokens)
+        self.show_progress_bar = False
+
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / (QUANTIZED_FILE if quantized else ONNX_FILE)), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+
+    def tokenizer(self):
+        return self._tokenizer
+
+    def get_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        return self._tokenizer(
+            [text.strip() for text in texts],
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            return_length=True
+        )["length"]
+
+    # Run the graph on one batch; the graph already pools and normalizes
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        batch = [text.strip() for text in texts] # Stripped like SentenceTransformer
+        encoded = self._tokenizer(batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+        features = {name: encoded[name].astype(np.int64, copy=False) for name in self._input_names}
+        return self.session.run(None, features)[0]
+
+
+#function giving the cosine similarity between two backends' embeddings of each text of `texts`
+def cosine_agreement(reference: EmbeddingModel, candidate: EmbeddingModel, texts: List[str] = AGREEMENT_CORPUS) -> np.ndarray:
+    expected = reference.embed_array(texts)
+    actual = candidate.embed_array(texts)
+    return np.sum(expected * actual, axis=1) / (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+
+#function raising ValueError when a backend's embeddings of the fixed corpus drift from the reference's
+def check_agreement(reference: EmbeddingModel, candidate: EmbeddingModel, min_cosine: float = 0.99, texts: List[str] = AGREEMENT_CORPUS) -> np.ndarray:
+    cosines = cosine_agreement(reference, candidate, texts)
+    if cosines.min() < min_cosine:
+        worst = int(cosines.argmin())
+        raise ValueError(f"Embedding backends disagree: cosine {cosines[worst]:.4f} < {min_cosine} for {texts[worst]!r}")
+    return cosines
@@ -1,5 +1,7 @@
 # Tests for chunking functionality
 
+import pytest
+
 from Project import chunk_text  # Assuming the chunking function is in chunking_module.py
 
 def simple_tokenizer(text: str):
@@ -93,4 +95,122 @@ def test_chunking_is_deterministic():
     chunks1 = chunk_text(text, simple_tokenizer)
     chunks2 = chunk_text(text, simple_tokenizer)
 
-    assert chunks1 == chunks2
\ No newline at end of file
+    assert chunks1 == chunks2
+
+#tests that streaming the text in pieces gives the same chunks as chunking it in one go
+def test_chunk_stream_matches_chunk_text():
+    from Project.rag.chunking.chunking import chunk_stream
+
+    text = "\n".join(" ".join(f"w{p}_{i}" for i in range(37 + p * 11)) for p in range(20))
+    pieces = [text[i:i + 97] for i in range(0, len(text), 97)] # cut mid-word and mid-paragraph
+
+    expected = chunk_text(text, simple_tokenizer, target_tokens=120, max_tokens=150, overlap_tokens=15, min_tokens=30)
+    streamed = list(chunk_stream(pieces, simple_tokenizer, target_tokens=120, max_tokens=150, overlap_tokens=15, min_tokens=30))
+
+    assert streamed == expected
+
+# --- Single tokenization engine (token_chunking.py) ---
+
+def test_whitespace_offsets_match_split():
+    from Project.rag.chunking.token_chunking import whitespace_offsets
+
+    text = "  alpha beta\n\ngamma delta\tépsilon 　 中文  "
+    assert [text[start:end] for start, end in whitespace_offsets(text)] == text.split()
+
+    text = "broken \ud800 surrogate\udfff text" # Lone surrogates, as a bad PDF text layer can give
+    assert [text[start:end] for start, end in whitespace_offsets(text)] == text.split()
+
+def test_chunk_text_by_tokens_empty_input():
+    from Project.rag.chunking.token_chunking import chunk_text_by_tokens, whitespace_offsets
+
+    assert chunk_text_by_tokens("", whitespace_offsets) == []
+    assert chunk_text_by_tokens("   \n\n  ", whitespace_offsets) == []
+
+#tests that budgets and overlap are exact in token space
+def test_chunk_text_by_tokens_exact_overlap():
+    from Project.rag.chunking.token_chunking import chunk_text_by_tokens, whitespace_offsets
+
+    words = [f"w{i}" for i in range(1000)]
+    text = "\n".join(" ".join(words[i:i + 40]) for i in range(0, 1000, 40)) # 25 paragraphs of 40 tokens
+
+    chunks = chunk_text_by_tokens(text, whitespace_offsets, target_tokens=200, max_tokens=300, overlap_tokens=30, min_tokens=0)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk["token_count"] == len(chunk["text"].split()) <= 300
+        assert text[chunk["char_start"]:chunk["char_end"]] == chunk["text"]
+    for first, second in zip(chunks, chunks[1:]):
+        assert first["text"].split()[-30:] == second["text"].split()[:30]
+    assert [c["chunk_id"] for c in chunks] == list(range(1, len(chunks) + 1))
+
+#tests the sliding window of an oversized paragraph, windows of target_tokens that overlap by overlap_tokens
+def test_chunk_text_by_tokens_oversized_paragraph():
+    from Project.rag.chunking.token_chunking import chunk_text_by_tokens, whitespace_offsets
+
+    text = " ".join(f"word{i}" for i in range(1000))
+    chunks = chunk_text_by_tokens(text, whitespace_offsets, target_tokens=200, max_tokens=300, overlap_tokens=20, min_tokens=0)
+
+    assert [c["token_count"] for c in chunks] == [200, 200, 200, 200, 200, 100]
+    assert chunks[1]["text"].split()[0] == "word180"
+    assert chunks[-1]["text"].split()[-1] == "word999"
+
+def test_chunk_text_by_tokens_rejects_overlap_larger_than_target():
+    from Project.rag.chunking.token_chunking import chunk_text_by_tokens, whitespace_offsets
+
+    with pytest.raises(ValueError):
+        chunk_text_by_tokens("some text", whitespace_offsets, target_tokens=50, overlap_tokens=50)
+
+#tests that hf_offsets gives the same tokens as tokenizing every line on its own
+def test_hf_offsets_match_per_line_tokenization():
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+    from Project.rag.chunking.token_chunking import hf_offsets
+
+    vocab = {"[UNK]": 0, "risk": 1, "con": 2, "##tract": 3, "##s": 4, ".": 5}
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]")
+
+    text = "risk contracts.\n\n  contract risks unknown\nrisk"
+    spans = hf_offsets(tokenizer)(text)
+
+    assert len(spans) == sum(len(tokenizer.tokenize(line)) for line in text.split("\n"))
+    assert [text[start:end] for start, end in spans][:5] == ["risk", "con", "tract", "s", "."]
+
+# --- Batched multi-document chunking (batch_chunking.py) ---
+
+def make_documents():
+    return [
+        "\n".join(" ".join(f"d{d}p{p}w{i}" for i in range(15 + (d * 7 + p * 13) % 90)) for p in range(d % 9 + 1))
+        for d in range(12)
+    ] + ["", "tiny", "shared boilerplate line\n" * 3, "word " * 700] # empty, small, repeated and oversized documents
+
+#tests that chunk_documents gives every document the same chunks as chunk_text, in input order
+def test_chunk_documents_matches_chunk_text():
+    from Project.rag.chunking.batch_chunking import chunk_documents
+
+    docs = make_documents()
+    options = {"target_tokens": 120, "max_tokens": 150, "overlap_tokens": 15, "min_tokens": 30}
+
+    expected = [chunk_text(doc, simple_tokenizer, **options) for doc in docs]
+    assert chunk_documents(docs, simple_tokenizer, **options) == expected
+    assert chunk_documents([{"text": doc} for doc in docs], simple_tokenizer, **options) == expected
+    assert chunk_documents(docs, simple_tokenizer, workers=2, **options) == expected
+
+#tests that a fast tokenizer is batched through its backend with the same counts as tokenizer.tokenize
+def test_chunk_documents_fast_tokenizer_matches_tokenize():
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+    from Project.rag.chunking.batch_chunking import chunk_documents
+
+    vocab = {"[UNK]": 0, "d": 1, "p": 2, "w": 3, "word": 4, "tiny": 5}
+    vocab.update({f"##{i}": len(vocab) + i for i in range(10)})
+    vocab.update({f"##{letter}": len(vocab) + i for i, letter in enumerate("dpw")})
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]")
+
+    docs = make_documents()
+    options = {"target_tokens": 200, "max_tokens": 300, "overlap_tokens": 20, "min_tokens": 40}
+
+    assert chunk_documents(docs, tokenizer, batch_size=7, **options) == [chunk_text(doc, tokenizer.tokenize, **options) for doc in docs]
@@ -0,0 +1,108 @@
+#tests for the embedding caches, the caches on their own need no model
+
+import numpy as np
+import time
+
+from Project.rag.llm.embedding_cache import EmbeddingCache, QueryEmbeddingCache, cache_key
+
+MODEL = "test-model"
+
+
+def vector(seed: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(seed).random(dim, dtype=np.float32)
+
+#tests that texts differing only in whitespace share a key, and that the model is part of the key
+def test_cache_key_normalizes_whitespace():
+    assert cache_key(MODEL, "Risk  review\n ") == cache_key(MODEL, "Risk review")
+    assert cache_key(MODEL, "Risk review") != cache_key(MODEL, "risk review")
+    assert cache_key("other-model", "Risk review") != cache_key(MODEL, "Risk review")
+
+#tests that lookups come back in input order with None for misses, and that hits and misses are counted
+def test_get_many_merges_hits_in_order():
+    cache = EmbeddingCache()
+    cache.put_many(MODEL, ["a", "c"], [vector(0), vector(2)])
+
+    found = cache.get_many(MODEL, ["a", "b", "c", "a"])
+
+    assert found[1] is None
+    assert np.array_equal(found[0], vector(0)) and np.array_equal(found[3], vector(0))
+    assert np.array_equal(found[2], vector(2))
+    assert (cache.stats.memory_hits, cache.stats.misses) == (3, 1)
+    assert cache.stats.hit_rate == 0.75
+    assert cache.get_many("other-model", ["a"]) == [None]
+
+#tests that the memory tier keeps only the most recently used entries
+def test_memory_lru_eviction():
+    cache = EmbeddingCache(memory_entries=2)
+    cache.put_many(MODEL, ["a", "b"], [vector(0), vector(1)])
+    cache.get_many(MODEL, ["a"]) # b is now the least recently used
+    cache.put_many(MODEL, ["c"], [vector(2)])
+
+    assert len(cache) == 2
+    assert cache.stats.memory_evictions == 1
+    assert cache.get_many(MODEL, ["b"]) == [None]
+    assert cache.get_many(MODEL, ["a"])[0] is not None
+
+#tests that the disk tier survives a new cache object and serves (then promotes) what memory dropped
+def test_disk_tier_persists(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    cache = EmbeddingCache(path, memory_entries=1)
+    cache.put_many(MODEL, ["a", "b"], [vector(0), vector(1)])
+
+    assert np.array_equal(cache.get_many(MODEL, ["a"])[0], vector(0)) # Only b was still in memory
+    assert cache.stats.disk_hits == 1
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    assert reopened.stats.size_bytes == 2 * vector(0).nbytes
+    found = reopened.get_many(MODEL, ["b", "a"])
+    assert np.array_equal(found[0], vector(1)) and np.array_equal(found[1], vector(0))
+    assert (reopened.stats.disk_hits, reopened.stats.memory_hits) == (2, 0)
+
+    reopened.get_many(MODEL, ["b"])
+    assert reopened.stats.memory_hits == 1
+
+#tests that the disk tier stays under max_bytes by evicting the least recently used vectors
+def test_disk_size_cap_evicts_least_recently_used(tmp_path):
+    size = vector(0).nbytes
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", memory_entries=0, max_bytes=2 * size)
+    cache.put_many(MODEL, ["a"], [vector(0)])
+    cache.put_many(MODEL, ["b"], [vector(1)])
+    cache.get_many(MODEL, ["a"]) # b is now the least recently used
+    cache.put_many(MODEL, ["c"], [vector(2)])
+
+    assert cache.stats.disk_evictions == 1
+    assert cache.stats.size_bytes == 2 * size
+    assert cache.get_many(MODEL, ["b"]) == [None]
+    assert all(found is not None for found in cache.get_many(MODEL, ["a", "c"]))
+
+    # Storing a text again replaces its vector instead of growing the cache
+    cache.put_many(MODEL, ["c"], [vector(3)])
+    assert cache.stats.size_bytes == 2 * size
+    assert np.array_equal(cache.get_many(MODEL, ["c"])[0], vector(3))
+
+#tests that query hits return the stored read-only vector and that the LRU bound evicts the oldest query
+def test_query_cache_lru():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("termination risk", vector(0))
+    cache.put("liability", vector(1))
+
+    hit = cache.get("termination  risk ")
+    assert np.array_equal(hit, vector(0)) and not hit.flags.writeable
+    assert cache.get("termination risk") is hit
+
+    cache.put("revenue", vector(2)) # liability is the least recently used
+    assert cache.get("liability") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (2, 1, 1)
+    assert len(cache) == 2
+
+#tests that queries older than ttl_seconds are embedded again
+def test_query_cache_ttl():
+    cache = QueryEmbeddingCache(ttl_seconds=0.05)
+    cache.put("termination risk", vector(0))
+    assert cache.get("termination risk") is not None
+
+    time.sleep(0.1)
+    assert cache.get("termination risk") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
@@ -2,6 +2,8 @@ import os
 os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1' # Disable symlink warnings for Hugging Face Hub
 
 from Project.rag.llm.embeddings import EmbeddingService
+from Project.rag.llm.base import EmbeddingModel
+from Project.rag.llm.embedding_cache import EmbeddingCache, QueryEmbeddingCache
 import pytest
 import numpy as np
 
@@ -62,4 +64,97 @@ def test_edge_cases(embedder):
     for t in texts:
         e = embedder.embed_text(t)
         assert len(e) == 384
-        assert all(isinstance(x, float) for x in e)
\ No newline at end of file
+        assert all(isinstance(x, float) for x in e)
+
+#tests that a cached service only encodes the misses and merges them with the hits in input order
+def test_cached_embed_batch_matches_uncached(embedder, tmp_path):
+    cached = EmbeddingService(cache=EmbeddingCache(tmp_path / "embeddings.sqlite"))
+
+    texts = ["Quarterly revenue", "Contract risk", "Quarterly  revenue ", "Liability clause"]
+    first = cached.embed_batch(texts[:2])
+    assert cached.cache.stats.misses == 2
+
+    batch = cached.embed_batch(texts)
+    assert (cached.cache.stats.hits, cached.cache.stats.misses) == (3, 3)
+    for e_cached, e_plain in zip(batch, embedder.embed_batch(texts)):
+        assert np.allclose(e_cached, e_plain, atol=1e-6)
+    assert batch[:2] == first
+
+#tests that the single query fast path gives encode()'s vector and that repeated queries come from the query cache
+def test_embed_query_fast_path_and_cache(embedder):
+    query = "What is the termination risk?"
+    expected = embedder.model.encode(query, normalize_embeddings=True)
+
+    vector = embedder._encode_one(query)
+    assert vector.dtype == np.float32
+    assert np.allclose(vector, expected, atol=1e-6)
+
+    cached = EmbeddingService(query_cache=QueryEmbeddingCache())
+    first = cached.embed_query(query)
+    assert cached.embed_query(query) is first
+    assert cached.embed_text(query) == first.tolist()
+    assert (cached.query_cache.stats.hits, cached.query_cache.stats.misses) == (2, 1)
+
+#tests that several queries are embedded in one call, sharing the query cache with embed_query
+def test_embed_queries_uses_query_cache(embedder):
+    queries = ["Termination risk?", "Liability cap", "Termination  risk?"]
+    cached = EmbeddingService(query_cache=QueryEmbeddingCache())
+    first = cached.embed_query(queries[1])
+
+    vectors = cached.embed_queries(queries)
+    assert vectors.shape == (3, 384) and vectors.dtype == np.float32
+    assert np.allclose(vectors, embedder.embed_array(queries), atol=1e-5)
+    assert np.array_equal(vectors[1], first)
+    assert len(cached.query_cache) == 2 # Queries differing only in whitespace are encoded once
+    assert cached.embed_queries([]).shape == (0, 384)
+
+#tests that embed_array gives a contiguous float32 array with the same rows as embed_batch
+def test_embed_array_matches_embed_batch(embedder):
+    texts = ["Hello", "World", "Hello"]
+    array = embedder.embed_array(texts)
+
+    assert array.dtype == np.float32 and array.flags.c_contiguous
+    assert array.shape == (3, 384)
+    assert np.allclose(array, embedder.embed_batch(texts), atol=1e-6)
+    assert embedder.embed_array([]).shape == (0, 384)
+
+#tests that models only implementing the list methods still get the array methods
+def test_embedding_model_array_shim():
+    class ListModel(EmbeddingModel):
+        def embed_text(self, text):
+            return [float(len(text)), 1.0]
+
+        def embed_batch(self, texts):
+            return [self.embed_text(text) for text in texts]
+
+    model = ListModel()
+    array = model.embed_array(["ab", "abc"])
+    assert array.dtype == np.float32 and array.flags.c_contiguous
+    assert array.tolist() == [[2.0, 1.0], [3.0, 1.0]]
+    assert model.embed_query("abcd").tolist() == [4.0, 1.0]
+
+#tests that pool mode shards large batches over worker processes and keeps the input order
+def test_pool_matches_in_process(embedder):
+    texts = [f"Clause {i}: " + "liability " * (i % 20) for i in range(60)]
+    expected = embedder.embed_array(texts)
+
+    embedder.start_pool(workers=2, min_texts=10)
+    try:
+        assert np.allclose(embedder.embed_array(texts), expected, atol=1e-5)
+        assert np.allclose(embedder.embed_array(texts[:3]), expected[:3], atol=1e-6) # Below min_texts, in process
+    finally:
+        embedder.stop_pool()
+    assert embedder.pool is None
+
+#tests that length-bucketed batches give encode()'s embeddings in input order and record their padding
+def test_length_bucketed_batches_match_encode(embedder):
+    texts = ["a", "liability " * 300, "Hello world", "risk " * 40, "", "contract " * 120]
+    expected = embedder.model.encode(texts, normalize_embeddings=True)
+
+    embedder.max_batch_tokens = 512 # Several batches
+    try:
+        assert np.allclose(embedder.embed_array(texts), expected, atol=1e-5)
+    finally:
+        embedder.max_batch_tokens = 4096
+    assert embedder.padding_stats.batches >= 2
+    assert 0.0 <= embedder.padding_stats.waste < 1.0
@@ -0,0 +1,37 @@
+#tests for the length-bucketed token budget batching of embeddings
+
+import numpy as np
+
+from Project.rag.llm.length_batching import PaddingStats, fixed_batch_padding, token_budget_batches
+
+#tests that every text is in exactly one batch and that batches stay within the token budget and size cap
+def test_batches_cover_texts_within_budget():
+    lengths = [5, 300, 12, 12, 80, 256, 3, 40, 40, 41] * 20
+    batches = token_budget_batches(lengths, max_batch_tokens=1024, max_batch_size=16)
+
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    for batch in batches:
+        batch_lengths = [lengths[index] for index in batch]
+        assert len(batch) <= 16
+        assert len(batch) == 1 or len(batch) * max(batch_lengths) <= 1024
+        assert batch_lengths == sorted(batch_lengths, reverse=True) # Longest first, so similar lengths share a batch
+
+#tests that long texts get small batches and short texts large ones
+def test_batch_size_adapts_to_length():
+    batches = token_budget_batches([500] * 10 + [10] * 100, max_batch_tokens=1000, max_batch_size=64)
+    assert [len(batch) for batch in batches] == [2, 2, 2, 2, 2, 64, 36]
+
+    assert [len(batch) for batch in token_budget_batches([5000, 0], max_batch_tokens=1000)] == [1, 1] # Over budget alone
+
+#tests the padding waste accounting, against fixed batches in arrival order
+def test_padding_stats():
+    lengths = [10, 100, 10, 100]
+    arrival = fixed_batch_padding(lengths, batch_size=2)
+    assert (arrival.batches, arrival.real_tokens, arrival.padded_tokens) == (2, 220, 400)
+    assert arrival.waste == 1 - 220 / 400
+
+    bucketed = PaddingStats()
+    for batch in token_budget_batches(lengths, max_batch_tokens=200, max_batch_size=2):
+        bucketed.add([lengths[index] for index in batch])
+    assert bucketed.waste == 0.0
+    assert PaddingStats().waste == 0.0
@@ -0,0 +1,91 @@
+#tests for the ONNX Runtime embedding backend, checked against the PyTorch SentenceTransformer
+
+import os
+os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1' # Disable symlink warnings for Hugging Face Hub
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+from Project.rag.database.vector_db import VectorDatabase
+from Project.rag.llm.embeddings import EmbeddingService, create_embedding_service
+from Project.rag.llm.embedding_cache import EmbeddingCache
+from Project.rag.llm.onnx_embeddings import AGREEMENT_CORPUS, check_agreement, export_onnx
+
+@pytest.fixture(scope="module")
+def embedder():
+    return EmbeddingService()
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    return export_onnx("all-MiniLM-L6-v2", tmp_path_factory.mktemp("onnx"))
+
+#tests that the exported graph gives the PyTorch embeddings
+def test_onnx_matches_torch(embedder, onnx_dir):
+    onnx = create_embedding_service("onnx", onnx_dir)
+    cosines = check_agreement(embedder, onnx, min_cosine=0.9999)
+
+    assert len(cosines) == len(AGREEMENT_CORPUS)
+    assert onnx.get_embedding_dimension() == 384
+    assert np.allclose(onnx.embed_array(AGREEMENT_CORPUS), embedder.embed_array(AGREEMENT_CORPUS), atol=1e-4)
+
+#tests that int8 quantized weights stay close to the PyTorch embeddings
+def test_quantized_onnx_agreement(embedder, onnx_dir):
+    quantized = create_embedding_service("onnx-int8", onnx_dir)
+    check_agreement(embedder, quantized, min_cosine=0.98)
+
+#tests that the ONNX backend keeps the service interface: lists, single queries, empty batches and its own cache keys
+def test_onnx_service_interface(onnx_dir):
+    cache = EmbeddingCache()
+    onnx = create_embedding_service("onnx", onnx_dir, cache=cache)
+
+    batch = onnx.embed_batch(["Hello", "World"])
+    assert len(batch) == 2 and all(len(e) == 384 for e in batch)
+    assert np.allclose(onnx.embed_text("Hello"), batch[0], atol=1e-5)
+    assert onnx.embed_array([]).shape == (0, 384)
+    assert onnx.cache_name.endswith(":onnx") # ONNX vectors aren't mixed with other backends' in a shared cache
+
+#tests that a vector database saved with the PyTorch backend loads and searches under the ONNX backend, and that
+#the int8 backend needs an explicit opt-in
+def test_onnx_loads_torch_directory(embedder, onnx_dir, tmp_path):
+    onnx = create_embedding_service("onnx", onnx_dir)
+    assert onnx.model_name == embedder.model_name
+
+    vector_db = VectorDatabase(embedder)
+    vector_db.add_chunks([
+        {
+            "text": text,
+            "document_id": str(i),
+            "chunk_id": "0",
+            "file_name": "test file",
+            "source": "test",
+            "metadata": {},
+            "citation": "test",
+            "created_at": "2026-02-02T22:17:45.123456+00:00"
+        }
+        for i, text in enumerate(AGREEMENT_CORPUS[:4])
+    ])
+    vector_db.save_directory(tmp_path)
+
+    loaded = VectorDatabase(onnx)
+    loaded.load_directory(tmp_path)
+    results, _ = loaded.search(AGREEMENT_CORPUS[2], top_k=1)
+    assert results[0]["text"] == AGREEMENT_CORPUS[2]
+
+    # The int8 graph's query vectors drift from the torch ones: refused unless the caller opts in
+    quantized = create_embedding_service("onnx-int8", onnx_dir)
+    with pytest.raises(ValueError, match="allow_backend_mismatch"):
+        VectorDatabase(quantized).load_directory(tmp_path)
+    VectorDatabase(quantized).load_directory(tmp_path, allow_backend_mismatch=True)
+
+#tests that the ONNX backend has every attribute of the PyTorch service, so features built on them work with both
+def test_onnx_has_service_state(embedder, onnx_dir):
+    onnx = create_embedding_service("onnx", onnx_dir)
+    assert set(vars(embedder)) - {"model_name", "model"} <= set(vars(onnx))
+    assert onnx.backend == "onnx" and onnx.pool is None and onnx.max_batch_tokens == 4096
+
+#tests that an unknown backend is rejected
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_embedding_service("tensorrt")
@@ -0,0 +1,61 @@
+#tests for the parallel bulk ingestion entry point
+
+import pytest
+
+from pathlib import Path
+from Project.rag.ingestion.documents_ingestion import ingest_many, collect_sources, IngestionStats
+
+# tests folders
+pdf_folder = Path("Tests/ingestion_tests/files/pdfs")
+docx_folder = Path("Tests/ingestion_tests/files/docx")
+
+pdf_files = list(pdf_folder.glob("*.pdf")) # Get all PDF files in the folder
+docx_files = list(docx_folder.glob("*.docx")) # Get all DOCX files in the folder
+
+files = pdf_files + docx_files
+
+pytestmark = pytest.mark.skipif(len(files) == 0, reason="No files found for testing.")
+
+#tests that a directory is expanded into the supported files it contains
+def test_collect_sources_expands_directory():
+    sources = collect_sources("Tests/ingestion_tests/files")
+
+    assert set(sources) == set(files)
+    assert all(Path(s).suffix in (".pdf", ".docx") for s in sources)
+
+#tests that every file is ingested across the pool and stats are reported
+def test_ingest_many_processes_all_files():
+    stats = IngestionStats()
+    results = list(ingest_many(files, workers=2, stats=stats))
+
+    assert {r["source"] for r in results} == {str(f) for f in files}
+    for result in results:
+        assert result["error"] is None
+        assert result["document"]["text"] != ""
+        assert result["seconds"] >= 0
+
+    assert stats.files == len(files)
+    assert stats.succeeded == len(files)
+    assert stats.failed == 0
+    assert stats.docs_per_sec > 0
+
+#tests that one corrupt file is reported without stopping the rest of the batch
+def test_ingest_many_isolates_errors(tmp_path):
+    corrupt = tmp_path / "corrupt.pdf"
+    corrupt.write_bytes(b"this is not a pdf")
+
+    stats = IngestionStats()
+    results = list(ingest_many(files + [corrupt], workers=2, stats=stats))
+
+    failed = [r for r in results if r["error"] is not None]
+    assert [r["source"] for r in failed] == [str(corrupt)]
+    assert failed[0]["document"] is None
+    assert stats.succeeded == len(files)
+    assert stats.failed == 1
+
+#tests that the single worker path gives the same documents as the pool
+def test_ingest_many_single_worker_matches_pool():
+    serial = {r["source"]: r["document"]["text"] for r in ingest_many(files, workers=1)}
+    pooled = {r["source"]: r["document"]["text"] for r in ingest_many(files, workers=2)}
+
+    assert serial == pooled
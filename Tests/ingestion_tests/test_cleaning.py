@@ -74,4 +74,77 @@ def test_no_double_spaces(extracted_text):
 
 def test_cleaned_text_not_empty(extracted_text):
     file, cleaned = extracted_text
-    assert cleaned.strip() != "", f"Cleaned text is empty for {file.name}"
\ No newline at end of file
+    assert cleaned.strip() != "", f"Cleaned text is empty for {file.name}"
+
+#tests that cleaning page by page gives exactly the same text as cleaning the joined document
+def test_streaming_cleaning_matches_full_cleaning():
+    from Project.rag.ingestion.text_preprocessing import iter_clean_extracted_text
+
+    pages = [
+        "Header: Quarterly report\nRevenue grew  Page 1 of 3\n\n\n",
+        "Footer: confidential\nPrinted 1/2/2024 10:15 PM at C:\\reports\\q1.pdf\n",
+        "Tracking ID: AB12 \t  final   words\n\n",
+    ]
+
+    assert "".join(iter_clean_extracted_text(pages)) == clean_extracted_text("".join(pages))
+
+#tests that cleaning page ranges in their workers and joining them gives exactly the text of cleaning the whole
+#document, including headers, footers and whitespace runs that cross the seams between ranges
+@pytest.mark.parametrize("bounds", [[0, 8], [0, 3, 8], [0, 1, 2, 5, 6, 8]])
+def test_cleaning_page_ranges_matches_full_cleaning(bounds):
+    from Project.rag.ingestion.text_preprocessing import clean_page_range, join_clean_page_ranges
+
+    pages = [
+        "Quarterly report\nRevenue grew\nCosts fell\nMargins held\nHeader: q1",
+        "continued here  Page 1 of 3\nPrinted 1/2/2024 10:15 PM\nat C:\\reports\\q1.pdf\nTracking ID: AB12\n\n",
+        "  \t final words\nFoo",
+        "ter: x\nnext line\nand another\nthen more\nstill more\nlast",
+        "",
+        "Footer: f\nafter the footer\nplain\nplain again\nand again",
+        "12/1",
+        "2/2024 1:00 AM end\none\ntwo\nthree\nfour   ",
+    ]
+    ranges = ["\n".join(pages[start:stop]) for start, stop in zip(bounds, bounds[1:])]
+
+    assert join_clean_page_ranges([clean_page_range(text) for text in ranges]) == clean_extracted_text("\n".join(pages))
+
+#tests that the streaming ingestion path produces the same chunks as ingesting then chunking
+@pytest.mark.parametrize("file", pdf_files + docx_files)
+def test_ingestion_chunks_matches_full_pipeline(file):
+    from Project.rag.ingestion.documents_ingestion import ingestion, ingestion_chunks
+    from Project.rag.chunking.chunking import chunk_text
+
+    document, chunks = ingestion_chunks(file, str.split)
+
+    assert list(chunks) == chunk_text(ingestion(file)["text"], str.split)
+    assert document["metadata"] == extract(file)["metadata"]
+
+#tests that the rule engine gives byte identical output to the original eight regex passes
+@pytest.mark.parametrize("text", [
+    "Header: a\nbody Page 2 of 9 text\n\n\nFooter: b\nend",
+    "Tracking ID: C:\\foo\\bar and 1/2/2024 10:15 PM \t \n\n x",
+    "Head\nHeader: er:\nFoo Page 1 of 2ter: y\n  \n\n  \\\\ \\x C:\\ 12/3/45 1:00 ",
+    "",
+    "   \n\n\t  ",
+])
+def test_cleaning_engine_matches_original_passes(text):
+    expected = re.sub(r'Page \d+ of \d+', '', text)
+    expected = re.sub(r'Header:.*\n', '', expected)
+    expected = re.sub(r'Footer:.*\n', '', expected)
+    expected = re.sub(r'\d{1,2}/\d{1,2}/\d{2,4} \d{1,2}:\d{2} (AM|PM)?', '', expected)
+    expected = re.sub(r'([a-zA-Z]:)?(\\[a-zA-Z0-9_.-]+)+\\?', '', expected)
+    expected = re.sub(r'Tracking ID: \w+', '', expected)
+    expected = re.sub(r'\n{2,}', '\n', expected)
+    expected = re.sub(r"\s{2,}", " ", expected).strip()
+
+    assert clean_extracted_text(text) == expected
+
+#tests that the cleaner can be extended and trimmed with named rules
+def test_cleaning_engine_is_configurable():
+    from Project.rag.ingestion.cleaning import DEFAULT_CLEANER, CleaningRule
+
+    cleaner = DEFAULT_CLEANER.with_rules(
+        CleaningRule("draft_marks", re.compile(r"\[DRAFT\]"), anchor="[DRAFT]")
+    ).without_rules("page_numbers")
+
+    assert cleaner.clean("[DRAFT] Page 1 of 2 summary") == "Page 1 of 2 summary"
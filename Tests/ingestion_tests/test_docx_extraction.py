@@ -0,0 +1,79 @@
+#tests that the streaming docx reader returns the same text and author as python-docx
+
+import io
+import pytest
+import zipfile
+
+from docx import Document
+from pathlib import Path
+from Project.rag.ingestion.docx_extraction import open_docx, read_docx_author
+from Project.rag.ingestion.dispatcher import extract, retrieve_document_props
+
+# tests folders
+docx_folder = Path("Tests/ingestion_tests/files/docx")
+docx_files = list(docx_folder.glob("*.docx")) # Get all DOCX files in the folder
+
+# Body with the markup python-docx treats specially: hyperlinks, tracked insertions, breaks, tabs and tables
+TRICKY_BODY = (
+    '<w:p><w:pPr><w:pStyle w:val="Title"/></w:pPr><w:r><w:t>Title</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t xml:space="preserve">a </w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t><w:br w:type="page"/></w:r>'
+    '<w:hyperlink><w:r><w:t>link</w:t></w:r></w:hyperlink><w:ins><w:r><w:t>inserted</w:t></w:r></w:ins>'
+    '<w:r><w:noBreakHyphen/><w:cr/><w:ptab w:relativeTo="margin" w:alignment="left" w:leader="none"/><w:t/></w:r></w:p>'
+    '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>table cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    '<w:p/>'
+    '<w:sectPr/>'
+)
+
+
+# --- Fixtures ---
+#docx whose document.xml body is replaced with `body`, built from a sample file's package
+def docx_with_body(body):
+    source = zipfile.ZipFile(docx_files[0])
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    package = io.BytesIO()
+    with zipfile.ZipFile(package, "w") as target:
+        for name in source.namelist():
+            target.writestr(name, document if name == "word/document.xml" else source.read(name))
+    return package
+
+# --- Test functions ---
+
+#tests that the text and author match python-docx on the sample files
+@pytest.mark.skipif(len(docx_files) == 0, reason="No DOCX files found for testing.")
+@pytest.mark.parametrize("docx_path", docx_files)
+def test_open_docx_matches_python_docx(docx_path):
+    doc = Document(docx_path)
+    author, pieces = open_docx(docx_path)
+
+    assert "".join(pieces) == "\n".join(para.text for para in doc.paragraphs)
+    assert author == read_docx_author(docx_path) == doc.core_properties.author
+    assert retrieve_document_props(docx_path) == (Path(docx_path).name, doc.core_properties.author or "unknown")
+
+#tests the run and paragraph rules on markup python-docx gives special treatment
+@pytest.mark.skipif(len(docx_files) == 0, reason="No DOCX files found for testing.")
+def test_open_docx_tricky_markup():
+    package = docx_with_body(TRICKY_BODY)
+    expected = "\n".join(para.text for para in Document(package).paragraphs)
+
+    package.seek(0)
+    text = "".join(open_docx(package)[1])
+
+    assert text == expected == "Title\na \tb\nclink-\n\t\n"
+
+#tests that extract() still returns the same text and metadata for docx files
+@pytest.mark.skipif(len(docx_files) == 0, reason="No DOCX files found for testing.")
+@pytest.mark.parametrize("docx_path", docx_files)
+def test_extract_docx_metadata(docx_path):
+    doc = Document(docx_path)
+    result = extract(docx_path)
+
+    assert result["text"] == "\n".join(para.text for para in doc.paragraphs)
+    assert result["metadata"] == {
+        "source_type": "docx",
+        "file_name": Path(docx_path).name,
+        "author": doc.core_properties.author or "unknown"
+    }
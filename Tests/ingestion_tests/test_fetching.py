@@ -0,0 +1,199 @@
+#tests for the pooled URL fetcher, run against local HTTP servers instead of the internet
+
+import pytest
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Project.rag.ingestion.fetching import URLFetcher
+from Project.rag.ingestion.http_cache import HTTPCache
+from Project.rag.ingestion.dispatcher import extract
+from Project.rag.ingestion.documents_ingestion import ingest_changed, ingest_many, IngestionStats
+from Project.rag.ingestion.manifest import IngestionManifest
+
+PAGE = "<html><body><nav>menu</nav><p>Quarterly report</p><script>x()</script><footer>f</footer></body></html>"
+
+
+#request handler that serves PAGE slowly and records how many requests were in flight at once
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+
+        try:
+            time.sleep(server.delay)
+            if self.path == "/missing":
+                self.send_error(404)
+            elif self.path == "/flaky" and hits == 1:
+                self.send_error(503) # Fails the first time only
+            elif self.path.startswith("/etag") and self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304) # Not modified since the client's copy
+                self.end_headers()
+            else:
+                body = PAGE.encode("utf-8")
+                self.send_response(200)
+                if self.path.startswith("/etag"):
+                    self.send_header("ETag", '"v1"')
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+# --- Fixtures ---
+def start_server(delay):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock, server.active, server.max_active, server.hits, server.delay = threading.Lock(), 0, 0, {}, delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@pytest.fixture
+def servers():
+    #Two stand-in servers on different ports, so they count as two hosts
+    started = [start_server(0.05), start_server(0.05)]
+    yield started
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+# --- Test functions ---
+
+#tests that extract() goes through the fetcher and parses the page like before
+def test_extract_uses_fetcher(servers):
+    with URLFetcher() as fetcher:
+        extracted = extract(f"{base_url(servers[0])}/page", fetcher=fetcher)
+
+    assert extracted["text"] == "Quarterly report"
+    assert extracted["metadata"]["source_type"] == "html"
+    assert fetcher.stats.succeeded == 1
+    assert fetcher.stats.bytes == len(PAGE)
+
+#tests that the per-host and global concurrency limits are respected
+def test_fetch_many_respects_concurrency_limits(servers):
+    urls = [f"{base_url(server)}/page{i}" for server in servers for i in range(12)]
+
+    with URLFetcher(max_concurrency=5, per_host=3) as fetcher:
+        results = list(fetcher.fetch_many(urls))
+
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert all(r.error is None and r.status == 200 for r in results)
+    assert all(server.max_active <= 3 for server in servers)
+    assert servers[0].max_active + servers[1].max_active >= 4 # Both hosts were actually served concurrently
+    assert fetcher.stats.bytes_per_sec > 0
+    assert fetcher.stats.avg_latency >= 0.05
+
+#tests that retryable statuses are retried and client errors are reported without retrying
+def test_fetch_many_retries_and_isolates_errors(servers):
+    urls = [f"{base_url(servers[0])}/flaky", f"{base_url(servers[0])}/missing"]
+
+    with URLFetcher(retries=2, backoff=0.01) as fetcher:
+        results = {r.url: r for r in fetcher.fetch_many(urls)}
+
+    assert results[urls[0]].error is None
+    assert results[urls[1]].html is None
+    assert results[urls[1]].error.startswith("HTTP error: 404")
+    assert servers[0].hits == {"/flaky": 2, "/missing": 1}
+    assert fetcher.stats.retries == 1
+
+#tests that ingest_many sends URLs through the fetcher alongside local files
+def test_ingest_many_fetches_urls_concurrently(servers):
+    urls = [f"{base_url(servers[0])}/page{i}" for i in range(8)]
+    stats = IngestionStats()
+
+    with URLFetcher(per_host=8) as fetcher:
+        start = time.perf_counter()
+        results = list(ingest_many(urls, workers=1, stats=stats, fetcher=fetcher))
+        elapsed = time.perf_counter() - start
+
+    assert sorted(r["source"] for r in results) == sorted(urls)
+    assert all(r["document"]["text"] == "Quarterly report" for r in results)
+    assert stats.succeeded == 8
+    assert elapsed < 8 * servers[0].delay # Faster than fetching one at a time
+
+#tests that fetched pages are parsed on the process pool and their parsed text still reaches the fetcher's cache
+def test_ingest_many_parses_urls_on_the_pool(servers, tmp_path):
+    urls = [f"{base_url(servers[0])}/etag-{i}" for i in range(6)]
+    cache = HTTPCache(tmp_path / "http_cache.sqlite")
+
+    with URLFetcher(per_host=6, cache=cache) as fetcher:
+        first = list(ingest_many(urls, workers=2, fetcher=fetcher))
+        second = list(ingest_many(urls, workers=2, fetcher=fetcher))
+
+    for results in (first, second):
+        assert sorted(r["source"] for r in results) == sorted(urls)
+        assert all(r["document"]["text"] == "Quarterly report" and "parsed_text" not in r for r in results)
+    assert cache.stats.text_hits == len(urls) # The second run reused the text parsed by the workers
+
+#tests that ingest_changed checks URL validators with concurrent HEAD requests through the fetcher
+def test_ingest_changed_checks_urls_through_fetcher(servers, tmp_path):
+    urls = [f"{base_url(servers[0])}/etag-{i}" for i in range(6)] + [f"{base_url(servers[1])}/no-validators"]
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+
+    with URLFetcher(per_host=6) as fetcher:
+        first = list(ingest_changed(urls, manifest, workers=1, fetcher=fetcher))
+        servers[0].max_active = 0
+        stats = IngestionStats()
+        second = list(ingest_changed(urls, manifest, workers=1, stats=stats, fetcher=fetcher))
+
+    assert len(first) == 7
+    assert [r["source"] for r in second] == [urls[-1]] # No validators, so always re-ingested
+    assert stats.skipped == 6
+    assert servers[0].max_active > 1 # The HEAD requests overlapped
+
+#tests that an unchanged page is revalidated with a 304 and its cached text skips parsing
+def test_http_cache_serves_unchanged_pages(servers, tmp_path):
+    url = f"{base_url(servers[0])}/etag-page"
+    parsed = []
+
+    def parse(html):
+        parsed.append(html)
+        return "Quarterly report"
+
+    cache = HTTPCache(tmp_path / "http_cache.sqlite")
+    with URLFetcher(cache=cache) as fetcher:
+        first = fetcher.fetch_text(url, parse)
+        second = fetcher.fetch_text(url, parse)
+
+    assert first == second == "Quarterly report"
+    assert parsed == [PAGE] # Parsed only on the first, full download
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.text_hits) == (1, 1, 1)
+    assert cache.stats.hit_rate == 0.5
+
+    # The cache is on disk, so a new cache object still has the page
+    reopened = HTTPCache(tmp_path / "http_cache.sqlite")
+    assert reopened.lookup(url).text == "Quarterly report"
+
+#tests that pages without validators aren't cached and the size cap evicts the least recently used page
+def test_http_cache_size_cap_and_lru_eviction(servers, tmp_path):
+    cache = HTTPCache(tmp_path / "http_cache.sqlite", max_bytes=2 * len(PAGE))
+    with URLFetcher(cache=cache) as fetcher:
+        fetcher.fetch(f"{base_url(servers[0])}/no-validators")
+        assert cache.stats.size_bytes == 0
+
+        for name in ["etag-a", "etag-b"]:
+            fetcher.fetch(f"{base_url(servers[0])}/{name}")
+        cache.lookup(f"{base_url(servers[0])}/etag-a") # etag-b is now the least recently used
+        fetcher.fetch(f"{base_url(servers[0])}/etag-c")
+
+    assert cache.stats.evictions == 1
+    assert cache.lookup(f"{base_url(servers[0])}/etag-b") is None
+    assert cache.lookup(f"{base_url(servers[0])}/etag-a") is not None
+    assert cache.stats.size_bytes <= 2 * len(PAGE)
@@ -0,0 +1,56 @@
+#tests that the html backends produce the same text as the original BeautifulSoup extraction
+
+import pytest
+
+from pathlib import Path
+from Project.rag.ingestion.fetching import get_default_fetcher
+from Project.rag.ingestion.html_extraction import bs4_html_to_text, stream_html_to_text, lxml_html_to_text
+from Project.rag.ingestion.text_preprocessing import html_to_text
+
+# tests folders
+html_folder = Path("Tests/ingestion_tests/files/html")
+
+html_urls = []
+for f in html_folder.glob("*.txt"):
+    # read each line in the txt file and strip whitespace
+    html_urls.extend([line.strip() for line in f.read_text().splitlines() if line.strip()])
+
+# Markup the streaming backend has to handle exactly like BeautifulSoup does
+TRICKY_HTML = [
+    "<html><body><nav>menu</nav><p>Kept</p><script>var a = '<p>x</p>';</script><footer>f</footer></body></html>",
+    "<div><nav>unclosed nav<p>inside</div>after the div",
+    "<p>a<!-- comment -->b</p><![CDATA[cdata]]><?pi x?>",
+    "<br>joined</br>string<br/>split</br>here",
+    "<template>hidden</template><ruby>kanji<rt>furigana</rt><rp>(</rp></ruby>",
+    "&amp; &copy &unknown; &#8217; &#x41; &#150; &#8<b>bold</b>",
+    "<table><tr><td> cell 1 </td><td>\n\ncell 2</td></tr></table>   trailing   ",
+    "",
+]
+
+# --- Test functions ---
+
+@pytest.mark.parametrize("html", TRICKY_HTML)
+def test_stream_backend_matches_bs4(html):
+    assert stream_html_to_text(html) == bs4_html_to_text(html)
+
+#tests the backends on the same live pages the other ingestion tests use
+@pytest.mark.skipif(len(html_urls) == 0, reason="No HTML URL files found for testing.")
+@pytest.mark.parametrize("url", html_urls)
+def test_backends_match_bs4_on_sample_pages(url):
+    html = get_default_fetcher().fetch(url)
+    expected = bs4_html_to_text(html)
+
+    assert stream_html_to_text(html) == expected
+
+@pytest.mark.parametrize("html", TRICKY_HTML[:2])
+def test_lxml_backend_on_well_formed_markup(html):
+    pytest.importorskip("lxml")
+
+    assert lxml_html_to_text(html) == bs4_html_to_text(html)
+
+def test_html_to_text_backend_selection():
+    html = TRICKY_HTML[0]
+
+    assert html_to_text(html) == html_to_text(html, backend="bs4") == "Kept"
+    with pytest.raises(ValueError):
+        html_to_text(html, backend="missing")
@@ -0,0 +1,80 @@
+#tests for the incremental re-ingestion manifest
+
+import pytest
+import shutil
+
+from pathlib import Path
+from Project.rag.ingestion.documents_ingestion import ingest_changed, IngestionStats
+from Project.rag.ingestion.manifest import IngestionManifest, file_fingerprint
+
+# tests folders
+pdf_folder = Path("Tests/ingestion_tests/files/pdfs")
+docx_folder = Path("Tests/ingestion_tests/files/docx")
+
+pdf_files = list(pdf_folder.glob("*.pdf")) # Get all PDF files in the folder
+docx_files = list(docx_folder.glob("*.docx")) # Get all DOCX files in the folder
+
+pytestmark = pytest.mark.skipif(len(pdf_files) < 2 or len(docx_files) == 0, reason="Not enough files found for testing.")
+
+# --- Fixture ---
+@pytest.fixture
+def corpus(tmp_path):
+    #Fixture that copies a small corpus into a temp folder so files can be changed
+    corpus_dir = tmp_path / "corpus"
+    corpus_dir.mkdir()
+    shutil.copy(pdf_files[0], corpus_dir / "report.pdf")
+    shutil.copy(docx_files[0], corpus_dir / "memo.docx")
+    return corpus_dir
+
+# --- Test functions ---
+
+#tests that the fingerprint only depends on file content
+def test_file_fingerprint_is_content_based(tmp_path):
+    a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    shutil.copy(pdf_files[0], a)
+    shutil.copy(pdf_files[0], b)
+
+    assert file_fingerprint(a) == file_fingerprint(b)
+    assert file_fingerprint(a) != file_fingerprint(pdf_files[1])
+
+#tests that a second run over an unchanged corpus skips everything
+def test_unchanged_sources_are_skipped(corpus, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+
+    manifest = IngestionManifest(manifest_path)
+    first = list(ingest_changed(corpus, manifest, workers=1))
+    manifest.save()
+    assert len(first) == 2
+
+    stats = IngestionStats()
+    second = list(ingest_changed(corpus, IngestionManifest(manifest_path), workers=1, stats=stats))
+    assert second == []
+    assert stats.skipped == 2
+
+#tests that only the modified file is re-ingested and that it keeps its document ID
+def test_modified_source_keeps_document_id(corpus, tmp_path):
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    first = {r["source"]: r["document"]["id"] for r in ingest_changed(corpus, manifest, workers=1)}
+    manifest.save()
+
+    shutil.copy(pdf_files[1], corpus / "report.pdf") # new content, same path
+
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    second = list(ingest_changed(corpus, manifest, workers=1))
+
+    assert [r["source"] for r in second] == [str(corpus / "report.pdf")]
+    assert second[0]["document"]["id"] == first[str(corpus / "report.pdf")]
+    assert manifest.get(corpus / "report.pdf")["fingerprint"] == file_fingerprint(pdf_files[1])
+
+#tests that chunk/vector IDs survive a save/load and deleted sources are reported
+def test_manifest_round_trip_and_missing_sources(corpus, tmp_path):
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    list(ingest_changed(corpus, manifest, workers=1))
+    manifest.set_chunks(corpus / "memo.docx", [1, 2, 3], [10, 11, 12])
+    manifest.save()
+
+    reloaded = IngestionManifest(tmp_path / "manifest.json")
+    assert reloaded.get(corpus / "memo.docx")["vector_ids"] == [10, 11, 12]
+
+    (corpus / "memo.docx").unlink()
+    assert reloaded.missing_sources([corpus / "report.pdf"]) == [str(corpus / "memo.docx")]
@@ -0,0 +1,140 @@
+#tests that parallel page range extraction gives the same text as reading the pdf page by page
+
+import pytest
+
+from concurrent.futures import Future
+from pathlib import Path
+from pypdf import PdfReader, PdfWriter
+from Project.rag.ingestion import documents_ingestion, pdf_extraction
+from Project.rag.ingestion.pdf_extraction import PARALLEL_MIN_PAGES, iter_pdf_pages, page_ranges, should_split
+from Project.rag.ingestion.text_preprocessing import extract_pdf_text
+from Project.rag.ingestion.documents_ingestion import ingest_many, ingestion
+
+# tests folders
+pdf_folder = Path("Tests/ingestion_tests/files/pdfs")
+pdf_files = list(pdf_folder.glob("*.pdf")) # Get all PDF files in the folder
+
+
+# --- Fixtures ---
+@pytest.fixture
+def large_pdf(tmp_path):
+    #Sample pages followed by enough blank pages to cross the parallel threshold, blank pages extract quickly
+    writer = PdfWriter()
+    for pdf in pdf_files:
+        for page in PdfReader(pdf).pages:
+            writer.add_page(page)
+    while len(writer.pages) < PARALLEL_MIN_PAGES + 10:
+        writer.add_blank_page(width=612, height=792)
+
+    path = tmp_path / "large.pdf"
+    writer.write(path)
+    return path
+
+# --- Test functions ---
+
+#tests that the page ranges cover every page exactly once, in order
+@pytest.mark.parametrize("page_count, workers", [(1, 4), (199, 8), (3000, 8), (3001, 3)])
+def test_page_ranges_cover_all_pages(page_count, workers):
+    ranges = page_ranges(page_count, workers)
+    assert [number for start, stop in ranges for number in range(start, stop)] == list(range(page_count))
+
+#tests that small pdfs, or a single worker, never start a pool
+def test_should_split_threshold():
+    assert not should_split(PARALLEL_MIN_PAGES - 1, workers=8)
+    assert not should_split(3000, workers=1)
+    assert should_split(PARALLEL_MIN_PAGES, workers=2)
+
+#tests that splitting a pdf into ranges gives the same pages as reading it in one process
+@pytest.mark.skipif(len(pdf_files) == 0, reason="No PDF files found for testing.")
+@pytest.mark.parametrize("pdf_path", pdf_files)
+def test_parallel_pages_match_serial(pdf_path):
+    serial = list(iter_pdf_pages(pdf_path, workers=1))
+    parallel = list(iter_pdf_pages(pdf_path, workers=2, min_pages=1)) # Force a split even for small files
+
+    assert parallel == serial
+
+#tests that a large pdf is split automatically and reassembled in page order
+@pytest.mark.skipif(len(pdf_files) == 0, reason="No PDF files found for testing.")
+def test_large_pdf_parallel_extraction(large_pdf):
+    assert extract_pdf_text(large_pdf, workers=2) == extract_pdf_text(large_pdf, workers=1)
+
+#tests that at most `workers` page ranges are extracted ahead of the pages being consumed, so a streaming caller
+#never holds the whole document's text
+@pytest.mark.skipif(len(pdf_files) == 0, reason="No PDF files found for testing.")
+def test_ranges_in_flight_are_bounded(large_pdf, monkeypatch):
+    submitted = []
+
+    # Runs each range at submit time in this process, recording how many were submitted
+    class RecordingExecutor:
+        def __init__(self, max_workers):
+            pass
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def submit(self, fn, *args):
+            submitted.append(args[1:])
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    monkeypatch.setattr(pdf_extraction, "ProcessPoolExecutor", RecordingExecutor)
+    workers = 2
+    ranges = page_ranges(PdfReader(large_pdf).get_num_pages(), workers)
+    starts = [start for start, _ in ranges]
+
+    pages = []
+    for page in iter_pdf_pages(large_pdf, workers=workers):
+        pages.append(page)
+        started = sum(start < len(pages) for start in starts) # Ranges whose pages are being yielded or done
+        assert len(submitted) <= started + workers # The range being yielded plus `workers` in flight
+
+    assert submitted == ranges and pages == list(iter_pdf_pages(large_pdf, workers=1))
+
+#tests that ingest_many spreads a large pdf's page ranges over its pool and returns the same document
+@pytest.mark.skipif(len(pdf_files) == 0, reason="No PDF files found for testing.")
+def test_ingest_many_splits_large_pdf(large_pdf):
+    sources = [large_pdf] + pdf_files
+    results = {r["source"]: r for r in ingest_many(sources, workers=2)}
+
+    assert sorted(results) == sorted(str(source) for source in sources)
+    for source in sources:
+        expected = ingestion(source, pdf_workers=1)
+        assert results[str(source)]["error"] is None
+        assert results[str(source)]["document"]["text"] == expected["text"]
+        assert results[str(source)]["document"]["metadata"] == expected["metadata"]
+
+#tests that the page ranges of a split pdf go through ingest_many's bounded queue instead of all being submitted
+#at once, and that they are cleaned in the workers into the same document
+@pytest.mark.skipif(len(pdf_files) == 0, reason="No PDF files found for testing.")
+def test_ingest_many_bounds_split_ranges(large_pdf, monkeypatch):
+    outstanding, peak = [0], [0]
+
+    # Runs each task at submit time in this process, counting the futures whose results weren't read yet
+    class CountedFuture(Future):
+        def result(self, timeout=None):
+            outstanding[0] -= 1
+            return super().result(timeout)
+
+    class RecordingExecutor:
+        def __init__(self, max_workers):
+            pass
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def submit(self, fn, *args):
+            future = CountedFuture()
+            future.set_result(fn(*args))
+            outstanding[0] += 1
+            peak[0] = max(peak[0], outstanding[0])
+            return future
+
+    monkeypatch.setattr(documents_ingestion, "ProcessPoolExecutor", RecordingExecutor)
+    workers = 2
+    sources = [large_pdf] + pdf_files * 8 # Enough files to fill the queue before the ranges are queued
+    results = list(ingest_many(sources, workers=workers))
+
+    assert peak[0] <= workers * 4 # ingest_many's max_in_flight
+    large = next(result for result in results if result["source"] == str(large_pdf))
+    assert large["document"]["text"] == ingestion(large_pdf, pdf_workers=1)["text"]
@@ -0,0 +1,26 @@
+#helpers shared by the vector database tests
+
+from typing import Dict, List, Sequence, Union
+
+def make_chunks(texts: Union[Sequence[str], int], document_id: str = "1", **fields) -> List[Dict]:
+    #chunk dicts of one document, like prepare_chunks'; an int gives that many generated texts. `fields` overrides
+    #the document's file_name, source, metadata or created_at
+    if isinstance(texts, int):
+        texts = [f"Text of chunk {c} of document {document_id}" for c in range(texts)]
+    document = {
+        "file_name": f"{document_id}.pdf",
+        "source": "pdf",
+        "metadata": {"author": "unknown"},
+        "created_at": "2026-02-02T22:17:45.123456+00:00",
+        **fields
+    }
+    return [
+        {
+            "document_id": document_id,
+            "chunk_id": str(i),
+            "text": text,
+            **document,
+            "citation": f"{document['file_name']}#chunk{i}"
+        }
+        for i, text in enumerate(texts)
+    ]
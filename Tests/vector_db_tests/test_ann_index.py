@@ -0,0 +1,156 @@
+#tests for the approximate nearest neighbor index options, on random unit vectors (no model needed)
+
+import faiss
+import numpy as np
+import pytest
+
+from Project.rag.database.ann_index import (
+    BLAS_MIN_QUERY_FLOATS, INDEX_KINDS, IndexConfig, add_with_ids, blas_for_batch, build_index, index_contents, index_kind,
+    index_storage, index_vectors, ivf_lists, remove_ids, search_parameters, set_search_params, with_ids
+)
+from Project.rag.database.vector_store import FullVectorStore, exact_rerank
+
+DIM = 32
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((4000, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(vectors, queries, k):
+    flat = faiss.IndexFlatIP(DIM)
+    flat.add(vectors)
+    return flat.search(queries, k)[1]
+
+#tests that each kind builds the right index and finds (nearly) the exact neighbors with generous search parameters
+@pytest.mark.parametrize("kind, params", [("flat", {}), ("hnsw", {"ef_search": 256}), ("ivf", {"nprobe": 64})])
+def test_index_kinds_recall(vectors, kind, params):
+    config = IndexConfig(kind=kind, **params)
+    index = build_index(DIM, config, vectors)
+    index.add(vectors)
+
+    assert index_kind(index) == kind
+    found = index.search(vectors[:50], 10)[1]
+    expected = exact_top_k(vectors, vectors[:50], 10)
+    recall = np.mean([len(set(f) & set(e)) / 10 for f, e in zip(found, expected)])
+    assert recall >= 0.95
+
+#tests that search parameters are applied and trade recall for work
+def test_search_params(vectors):
+    config = IndexConfig(kind="ivf", nprobe=1)
+    index = build_index(DIM, config, vectors)
+    index.add(vectors)
+    assert faiss.downcast_index(index).nprobe == 1
+
+    config.nprobe = 8
+    set_search_params(index, config)
+    assert faiss.downcast_index(index).nprobe == 8
+
+    hnsw = build_index(DIM, IndexConfig(kind="hnsw", ef_search=40))
+    assert faiss.downcast_index(hnsw).hnsw.efSearch == 40
+
+#tests IVF list sizing, vector read back and config validation
+def test_ivf_lists_and_vectors(vectors):
+    assert ivf_lists(IndexConfig(kind="ivf"), 100_000) == 1264 # 4 * sqrt(vectors)
+    assert ivf_lists(IndexConfig(kind="ivf", nlist=1000), 3900) == 100 # At least 39 training points per list
+    assert ivf_lists(IndexConfig(kind="ivf"), 10) == 1
+
+    index = build_index(DIM, IndexConfig(kind="ivf"), vectors)
+    index.add(vectors)
+    assert np.allclose(index_vectors(index), vectors)
+
+    with pytest.raises(ValueError):
+        build_index(DIM, IndexConfig(kind="ivf"))
+    with pytest.raises(ValueError):
+        IndexConfig(kind="lsh")
+
+#tests that each storage type builds compressed codes of the expected size and keeps recall, for every kind
+@pytest.mark.parametrize("kind", INDEX_KINDS)
+@pytest.mark.parametrize("storage, bytes_per_vector", [("float32", 4 * DIM), ("fp16", 2 * DIM), ("int8", DIM), ("pq", DIM // 8)])
+def test_storage_types(vectors, kind, storage, bytes_per_vector):
+    index = build_index(DIM, IndexConfig(kind=kind, storage=storage, ef_search=256, nprobe=64), vectors)
+    index.add(vectors)
+
+    assert index_kind(index) == kind
+    assert index_storage(index) == storage
+    codes = faiss.downcast_index(index.storage) if kind == "hnsw" else faiss.downcast_index(index)
+    assert codes.code_size == bytes_per_vector
+
+    found = index.search(vectors[:50], 10)[1]
+    recall = np.mean([len(set(f) & set(e)) / 10 for f, e in zip(found, exact_top_k(vectors, vectors[:50], 10))])
+    assert recall >= (0.2 if storage == "pq" else 0.9)
+
+#tests that re-ranking over-fetched candidates with the full vectors restores exact scores and order
+def test_exact_rerank(vectors, tmp_path):
+    store = FullVectorStore(DIM, tmp_path / "vectors.f32")
+    store.append(vectors[:1000])
+    store.append(vectors[1000:])
+    assert len(FullVectorStore(DIM, tmp_path / "vectors.f32")) == len(vectors) # Row count from the file size
+    with pytest.raises(ValueError):
+        FullVectorStore(DIM + 1, tmp_path / "vectors.f32") # Not a whole number of rows of another dimension
+    with pytest.raises(ValueError):
+        FullVectorStore(DIM, tmp_path / "vectors.f32", read_only=True).append(vectors[:1])
+
+    index = build_index(DIM, IndexConfig(storage="pq", pq_m=8), vectors)
+    index.add(vectors)
+    query = vectors[:1]
+    candidates = index.search(query, 200)[1]
+    scores, ids = exact_rerank(store, query, candidates, 10)
+
+    assert ids[0, 0] == 0 and scores[0, 0] == pytest.approx(1.0, abs=1e-5)
+    assert np.allclose(scores[0], vectors[ids[0]] @ query[0])
+    assert np.all(np.diff(scores[0]) <= 0)
+
+#tests that codes needing training refuse to build without enough vectors
+def test_storage_validation(vectors):
+    with pytest.raises(ValueError):
+        build_index(DIM, IndexConfig(storage="int8"))
+    with pytest.raises(ValueError):
+        build_index(DIM, IndexConfig(storage="pq"), vectors[:100])
+    with pytest.raises(ValueError):
+        build_index(DIM, IndexConfig(storage="pq", pq_m=5), vectors)
+    with pytest.raises(ValueError):
+        IndexConfig(storage="bf16")
+
+#tests that ID-mapped indexes keep IDs through removal and searches restricted by a selector
+@pytest.mark.parametrize("kind", ["flat", "hnsw", "ivf"])
+def test_ids_remove_and_selector(vectors, kind):
+    data, queries = vectors, vectors[:50]
+    index = with_ids(build_index(data.shape[1], IndexConfig(kind=kind, nlist=16), data))
+    ids = np.arange(len(data), dtype=np.int64) * 10
+    add_with_ids(index, data, ids)
+
+    found_ids, found = index_contents(index)
+    order = np.argsort(found_ids)
+    assert np.array_equal(found_ids[order], ids)
+    assert np.allclose(found[order], data, atol=1e-5)
+
+    deleted = ids[:len(ids) // 2]
+    excluded = faiss.IDSelectorNot(faiss.IDSelectorBatch(deleted))
+    params = search_parameters(index, IndexConfig(ef_search=64, nprobe=16), excluded)
+    _, result = index.search(queries, 10, params=params)
+    assert not np.isin(result, deleted).any()
+
+    if kind == "hnsw":
+        assert not remove_ids(index, deleted) # Graphs are rebuilt instead
+    else:
+        assert remove_ids(index, deleted)
+        assert index.ntotal == len(ids) - len(deleted)
+        _, result = index.search(queries, 10)
+        assert not np.isin(result, deleted).any()
+
+#tests that the BLAS threshold is only lowered while a large enough batch is searched, and restored after the last
+#of overlapping batches
+def test_blas_threshold_scoped_to_batches():
+    default = faiss.cvar.distance_compute_blas_threshold
+    assert default != BLAS_MIN_QUERY_FLOATS # Importing the package leaves FAISS's default
+
+    with blas_for_batch(BLAS_MIN_QUERY_FLOATS - 1):
+        assert faiss.cvar.distance_compute_blas_threshold == default
+    with blas_for_batch(BLAS_MIN_QUERY_FLOATS):
+        assert faiss.cvar.distance_compute_blas_threshold == BLAS_MIN_QUERY_FLOATS
+        with blas_for_batch(10 * BLAS_MIN_QUERY_FLOATS):
+            pass
+        assert faiss.cvar.distance_compute_blas_threshold == BLAS_MIN_QUERY_FLOATS
+    assert faiss.cvar.distance_compute_blas_threshold == default
@@ -0,0 +1,88 @@
+#tests for the metadata filter indexes and filtered vector search (no model needed)
+
+import faiss
+import numpy as np
+import pytest
+
+from Project.rag.database.ann_index import IndexConfig, add_with_ids, build_index, search_parameters, with_ids
+from Project.rag.database.filter_index import FilterIndex, TombstoneBitmap, to_bitmap
+from Project.rag.database.metadata_store import MetadataStore
+from Project.rag.database.vector_store import exact_search
+from Tests.vector_db_tests.chunk_helpers import make_chunks
+
+DIM = 32
+
+#tests value, any-of and range conditions, deletes, and that the index built from a store matches one built by adding
+def test_match():
+    chunks = [
+        chunk
+        for d in range(6)
+        for chunk in make_chunks(
+            3,
+            f"doc-{d}",
+            source="pdf" if d % 2 else "web",
+            metadata={"author": f"author-{d % 3}"},
+            created_at=f"2026-01-{d + 1:02d}T12:00:00+00:00"
+        )
+    ]
+    store = MetadataStore()
+    ids = store.extend(chunks)
+    added = FilterIndex()
+    added.add(ids, chunks)
+
+    for index in (added, FilterIndex.from_store(store)):
+        assert list(np.flatnonzero(index.match({"source": "pdf"}))) == [i for i, chunk in enumerate(chunks) if chunk["source"] == "pdf"]
+        assert list(np.flatnonzero(index.match({"document_id": ["doc-0", "doc-5"], "author": "author-2"}))) == [15, 16, 17]
+        assert list(np.flatnonzero(index.match({"created_at": {"gte": "2026-01-02T00:00:00+00:00", "lt": "2026-01-03T00:00:00+00:00"}}))) == [3, 4, 5]
+        assert index.match({"file_name": "missing.pdf"}).sum() == 0
+        assert index.match({}).sum() == 18
+
+    added.remove(store.delete_document("doc-1"))
+    assert list(np.flatnonzero(added.match({"source": "pdf"}))) == list(np.flatnonzero(FilterIndex.from_store(store).match({"source": "pdf"})))
+
+    for bad in [{"title": "x"}, {"created_at": "2026-01-01"}, {"created_at": {"after": "2026-01-01"}}, ["source"]]:
+        with pytest.raises(ValueError):
+            added.match(bad)
+
+#tests that a bitmap selector keeps a search to the matching IDs, and that exact search over them agrees with it
+@pytest.mark.parametrize("kind", ["flat", "hnsw", "ivf"])
+def test_filtered_search(kind):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = with_ids(build_index(DIM, IndexConfig(kind=kind, nlist=16), vectors))
+    add_with_ids(index, vectors, np.arange(len(vectors)))
+
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[rng.choice(len(vectors), 100, replace=False)] = True
+    selector = faiss.IDSelectorBitmap(to_bitmap(mask))
+    params = search_parameters(index, IndexConfig(ef_search=16, nprobe=2), selector, selectivity=mask.mean())
+    _, found = index.search(vectors[:20], 5, params=params)
+    assert mask[found].all()
+
+    ids = np.flatnonzero(mask)
+    scores, exact = exact_search(vectors[ids], ids, vectors[:20], 5)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+    recall = np.mean([len(set(f) & set(e)) / 5 for f, e in zip(found, exact)])
+    assert recall >= 0.9 # efSearch / nprobe grow with the filter's selectivity
+
+    scores, padded = exact_search(vectors[ids[:3]], ids[:3], vectors[:2], 5)
+    assert (padded[:, 3:] == -1).all() and set(padded[0, :3]) == set(ids[:3])
+
+#tests that tombstones added after the selector is made are skipped by it, and that growing the bitmap keeps them
+def test_tombstone_bitmap():
+    vectors = np.random.default_rng(0).standard_normal((100, DIM), dtype=np.float32)
+    index = with_ids(faiss.IndexFlatIP(DIM))
+    add_with_ids(index, vectors, np.arange(len(vectors)))
+
+    tombstones = TombstoneBitmap([3, 10])
+    selector = tombstones.live_selector()
+    tombstones.add([0, 1]) # Shows through the selector already made
+    _, found = index.search(vectors[:5], 100, params=faiss.SearchParameters(sel=selector))
+    assert not set(found.ravel()) & {0, 1, 3, 10}
+
+    tombstones.add([99, 5000])
+    _, found = index.search(vectors[:5], 100, params=faiss.SearchParameters(sel=tombstones.live_selector()))
+    assert not set(found.ravel()) & {0, 1, 3, 10, 99}
+    assert len(tombstones) == 6
+    assert list(tombstones.contains(np.array([-1, 0, 2, 5000, 10_000]))) == [False, True, False, True, False]
@@ -0,0 +1,73 @@
+#tests for the SQLite chunk metadata store of the vector database (no model needed)
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from Project.rag.database.metadata_store import MetadataStore
+from Tests.vector_db_tests.chunk_helpers import make_chunks
+
+#tests that chunks come back equal to what was added, by position and in the requested order
+def test_round_trip():
+    chunks = [chunk for d in range(3) for chunk in make_chunks(4, f"doc-{d}")]
+    chunks[5]["page"] = 2 # Keys beyond the Chunk schema are kept
+    store = MetadataStore()
+    store.extend(chunks[:7])
+    store.extend(chunks[7:])
+
+    assert len(store) == 12
+    assert store[5] == chunks[5]
+    assert store.get_many([11, 0, 11]) == [chunks[11], chunks[0], chunks[11]]
+    assert list(store) == chunks
+    with pytest.raises(IndexError):
+        store[12]
+
+#tests that the fields shared by a document's chunks are stored once, and that saving and opening keeps everything
+def test_documents_stored_once_and_save_open(tmp_path):
+    chunks = [chunk for d in range(5) for chunk in make_chunks(20, f"doc-{d}")]
+    store = MetadataStore()
+    store.extend(chunks)
+    store.save(tmp_path / "metadata.sqlite")
+
+    with sqlite3.connect(tmp_path / "metadata.sqlite") as db:
+        assert db.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 5
+        assert db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 100
+
+    opened = MetadataStore.open(tmp_path / "metadata.sqlite")
+    assert len(opened) == 100
+    assert opened.get_many([42, 99]) == [chunks[42], chunks[99]]
+
+    opened.extend(make_chunks(1, "doc-0")) # Opened in place: new chunks continue the positions
+    assert len(MetadataStore.open(tmp_path / "metadata.sqlite")) == 101
+
+#tests that metadata pickled by np.save (the old format) is still loaded
+def test_open_legacy_npy(tmp_path):
+    chunks = [chunk for d in range(2) for chunk in make_chunks(3, f"doc-{d}")]
+    np.save(tmp_path / "metadata.npy", np.array(chunks, dtype=object))
+
+    store = MetadataStore.open(tmp_path / "metadata.npy")
+    assert list(store) == chunks
+
+#tests that deleting a document tombstones its IDs, and that IDs are never handed out again
+def test_delete_document_and_tombstones(tmp_path):
+    chunks = [chunk for d in range(3) for chunk in make_chunks(2, f"doc-{d}")]
+    store = MetadataStore(tmp_path / "metadata.sqlite")
+    assert list(store.extend(chunks)) == [0, 1, 2, 3, 4, 5]
+
+    assert list(store.delete_document("doc-1")) == [2, 3]
+    assert len(store) == 4 and list(store.ids()) == [0, 1, 4, 5]
+    assert list(store.tombstones()) == [2, 3] and store.tombstone_count == 2
+    assert MetadataStore.open(tmp_path / "metadata.sqlite").tombstone_count == 2 # Kept in the settings table
+    assert list(store) == chunks[:2] + chunks[4:]
+    with pytest.raises(IndexError):
+        store[2]
+
+    assert list(store.extend(make_chunks(1, "doc-0"))) == [6]
+    store.clear_tombstones([2, 3])
+    assert len(store.tombstones()) == 0 and store.tombstone_count == 0
+
+    reopened = MetadataStore.open(tmp_path / "metadata.sqlite")
+    assert reopened.next_id == 7 and len(reopened) == 5
+    store.delete_document("doc-0")
+    assert MetadataStore(tmp_path / "metadata.sqlite", read_only=True).next_id == 7 # Even with the highest ID deleted
@@ -0,0 +1,112 @@
+#tests for saving the vector database to a versioned directory and loading it memory mapped
+
+import json
+import os
+
+import pytest
+
+from Project import EmbeddingService, VectorDatabase
+from Project.rag.database.ann_index import IndexConfig
+from Project.rag.database.persistence import FORMAT_VERSION, MANIFEST_FILE
+from Tests.vector_db_tests.chunk_helpers import make_chunks
+
+TEXTS = ["Cats are small animals", "Dogs bark loudly", "Stocks fell sharply"]
+
+@pytest.fixture(scope="module")
+def embedder():
+    return EmbeddingService()
+
+#tests that a saved directory loads memory mapped, searches the same and refuses writes
+def test_save_and_mmap_load(embedder, tmp_path):
+    vector_db = VectorDatabase(embedder)
+    vector_db.add_chunks(make_chunks(TEXTS))
+    manifest = vector_db.save_directory(tmp_path)
+
+    assert manifest["format_version"] == FORMAT_VERSION and manifest["generation"] == 1
+    assert (manifest["dimension"], manifest["count"]) == (vector_db.dim, 3)
+    assert manifest["model_name"] == embedder.model_name
+    assert all(entry["checksum"].startswith("sha256:") for entry in manifest["files"].values())
+
+    loaded = VectorDatabase(embedder)
+    loaded.load_directory(tmp_path, verify_checksums=True)
+    assert loaded.read_only and loaded.index.ntotal == 3
+    assert loaded.search("Dogs bark loudly", top_k=3, min_similarity=-1) == vector_db.search("Dogs bark loudly", top_k=3, min_similarity=-1)
+
+    with pytest.raises(ValueError):
+        loaded.add_chunks(make_chunks(["More text"], document_id="2"))
+
+#tests that a writable load leaves the saved files untouched, and that saving again replaces the old generation
+def test_writable_load_and_generations(embedder, tmp_path):
+    vector_db = VectorDatabase(embedder)
+    vector_db.add_chunks(make_chunks(TEXTS[:2]))
+    vector_db.save_directory(tmp_path)
+
+    loaded = VectorDatabase(embedder)
+    loaded.load_directory(tmp_path, mmap=False)
+    loaded.add_chunks(make_chunks(TEXTS[2:], document_id="2"))
+    VectorDatabase(embedder).load_directory(tmp_path, verify_checksums=True) # Still matches its manifest
+
+    manifest = loaded.save_directory(tmp_path)
+    assert manifest["generation"] == 2 and manifest["count"] == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([MANIFEST_FILE] + [entry["name"] for entry in manifest["files"].values()])
+
+#tests that re-ranking with the full vectors works on a mapped compressed index
+def test_mmap_compressed_rerank(embedder, tmp_path):
+    config = IndexConfig(storage="int8", flat_below=3, rerank=True)
+    vector_db = VectorDatabase(embedder, config)
+    vector_db.add_chunks(make_chunks(TEXTS))
+    vectors = tmp_path / vector_db.save_directory(tmp_path)["files"]["vectors"]["name"]
+    os.utime(vectors, (0, 0))
+
+    loaded = VectorDatabase(embedder, IndexConfig(storage="int8", rerank=True))
+    loaded.load_directory(tmp_path)
+    results, scores = loaded.search("Stocks fell sharply", top_k=1)
+    assert results[0]["text"] == "Stocks fell sharply" and scores[0] == pytest.approx(1.0, abs=1e-5)
+    assert vectors.stat().st_mtime == 0 # Only read, so a read-only mount works too
+
+    # Without a config of its own, a loaded database searches the way the saved one did
+    restored = VectorDatabase(embedder)
+    restored.load_directory(tmp_path)
+    assert restored.index_config == config and restored.full_vectors is not None
+    results, scores = restored.search("Stocks fell sharply", top_k=1)
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+#tests that mismatched or damaged directories are rejected
+def test_load_rejects_mismatches(embedder, tmp_path):
+    vector_db = VectorDatabase(embedder)
+    vector_db.add_chunks(make_chunks(TEXTS))
+    manifest = vector_db.save_directory(tmp_path)
+    manifest_path = tmp_path / MANIFEST_FILE
+
+    for change in [{"format_version": FORMAT_VERSION + 1}, {"dimension": vector_db.dim + 1}, {"model_name": "another-model"}]:
+        manifest_path.write_text(json.dumps({**manifest, **change}))
+        with pytest.raises(ValueError):
+            VectorDatabase(embedder).load_directory(tmp_path)
+
+    manifest_path.write_text(json.dumps(manifest))
+    with open(tmp_path / manifest["files"]["index"]["name"], "ab") as f:
+        f.write(b"\0") # Size no longer matches
+    with pytest.raises(ValueError):
+        VectorDatabase(embedder).load_directory(tmp_path)
+
+    with pytest.raises(ValueError):
+        VectorDatabase(embedder).load_directory(tmp_path / "missing")
+
+#tests that tombstones are saved, so a mapped load still skips deleted chunks until compaction
+def test_tombstones_survive_load(embedder, tmp_path):
+    vector_db = VectorDatabase(embedder, IndexConfig(compact_ratio=None))
+    vector_db.add_chunks(make_chunks(TEXTS[:2]))
+    vector_db.add_chunks(make_chunks(TEXTS[2:], document_id="2"))
+    vector_db.delete_document("1")
+    manifest = vector_db.save_directory(tmp_path)
+    assert (manifest["count"], manifest["vectors"], manifest["tombstones"]) == (1, 3, 2)
+
+    loaded = VectorDatabase(embedder)
+    loaded.load_directory(tmp_path)
+    results, _ = loaded.search("Dogs bark loudly", top_k=3, min_similarity=-1)
+    assert [chunk["text"] for chunk in results] == [TEXTS[2]]
+
+    writable = VectorDatabase(embedder)
+    writable.load_directory(tmp_path, mmap=False)
+    assert writable.compact() == 2 and writable.index.ntotal == 1
+    assert writable.save_directory(tmp_path)["tombstones"] == 0
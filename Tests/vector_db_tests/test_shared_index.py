@@ -0,0 +1,110 @@
+#tests that worker processes attached to one saved directory share its pages instead of each holding a copy
+#(Linux only: memory is read from /proc/<pid>/smaps_rollup). Workers are separate Python processes like uvicorn's
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from Project.rag.database.shared_index import load_shared
+from Project.rag.database.vector_db import VectorDatabase
+from Project.rag.llm.base import EmbeddingModel
+from Tests.vector_db_tests.chunk_helpers import make_chunks
+
+# Each worker imports the whole package (sentence-transformers included) on its own, so the test takes about a minute
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="needs /proc/<pid>/smaps_rollup")
+]
+
+ROOT = Path(__file__).resolve().parents[2] # Repository root, importable by the workers
+DIM = 384
+VECTORS = 10_000 # 15 MB of float32 vectors: large next to a worker's own heap, small enough to stay quick
+
+# A worker: attach to the directory (mapped or read), touch every index and metadata page, report its growth
+WORKER = """
+import json, sys
+import numpy as np
+from Project.rag.database.shared_index import load_shared, process_memory
+from Project.rag.database.vector_db import VectorDatabase
+
+class Dimension:
+    def get_embedding_dimension(self):
+        return %d
+
+directory, mmap = sys.argv[1], sys.argv[2] == "mmap"
+before = process_memory()
+if mmap:
+    vector_db = load_shared(Dimension(), directory)
+else:
+    vector_db = VectorDatabase(Dimension())
+    vector_db.load_directory(directory, mmap=False)
+vector_db.index.search(np.ones((1, %d), dtype=np.float32), 10) # A flat scan reads every vector
+for _ in vector_db.metadata: # Reads every metadata page
+    pass
+after = process_memory()
+print(json.dumps({"private_mb": after.private_mb - before.private_mb, "rss_mb": after.rss_mb - before.rss_mb}))
+""" % (DIM, DIM)
+
+#stands in for the embedding model: the workers only search with vectors
+class RandomModel(EmbeddingModel):
+    model_name = None
+
+    def get_embedding_dimension(self):
+        return DIM
+
+    def embed_text(self, text):
+        return np.random.default_rng(0).standard_normal(DIM).tolist()
+
+    def embed_batch(self, texts):
+        return [self.embed_text(text) for text in texts]
+
+@pytest.fixture(scope="module")
+def directory(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("shared")
+    rng = np.random.default_rng(0)
+    vector_db = VectorDatabase(RandomModel())
+    chunks = [
+        chunk for d in range(VECTORS // 50)
+        for chunk in make_chunks([f"Chunk {c} " + "contract clause " * 10 for c in range(50)], str(d))
+    ]
+    vector_db.add_vectors(chunks, rng.standard_normal((VECTORS, DIM), dtype=np.float32))
+    vector_db.save_directory(directory)
+    return directory
+
+def run_workers(directory, mode, count):
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, str(directory), mode],
+            stdout=subprocess.PIPE,
+            text=True,
+            cwd=ROOT,
+            env={**os.environ, "PYTHONPATH": str(ROOT)}
+        )
+        for _ in range(count)
+    ]
+    return [json.loads(worker.communicate(timeout=300)[0]) for worker in workers]
+
+#tests that mapped workers add almost no private memory each, while workers reading the files each add a copy
+def test_workers_share_mapped_pages(directory):
+    index_mb = VECTORS * DIM * 4 / 2**20
+
+    # Like the first uvicorn worker: this process maps the files and keeps every page resident
+    owner = load_shared(RandomModel(), directory)
+    owner.index.search(np.ones((1, DIM), dtype=np.float32), 10)
+
+    mapped = run_workers(directory, "mmap", 3)
+    for worker in mapped:
+        assert worker["private_mb"] < 0.15 * index_mb # The pages are shared, only a small heap is private
+
+    read = run_workers(directory, "read", 1)
+    assert read[0]["private_mb"] > 0.8 * index_mb # A full copy per worker
+
+    # RSS counts shared pages too, so each mapped worker looks as big as a reader but costs the same small amount
+    assert all(worker["rss_mb"] > 0.8 * index_mb for worker in mapped + read)
+    spread = max(worker["private_mb"] for worker in mapped) - min(worker["private_mb"] for worker in mapped)
+    assert spread < 0.1 * index_mb
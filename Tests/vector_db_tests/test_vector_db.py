@@ -1,8 +1,14 @@
 from Project import VectorDatabase
 from Project import EmbeddingService
+from Project.rag.database.ann_index import IndexConfig, index_kind, index_storage
+from Tests.vector_db_tests.chunk_helpers import make_chunks
 
+import faiss
+import numpy as np
 import pytest
 
+TEXTS = ["Cats are small animals", "Dogs bark loudly", "Stocks fell sharply"]
+
 # Test adding chunks to the vector database
 def test_add_chunks_increases_index_and_metadata():
     embedding_service = EmbeddingService()
@@ -133,3 +139,217 @@ def test_add_chunks_missing_text_raises():
 
     with pytest.raises(ValueError):
         vector_db.add_chunks(bad_chunks)
+
+# Test that a configured approximate index takes over once the corpus reaches flat_below, and still finds chunks
+def test_approximate_index_after_flat_below():
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, IndexConfig(kind="hnsw", flat_below=3))
+
+    chunks = make_chunks(TEXTS)
+
+    vector_db.add_chunks(chunks[:2])
+    assert index_kind(vector_db.index) == "flat"
+
+    vector_db.add_chunks(chunks[2:])
+    assert index_kind(vector_db.index) == "hnsw"
+    assert vector_db.index.ntotal == 3
+
+    vector_db.set_search_params(ef_search=16)
+    results, _ = vector_db.search("Dogs bark loudly", top_k=1)
+    assert results[0]["text"] == "Dogs bark loudly"
+
+# Test that compressed storage with re-ranking returns exact scores from the full vectors kept on disk
+def test_compressed_storage_rerank(tmp_path):
+    embedding_service = EmbeddingService()
+    config = IndexConfig(storage="int8", flat_below=3, rerank=True)
+    vector_db = VectorDatabase(embedding_service, config, vectors_path=tmp_path / "vectors.f32")
+
+    chunks = make_chunks(TEXTS)
+    vector_db.add_chunks(chunks)
+    assert index_storage(vector_db.index) == "int8"
+    assert len(vector_db.full_vectors) == 3
+
+    results, scores = vector_db.search("Dogs bark loudly", top_k=2, min_similarity=-1)
+    assert results[0]["text"] == "Dogs bark loudly"
+    assert scores[0] == pytest.approx(1.0, abs=1e-5) # Exact cosine, not the int8 approximation
+
+    # A fresh database would hand out IDs 0.. while its rows land after the ones already in the file
+    with pytest.raises(ValueError):
+        VectorDatabase(embedding_service, config, vectors_path=tmp_path / "vectors.f32")
+
+# Test that a batch of queries gets, per query, the (metadata, score) pairs search() returns
+def test_search_batch_matches_search():
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service)
+
+    chunks = make_chunks(TEXTS)
+    vector_db.add_chunks(chunks)
+
+    queries = ["Dogs bark loudly", "Stocks fell sharply", "Cats are small animals"]
+    batched = vector_db.search_batch(queries, top_k=2, min_similarity=0.99)
+    assert [[metadata["text"] for metadata, _ in pairs] for pairs in batched] == [[query] for query in queries]
+
+    for query, pairs in zip(queries, vector_db.search_batch(queries, top_k=3, min_similarity=-1)):
+        results, scores = vector_db.search(query, top_k=3, min_similarity=-1)
+        assert [metadata for metadata, _ in pairs] == results
+        assert np.allclose([score for _, score in pairs], scores, atol=1e-5)
+
+    assert vector_db.search_batch([]) == []
+
+# Test that a saved database loads with its metadata opened in place and searches the same
+def test_save_load(tmp_path):
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service)
+
+    chunks = make_chunks(TEXTS)
+    vector_db.add_chunks(chunks)
+    vector_db.save(str(tmp_path / "index.faiss"), tmp_path / "metadata.sqlite")
+
+    loaded = VectorDatabase(embedding_service)
+    loaded.load(str(tmp_path / "index.faiss"), tmp_path / "metadata.sqlite")
+    assert loaded.index.ntotal == 3 and len(loaded.metadata) == 3
+
+    results, _ = loaded.search("Dogs bark loudly", top_k=1)
+    assert results == [chunks[1]]
+
+# Test that deleted documents are never returned, that upserts replace a document's chunks and that compaction
+# drops the deleted vectors, for in-place removal (flat) and rebuilds (hnsw)
+@pytest.mark.parametrize("kind", ["flat", "hnsw"])
+def test_delete_upsert_compact(kind):
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, IndexConfig(kind=kind, flat_below=3, compact_ratio=None))
+
+    vector_db.add_chunks(make_chunks(["Cats are small animals", "Dogs bark loudly"], "animals"))
+    vector_db.add_chunks(make_chunks(["Stocks fell sharply", "Bond yields rose"], "markets"))
+
+    assert vector_db.delete_document("animals") == 2
+    assert vector_db.delete_document("missing") == 0
+    assert len(vector_db.metadata) == 2 and vector_db.index.ntotal == 4 # Tombstoned, not yet removed
+    results, _ = vector_db.search("Dogs bark loudly", top_k=4, min_similarity=-1)
+    assert [chunk["document_id"] for chunk in results] == ["markets", "markets"]
+    assert all(chunk["document_id"] == "markets" for pairs in vector_db.search_batch(["Cats", "Dogs"], top_k=4, min_similarity=-1) for chunk, _ in pairs)
+
+    ids = vector_db.upsert_document("markets", make_chunks(["Stocks rallied", "Bond yields rose", "Oil slipped"], "markets"))
+    assert list(ids) == [4, 5, 6] # IDs are never reused
+    with pytest.raises(ValueError):
+        vector_db.upsert_document("markets", make_chunks(["Cats"], "animals"))
+
+    assert vector_db.compact() == 4
+    assert vector_db.index.ntotal == 3 and len(vector_db.metadata.tombstones()) == 0
+    assert index_kind(vector_db.index) == kind
+    results, _ = vector_db.search("Stocks rallied", top_k=5, min_similarity=-1)
+    assert results[0]["text"] == "Stocks rallied" and len(results) == 3
+
+# Test that deletes compact on their own once compact_ratio of the index is deleted
+def test_delete_compacts_at_ratio():
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, IndexConfig(compact_ratio=0.5))
+
+    chunks = [chunk for i, text in enumerate(TEXTS + ["Bond yields rose"]) for chunk in make_chunks([text], str(i))] # One document each
+    vector_db.add_chunks(chunks)
+
+    vector_db.delete_document("0")
+    assert vector_db.index.ntotal == 4
+    vector_db.delete_document("1")
+    assert vector_db.index.ntotal == 2 and len(vector_db.metadata.tombstones()) == 0
+
+# Test that filtered searches only return matching chunks, with top_k taken among them, for every search path:
+# the bitmap selector (flat), exact scoring of few matches (hnsw) and re-ranking
+@pytest.mark.parametrize("config", [IndexConfig(), IndexConfig(kind="hnsw", flat_below=3), IndexConfig(storage="int8", flat_below=3, rerank=True)])
+def test_filtered_search(config):
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, config)
+
+    chunks = [
+        {
+            "text": text,
+            "document_id": str(i),
+            "chunk_id": "0",
+            "file_name": f"file{i}.txt",
+            "source": source,
+            "metadata": {"author": author},
+            "citation": f"file{i}.txt#chunk0",
+            "created_at": f"2026-02-0{i + 1}T10:00:00+00:00"
+        }
+        for i, (text, source, author) in enumerate([
+            ("Dogs bark loudly", "web", "alice"),
+            ("Dogs bark at night", "pdf", "bob"),
+            ("Stocks fell sharply", "pdf", "alice"),
+            ("Cats are small animals", "pdf", "carol")
+        ])
+    ]
+    vector_db.add_chunks(chunks)
+
+    everything, _ = vector_db.search("Dogs bark loudly", top_k=4, min_similarity=-1)
+    results, _ = vector_db.search("Dogs bark loudly", top_k=1, min_similarity=-1, filters={"source": "pdf"})
+    assert results == [next(chunk for chunk in everything if chunk["source"] == "pdf")] # Not cut by an unfiltered top_k
+
+    results, _ = vector_db.search("Dogs bark loudly", top_k=4, min_similarity=-1, filters={"author": ["alice", "carol"], "created_at": {"gt": "2026-02-01T10:00:00+00:00"}})
+    assert sorted(chunk["text"] for chunk in results) == ["Cats are small animals", "Stocks fell sharply"]
+
+    assert vector_db.search("Dogs bark loudly", filters={"document_id": "missing"}) == ([], None)
+    pairs = vector_db.search_batch(["Dogs bark loudly", "Cats"], top_k=4, min_similarity=-1, filters={"source": "web"})
+    assert [[chunk["text"] for chunk, _ in query_pairs] for query_pairs in pairs] == [["Dogs bark loudly"]] * 2
+
+    vector_db.delete_document("1")
+    results, _ = vector_db.search("Dogs bark loudly", top_k=4, min_similarity=-1, filters={"source": "pdf"})
+    assert sorted(chunk["text"] for chunk in results) == ["Cats are small animals", "Stocks fell sharply"]
+    with pytest.raises(ValueError):
+        vector_db.search("Dogs bark loudly", filters={"title": "x"})
+
+# Test that an IVF index is retrained with more lists once the corpus outgrows the lists it was trained with,
+# unless ivf_retrain_growth is None
+@pytest.mark.parametrize("growth, nlist", [(4, 10), (None, 2)])
+def test_ivf_retrained_as_corpus_grows(growth, nlist):
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, IndexConfig(kind="ivf", flat_below=100, ivf_retrain_growth=growth))
+
+    vectors = np.random.default_rng(0).standard_normal((400, vector_db.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vector_db.add_vectors(make_chunks(100, "first"), vectors[:100])
+    assert faiss.downcast_index(vector_db.index).nlist == 2 # 100 vectors train 100 // 39 lists
+
+    vector_db.add_vectors(make_chunks(300, "second"), vectors[100:])
+    assert faiss.downcast_index(vector_db.index).nlist == nlist # 400 // 39 lists after the retrain
+    assert vector_db.index.ntotal == 400
+    assert vector_db._search_vectors(vectors[:5], 1, None)[1][:, 0].tolist() == list(range(5)) # IDs kept
+
+# Test deletes and upserts on a flat PQ index, whose search takes no ID selector: tombstoned results are dropped
+# from an over-fetch instead
+def test_delete_upsert_flat_pq():
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, IndexConfig(storage="pq", flat_below=256, compact_ratio=None))
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, vector_db.dim), dtype=np.float32)
+    chunks = [chunk for d in range(6) for chunk in make_chunks(50, f"doc-{d}")]
+    vector_db.add_vectors(chunks, vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    assert index_storage(vector_db.index) == "pq"
+
+    vector_db.delete_document("doc-0")
+    vector_db.upsert_document("doc-1", make_chunks(["Dogs bark loudly", "Stocks fell sharply"], "doc-1"))
+    results, _ = vector_db.search("Dogs bark loudly", top_k=202, min_similarity=-1)
+    assert len(results) == 202 # Every live chunk
+    assert not any(chunk["document_id"] == "doc-0" or chunk["text"].endswith("of document doc-1") for chunk in results)
+
+    assert vector_db.compact() == 100 and vector_db.index.ntotal == 202
+
+# Test filtered search on a flat PQ index, which takes no ID selector: few matching vectors are scored directly,
+# more are over-fetched and the rest dropped
+@pytest.mark.parametrize("filter_exact_below", [10_000, 10])
+def test_filtered_search_flat_pq(filter_exact_below):
+    embedding_service = EmbeddingService()
+    vector_db = VectorDatabase(embedding_service, IndexConfig(storage="pq", flat_below=256, filter_exact_below=filter_exact_below))
+
+    chunks = [chunk for d in range(6) for chunk in make_chunks(50, str(d), source="pdf" if d % 2 else "web")]
+    vectors = np.random.default_rng(0).standard_normal((300, vector_db.dim), dtype=np.float32)
+    vector_db.add_vectors(chunks, vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    assert index_storage(vector_db.index) == "pq"
+
+    results, scores = vector_db.search("Chunk 7", top_k=10, min_similarity=-1, filters={"source": "pdf"})
+    assert len(results) == 10 and all(chunk["source"] == "pdf" for chunk in results)
+    assert scores == sorted(scores, reverse=True)
+
+    vector_db.delete_document("1")
+    results, _ = vector_db.search("Chunk 7", top_k=300, min_similarity=-1, filters={"source": "pdf"})
+    assert len(results) == 100 and all(chunk["document_id"] in ("3", "5") for chunk in results)